@@ -0,0 +1,63 @@
+"""
+Benchmark: filas/segundo de la evaluación bit-paralela frente a la evaluación fila a fila.
+
+Uso:
+    python benchmarks/bench_bitsets.py [n ...]
+
+La evaluación fila a fila se mide sobre una muestra de filas (como mucho
+2^16) y se extrapola, porque recorrer 2^24 filas en Python tarda minutos.
+"""
+import os
+import sys
+import time
+from itertools import islice, product
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from formulas import parse_formula, variables  # noqa: E402
+from truth_table import evaluate  # noqa: E402
+from bitsets import evaluate_bits  # noqa: E402
+
+SAMPLE_ROWS = 1 << 16
+
+
+def make_formula(n):
+    """Fórmula de prueba con n variables que usa todos los conectivos."""
+    names = [f"X{i}" for i in range(n)]
+    ops = ['∧', '∨', '→', '↔']
+    parts = []
+    for i in range(0, n - 1):
+        a, b = names[i], names[i + 1]
+        neg = '¬' if i % 3 == 0 else ''
+        parts.append(f"({neg}{a} {ops[i % len(ops)]} {b})")
+    return ' ∨ '.join(parts) if n % 2 else ' ∧ '.join(parts)
+
+
+def bench_naive(node, names):
+    rows = min(1 << len(names), SAMPLE_ROWS)
+    start = time.perf_counter()
+    # Asignaciones en el orden de la tabla (V antes que F)
+    for values in islice(product((True, False), repeat=len(names)), rows):
+        evaluate(node, dict(zip(names, values)))
+    return rows / (time.perf_counter() - start)
+
+
+def bench_bits(node, names):
+    rows = 1 << len(names)
+    start = time.perf_counter()
+    evaluate_bits(node, names)
+    return rows / (time.perf_counter() - start)
+
+
+def main(sizes):
+    print(f"{'n':>3} {'filas':>10} {'fila a fila (f/s)':>18} {'bit-paralelo (f/s)':>19} {'aceleración':>11}")
+    for n in sizes:
+        node = parse_formula(make_formula(n))
+        names = variables(node)
+        naive = bench_naive(node, names)
+        bits = bench_bits(node, names)
+        print(f"{n:>3} {1 << n:>10} {naive:>18,.0f} {bits:>19,.0f} {bits / naive:>10.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 16, 20, 24])
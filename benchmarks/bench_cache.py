@@ -0,0 +1,102 @@
+"""
+Microbenchmark: SimpleCache actual (LRU O(1)) frente a la implementación anterior
+(que recorría y ordenaba toda la caché en cada get/set).
+
+Uso:
+    python benchmarks/bench_cache.py [tamaño ...]
+
+Cada medida se limita a ~0.5 s, así que la versión anterior con 100k entradas
+se mide sobre pocas operaciones y se extrapola a operaciones/segundo.
+"""
+import os
+import random
+import sys
+import time
+from threading import Lock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from caching import SimpleCache  # noqa: E402
+
+TIME_BUDGET = 0.5
+
+
+class LegacySimpleCache:
+    """Copia de la SimpleCache original de model.py, como referencia."""
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = {}
+        self.lock = Lock()
+
+    def _prune(self):
+        now = time.time()
+        keys = list(self.store.keys())
+        for k in keys:
+            v, ts = self.store.get(k, (None, 0))
+            if now - ts > self.ttl:
+                self.store.pop(k, None)
+        if len(self.store) > self.maxsize:
+            items = sorted(self.store.items(), key=lambda x: x[1][1])
+            for k, _ in items[: len(self.store) - self.maxsize]:
+                self.store.pop(k, None)
+
+    def get(self, key):
+        with self.lock:
+            self._prune()
+            val = self.store.get(key)
+            if val:
+                return val[0]
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            self.store[key] = (value, time.time())
+            self._prune()
+
+
+def fill(cache, size):
+    # Se rellena directamente para no medir el coste cuadrático del llenado
+    if isinstance(cache, LegacySimpleCache):
+        now = time.time()
+        cache.store = {f"k{i}": (i, now) for i in range(size)}
+    else:
+        for i in range(size):
+            cache.set(f"k{i}", i)
+
+
+def run(cache, size):
+    """Mezcla 90% get (acierto) / 10% set (clave nueva, provoca desalojo)."""
+    rng = random.Random(0)
+    ops = 0
+    new_key = size
+    start = time.perf_counter()
+    deadline = start + TIME_BUDGET
+    while True:
+        for _ in range(10):
+            if rng.random() < 0.9:
+                cache.get(f"k{rng.randrange(size)}")
+            else:
+                cache.set(f"k{new_key}", new_key)
+                new_key += 1
+            ops += 1
+        if time.perf_counter() >= deadline:
+            break
+    return ops / (time.perf_counter() - start)
+
+
+def main(sizes):
+    print(f"{'entradas':>9} {'anterior (op/s)':>16} {'LRU O(1) (op/s)':>16} {'aceleración':>11}")
+    for size in sizes:
+        legacy = LegacySimpleCache(maxsize=size, ttl=3600)
+        fill(legacy, size)
+        current = SimpleCache(maxsize=size, ttl=3600)
+        fill(current, size)
+        old_rate = run(legacy, size)
+        new_rate = run(current, size)
+        print(f"{size:>9} {old_rate:>16,.0f} {new_rate:>16,.0f} {new_rate / old_rate:>10.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [256, 10_000, 100_000])
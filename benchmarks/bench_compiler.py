@@ -0,0 +1,63 @@
+"""
+Benchmark: filas/segundo de la fórmula compilada (compiler.py) frente a
+recorrer el árbol en cada fila (truth_table.interpret).
+
+Uso:
+    python benchmarks/bench_compiler.py [n ...]
+
+Para cada n se usa la fórmula de prueba de bench_bitsets.py con n variables,
+se mide el tiempo de compilarla una vez y se evalúan las mismas filas (como
+mucho 2^16) con los dos métodos, comprobando que coinciden.
+"""
+import os
+import sys
+import time
+from itertools import islice, product
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from formulas import parse_formula, variables  # noqa: E402
+from truth_table import interpret  # noqa: E402
+from compiler import compile_formula  # noqa: E402
+from bench_bitsets import make_formula  # noqa: E402
+
+SAMPLE_ROWS = 1 << 16
+
+
+def sample_rows(names):
+    return list(islice(product((True, False), repeat=len(names)), SAMPLE_ROWS))
+
+
+def bench_interpret(node, names, rows):
+    envs = [dict(zip(names, values)) for values in rows]
+    start = time.perf_counter()
+    results = [interpret(node, env) for env in envs]
+    return len(rows) / (time.perf_counter() - start), results
+
+
+def bench_compiled(node, rows):
+    compile_formula.cache_clear()
+    start = time.perf_counter()
+    fn, _ = compile_formula(node)
+    compile_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    results = [fn(*values) for values in rows]
+    return len(rows) / (time.perf_counter() - start), compile_ms, results
+
+
+def main(sizes):
+    print(f"{'n':>3} {'filas':>7} {'árbol (f/s)':>13} {'compilada (f/s)':>16} {'compilar (ms)':>14} {'aceleración':>11}")
+    for n in sizes:
+        node = parse_formula(make_formula(n))
+        names = variables(node)
+        rows = sample_rows(names)
+        tree, expected = bench_interpret(node, names, rows)
+        compiled, compile_ms, results = bench_compiled(node, rows)
+        if results != expected:
+            raise SystemExit(f"n={n}: la fórmula compilada no coincide con el recorrido del árbol")
+        print(f"{n:>3} {len(rows):>7} {tree:>13,.0f} {compiled:>16,.0f} {compile_ms:>14.2f} {compiled / tree:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [4, 8, 12, 16, 24])
@@ -0,0 +1,221 @@
+"""
+Informe de tamaño de los prompts: tokens de entrada por petición con los
+prompts anteriores (instrucciones sangradas y concatenadas en el contenido del
+usuario) frente a los actuales de prompts.py (compactos, en systemInstruction).
+
+Uso:
+    python benchmarks/bench_prompts.py [--api]
+
+Sin argumentos los tokens se estiman (prompts.estimate_tokens). Con --api y
+GOOGLE_API_KEY definida se cuentan con el endpoint countTokens de Gemini.
+"""
+import json
+import os
+import sys
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from model import DEFAULT_API_URL, LogicaModelo  # noqa: E402
+from prompts import estimate_tokens, TAREA_ORACION, TAREA_LOTE, TAREA_TABLA, TAREA_SIMPLIFICACION  # noqa: E402
+
+EJEMPLOS = {
+    TAREA_ORACION: "si llueve y no llevo paraguas, me mojo",
+    TAREA_LOTE: ["llueve o hace sol", "si estudio, apruebo", "no es cierto que Juan venga"],
+    TAREA_TABLA: "(P → Q) ∧ (Q → R) → (P → R)",
+    TAREA_SIMPLIFICACION: "¬(P ∧ Q) ∨ (P ∧ Q)",
+}
+
+
+class LegacyPrompts:
+    """Copia de los prompts originales de model.py, como referencia."""
+
+    def _get_system_prompt(self):
+        """Define las instrucciones para el modelo de IA."""
+        return """
+        Eres un experto en lógica proposicional. Tu tarea es convertir una oración en lenguaje natural a su forma simbólica.
+        Sigue estas reglas estrictamente:
+        1.  Identifica las proposiciones atómicas en la oración.
+        2.  Asigna una variable proposicional (P, Q, R, etc.) a cada proposición atómica única.
+        3.  Si una proposición está negada (ej. "no vi la película"), la proposición atómica es la forma afirmativa ("vi la película").
+        4.  Reconoce los conectores lógicos y sus sinónimos:
+            - 'y', 'pero', 'aunque' se traducen a '∧'.
+            - 'o' se traduce a '∨'.
+            - 'si...entonces' o 'si..., ...' se traducen a '→'.
+            - 'si y solo si' se traduce a '↔'.
+            - 'no' se traduce a '¬'.
+        5.  Construye la fórmula simbólica final.
+        6.  Devuelve el resultado en un formato JSON VÁLIDO, sin ningún texto adicional antes o después. El JSON debe tener dos claves: "formula" y "leyenda".
+            - "formula": Un string con la expresión simbólica.
+            - "leyenda": Un objeto donde cada clave es una variable (P, Q, ...) y su valor es la proposición atómica correspondiente en su forma afirmativa.
+
+        Ejemplo 1:
+        Oración: "si no estuvieras loca, no habrías venido aquí"
+        Respuesta JSON:
+        {
+          "formula": "¬ P → ¬ Q",
+          "leyenda": {
+            "P": "estuvieras loca",
+            "Q": "habrías venido aquí"
+          }
+        }
+
+        Ejemplo 2:
+        Oración: "vi la pelicula aunque no lei la novela"
+        Respuesta JSON:
+        {
+          "formula": "P ∧ ¬ Q",
+          "leyenda": {
+            "P": "vi la pelicula",
+            "Q": "lei la novela"
+          }
+        }
+        """
+
+    def _get_batch_prompt(self):
+        """Instrucciones adicionales para convertir varias oraciones en una sola llamada."""
+        return self._get_system_prompt() + """
+        Ahora recibirás VARIAS oraciones en un array JSON. Conviértelas de forma independiente
+        (cada una con sus propias variables P, Q, R...) siguiendo las reglas anteriores.
+        Devuelve un JSON VÁLIDO con una única clave "resultados": una lista con un objeto
+        {"formula": ..., "leyenda": {...}} por oración, en el mismo orden y con la misma longitud que la entrada.
+        """
+
+    def _get_truth_table_prompt(self):
+        """Define las instrucciones para que la IA genere una tabla de verdad."""
+        return """
+        Eres un experto en lógica proposicional. Tu tarea es generar una tabla de verdad detallada para una fórmula simbólica dada, mostrando todos los pasos intermedios.
+        Sigue estas reglas estrictamente:
+        1.  Identifica las variables proposicionales (P, Q, R, etc.) en la fórmula.
+        2.  Identifica todas las sub-fórmulas de la expresión, desde las más simples hasta la más compleja (la fórmula completa).
+        3.  Calcula todas las combinaciones de valores de verdad (Usa 'V' para verdadero y 'F' para falso).
+        4.  Evalúa el valor de verdad para cada sub-fórmula y para la fórmula completa en cada combinación.
+        5.  Clasifica la fórmula final como "Tautología", "Contradicción" o "Contingencia".
+        6.  Devuelve el resultado en un formato JSON VÁLIDO, sin ningún texto adicional antes o después. El JSON debe tener tres claves: "header", "rows" y "clasificacion".
+            - "header": Una lista de strings con los nombres de las columnas. Debe incluir primero las variables, luego todas las sub-fórmulas en orden de complejidad, y finalmente la fórmula completa.
+            - "rows": Una lista de listas, donde cada sublista representa una fila de la tabla con los valores 'V' o 'F'.
+            - "clasificacion": Un string que puede ser "Tautología", "Contradicción" o "Contingencia".
+
+        Ejemplo 1:
+        Fórmula: "(P ∧ Q) → P"
+        Respuesta JSON:
+        {
+          "header": ["P", "Q", "P ∧ Q", "(P ∧ Q) → P"],
+          "rows": [
+            ["V", "V", "V", "V"],
+            ["V", "F", "F", "V"],
+            ["F", "V", "F", "V"],
+            ["F", "F", "F", "V"]
+          ],
+          "clasificacion": "Tautología"
+        }
+
+        Usa los siguientes símbolos en la fórmula del header:
+        - Conjunción: ∧
+        - Disyunción: ∨
+        - Negación: ¬
+        - Condicional: →
+        - Bicondicional: ↔
+        """
+
+    def _get_simplification_prompt(self):
+        """Define las instrucciones para que la IA simplifique una fórmula lógica."""
+        return """
+        Eres un experto en lógica proposicional y álgebra booleana. Tu tarea es simplificar una fórmula lógica dada, mostrando cada paso del proceso.
+
+        Sigue estas reglas estrictamente:
+        1.  Analiza la fórmula de entrada.
+        2.  Aplica las leyes de equivalencia lógica (De Morgan, distributiva, asociativa, negación, identidad, etc.) una por una para reducir la fórmula.
+        3.  El objetivo es obtener la fórmula lógicamente equivalente más corta.
+        4.  Devuelve el resultado en un formato JSON VÁLIDO, sin ningún texto adicional antes o después. El JSON debe tener dos claves: "pasos" y "formula_simplificada".
+            - "formula_simplificada": Un string con la expresión simbólica final.
+            - "pasos": Una lista de objetos, donde cada objeto representa un paso de la simplificación y tiene dos claves: "formula" y "regla".
+
+        Ejemplo 1:
+        Fórmula: "(P ∧ Q) ∨ (P ∧ ¬Q)"
+        Respuesta JSON:
+        {
+          "pasos": [
+            {
+              "formula": "(P ∧ Q) ∨ (P ∧ ¬Q)",
+              "regla": "Fórmula original"
+            },
+            {
+              "formula": "P ∧ (Q ∨ ¬Q)",
+              "regla": "Ley distributiva"
+            },
+            {
+              "formula": "P ∧ V",
+              "regla": "Ley de negación (Q ∨ ¬Q ≡ V)"
+            },
+            {
+              "formula": "P",
+              "regla": "Ley de identidad (P ∧ V ≡ P)"
+            }
+          ],
+          "formula_simplificada": "P"
+        }
+
+        Usa los siguientes símbolos en la fórmula de salida:
+        - Conjunción: ∧
+        - Disyunción: ∨
+        - Negación: ¬
+        - Condicional: →
+        - Bicondicional: ↔
+        """
+
+    def build(self, task, value):
+        if task == TAREA_ORACION:
+            return self._get_system_prompt() + "\nOración: \"" + value + "\"\nRespuesta JSON:"
+        if task == TAREA_LOTE:
+            return self._get_batch_prompt() + "\nOraciones: " + json.dumps(value, ensure_ascii=False) + "\nRespuesta JSON:"
+        if task == TAREA_TABLA:
+            return self._get_truth_table_prompt() + "\nFórmula: \"" + value + "\"\nRespuesta JSON:"
+        return self._get_simplification_prompt() + "\nFórmula: \"" + value + "\"\nRespuesta JSON:"
+
+
+def current_prompt(modelo, task, value):
+    if task == TAREA_ORACION:
+        return modelo._sentence_prompt(value)
+    if task == TAREA_LOTE:
+        return modelo._batch_prompt(value)
+    if task == TAREA_TABLA:
+        return modelo._truth_table_ai_prompt(value)
+    return modelo._simplification_ai_prompt(value)
+
+
+def count_tokens_api(payload, api_key):
+    """Tokens de entrada de un cuerpo generateContent según countTokens."""
+    url = DEFAULT_API_URL.replace(":generateContent", ":countTokens")
+    model = "models/" + DEFAULT_API_URL.rsplit("/", 1)[1].split(":")[0]
+    body = {"generateContentRequest": {"model": model, **{k: v for k, v in payload.items() if k != "generationConfig"}}}
+    resp = requests.post(url, params={"key": api_key}, json=body, timeout=20)
+    resp.raise_for_status()
+    return resp.json()["totalTokens"]
+
+
+def main(use_api):
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if use_api and not api_key:
+        sys.exit("--api necesita GOOGLE_API_KEY")
+    modelo = LogicaModelo(api_key="informe")
+    legacy = LegacyPrompts()
+    print(f"{'tarea':<15} {'anterior':>9} {'actual':>7} {'sistema':>8} {'usuario':>8} {'ahorro':>7}")
+    for task, value in EJEMPLOS.items():
+        old_payload = modelo._build_payload(legacy.build(task, value), True)
+        prompt = current_prompt(modelo, task, value)
+        new_payload = modelo._build_payload(prompt, True)
+        if use_api:
+            before = count_tokens_api(old_payload, api_key)
+            after = count_tokens_api(new_payload, api_key)
+        else:
+            before = estimate_tokens(legacy.build(task, value))
+            after = estimate_tokens(prompt.system) + prompt.input_tokens
+        system = after - prompt.input_tokens
+        print(f"{task:<15} {before:>9} {after:>7} {system:>8} {prompt.input_tokens:>8} {1 - after / before:>6.0%}")
+    modelo.shutdown()
+
+
+if __name__ == "__main__":
+    main("--api" in sys.argv[1:])
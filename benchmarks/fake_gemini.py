@@ -0,0 +1,201 @@
+"""
+Servidor local que imita los endpoints generateContent y streamGenerateContent
+(?alt=sse) de Gemini, para medir la aplicación sin llamar a la API real.
+
+Responde con el mismo formato JSON (candidates/content/parts y usageMetadata)
+y un contenido plausible según la tarea (oración, lote, tabla o simplificación).
+La latencia, la tasa de errores 500 y la de 429 (con Retry-After) son configurables;
+en streaming la latencia se reparte entre `stream_chunks` trozos.
+
+Uso:
+    python benchmarks/fake_gemini.py [--port 8765] [--latency 0.3] [--jitter 0.1]
+                                     [--error-rate 0.0] [--rate-429 0.0]
+
+Desde Python:
+    with FakeGemini(latency=0.2, rate_429=0.05) as fake:
+        modelo = LogicaModelo(api_base=fake.url, api_key="fake")
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_SENTENCE_RE = re.compile(r'Oración: "(.*)"', re.S)
+_BATCH_RE = re.compile(r'Oraciones: (\[.*\])', re.S)
+
+
+def _fake_formula(texto):
+    partes = [p.strip() for p in re.split(r'\by\b|\bo\b|,', texto) if p.strip()] or [texto]
+    nombres = "PQRSTUVW"
+    leyenda = {nombres[i]: parte for i, parte in enumerate(partes[:len(nombres)])}
+    return {"formula": " ∧ ".join(leyenda), "leyenda": leyenda}
+
+
+def fake_answer(system, user):
+    """Contenido de la respuesta según la tarea que se reconoce en el prompt."""
+    batch = _BATCH_RE.search(user)
+    if batch:
+        return {"resultados": [_fake_formula(t) for t in json.loads(batch.group(1))]}
+    sentence = _SENTENCE_RE.search(user)
+    if sentence:
+        return _fake_formula(sentence.group(1))
+    if "tabla de verdad" in system:
+        return {"header": ["P", "Q", "P ∧ Q"], "rows": [["V", "V", "V"], ["V", "F", "F"], ["F", "V", "F"], ["F", "F", "F"]],
+                "clasificacion": "Contingencia"}
+    return {"pasos": [{"formula": "P ∧ Q", "regla": "Fórmula original"}], "formula_simplificada": "P ∧ Q"}
+
+
+class FakeGemini:
+    def __init__(self, host="127.0.0.1", port=0, *, latency=0.2, jitter=0.05, error_rate=0.0, rate_429=0.0,
+                 retry_after=1, stream_chunks=8, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.stream_chunks = stream_chunks
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1beta/models/fake:generateContent"
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+            roll = self._rng.random()
+            delay = max(0.0, self._rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        if roll < self.rate_429:
+            return 429, delay
+        if roll < self.rate_429 + self.error_rate:
+            return 500, delay
+        return 200, delay
+
+    def _done(self, status):
+        with self._lock:
+            self.inflight -= 1
+            if status == 429:
+                self.throttled += 1
+            elif status >= 500:
+                self.errors += 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                status, delay = fake._draw()
+                try:
+                    if status == 200 and ":streamGenerateContent" in self.path:
+                        self._stream(fake.response(body), delay)
+                        return
+                    time.sleep(delay)
+                    if status == 200:
+                        payload = fake.response(body)
+                    else:
+                        payload = {"error": {"code": status, "message": "Error simulado"}}
+                    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    if status == 429:
+                        self.send_header("Retry-After", str(fake.retry_after))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    fake._done(status)
+
+            def _stream(self, payload, delay):
+                # El texto se corta en trozos, cada uno en su evento SSE tras su parte de la latencia
+                text = payload["candidates"][0]["content"]["parts"][0]["text"]
+                n = max(1, fake.stream_chunks)
+                size = -(-len(text) // n)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i in range(0, len(text), size):
+                    time.sleep(delay / n)
+                    chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": text[i:i + size]}]}}]}
+                    if i + size >= len(text):
+                        chunk["candidates"][0]["finishReason"] = "STOP"
+                        chunk["usageMetadata"] = payload["usageMetadata"]
+                    self.wfile.write(b"data: " + json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\r\n\r\n")
+                    self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+    def response(self, body):
+        system = " ".join(p.get("text", "") for p in (body.get("systemInstruction") or {}).get("parts", []))
+        user = " ".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+        text = json.dumps(fake_answer(system, user), ensure_ascii=False)
+        prompt_tokens = (len(system) + len(user)) // 4
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": len(text) // 4,
+                              "totalTokenCount": prompt_tokens + len(text) // 4},
+        }
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "throttled": self.throttled,
+                    "max_inflight": self.max_inflight}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita generateContent de Gemini")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="latencia media en segundos")
+    parser.add_argument("--jitter", type=float, default=0.1, help="desviación típica de la latencia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proporción de respuestas 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="proporción de respuestas 429")
+    args = parser.parse_args()
+    fake = FakeGemini(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                      error_rate=args.error_rate, rate_429=args.rate_429)
+    print(f"Gemini simulado en {fake.url} (GEMINI_API_URL)")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
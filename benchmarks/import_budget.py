@@ -0,0 +1,69 @@
+"""
+Presupuesto de tiempo de importación del worker (`import controller`).
+
+Importa la aplicación en procesos nuevos con `python -X importtime`, informa
+de la mediana y de los módulos más costosos y termina con código 1 si se
+supera el presupuesto o si al arrancar se importa alguna dependencia que
+debería cargarse solo al usarse (sympy, requests, urllib3, httpx).
+
+Uso:
+    python benchmarks/import_budget.py [--budget-ms 400] [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MODULE = "controller"
+# Dependencias pesadas que solo se importan en la primera llamada que las usa
+LAZY_MODULES = ("sympy", "requests", "urllib3", "httpx")
+
+
+def import_profile(module=MODULE):
+    """
+    Importa `module` en un proceso nuevo. Devuelve (acumulado_us de `module`,
+    {módulo: (propio_us, acumulado_us)}); no cuenta lo que importa el intérprete al arrancar (site).
+    """
+    env = dict(os.environ, FLASK_RUN_FROM_CLI="true")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules[module][1], modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación de la aplicación")
+    parser.add_argument("--budget-ms", type=float, default=400.0, help="mediana máxima de `import controller`")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="módulos más costosos a mostrar")
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    median_ms = statistics.median(total for total, _ in profiles) / 1000
+    _, modules = profiles[-1]
+
+    print(f"import {MODULE}: mediana {median_ms:.1f} ms en {args.runs} ejecuciones (presupuesto {args.budget_ms:.0f} ms)")
+    print(f"{'acumulado (ms)':>15} {'propio (ms)':>12}  módulo")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda m: -m[1][1])[:args.top]:
+        print(f"{cumulative_us / 1000:>15.1f} {self_us / 1000:>12.1f}  {name}")
+
+    eager = sorted(m for m in modules if m.split(".")[0] in LAZY_MODULES and "." not in m)
+    failed = False
+    if eager:
+        print(f"ERROR: se importan al arrancar: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"ERROR: {median_ms:.1f} ms supera el presupuesto de {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Prueba de carga de la aplicación Flask contra un Gemini simulado (fake_gemini.py).
+
+Lanza el servidor simulado, sustituye el LogicaModelo del controlador por uno
+que apunta a él y recorre todas las rutas con formularios (/, /tabla-verdad,
+/simplificar, /equivalencia, /simbolo_a_texto) con clientes de prueba de
+Flask en paralelo, con token CSRF como un navegador. Informa de rendimiento,
+latencias p50/p95/p99 por ruta, aciertos de caché y saturación del pool de
+hilos, y guarda cada ejecución en benchmarks/results/load_test.jsonl para
+compararla con las anteriores.
+
+Uso:
+    python benchmarks/load_test.py [--duration 10] [--concurrency 16] [--workers 4]
+                                   [--latency 0.2] [--error-rate 0] [--rate-429 0]
+                                   [--unique 50] [--label baseline] [--compare baseline]
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import controller  # noqa: E402
+from model import LogicaModelo  # noqa: E402
+from fake_gemini import FakeGemini  # noqa: E402
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results", "load_test.jsonl")
+SAMPLE_INTERVAL = 0.05
+
+_CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+SUJETOS = ["Juan", "María", "el equipo", "la puerta", "el motor", "Pedro", "la luz", "el tren"]
+PREDICADOS = ["come", "estudia", "está cerrada", "funciona", "llega tarde", "gana", "se apaga", "sale"]
+VARIABLES = ["P", "Q", "R", "S", "T"]
+CONECTIVOS = ["∧", "∨", "→", "↔", "⊕"]
+
+# Marca en el HTML de que la ruta mostró un resultado
+MARCAS = {
+    "index": "copy-to-clipboard",
+    "tabla_verdad": "<tbody>",
+    "simplificar": "<h3>Resultado</h3>",
+    "equivalencia": 'aria-live="polite"',
+    "simbolo_a_texto": "Oración generada",
+}
+MARCA_ERROR = "alert-danger mt-"
+
+
+def _oracion(rng):
+    partes = [f"{rng.choice(SUJETOS)} {rng.choice(PREDICADOS)}" for _ in range(rng.randint(1, 3))]
+    return f" {rng.choice(['y', 'o'])} ".join(partes)
+
+
+def _formula(rng, depth=3):
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(VARIABLES)
+    if rng.random() < 0.2:
+        return f"¬{_formula(rng, depth - 1)}"
+    return f"({_formula(rng, depth - 1)} {rng.choice(CONECTIVOS)} {_formula(rng, depth - 1)})"
+
+
+def build_workload(unique, seed):
+    """Entradas por ruta: `unique` distintas de cada tipo, que se repiten durante la carga."""
+    rng = random.Random(seed)
+    oraciones = [_oracion(rng) for _ in range(unique)]
+    formulas = [_formula(rng) for _ in range(unique)]
+    return {
+        "index": ("/", lambda r: {"proposicion": r.choice(oraciones)}),
+        "tabla_verdad": ("/tabla-verdad", lambda r: {"formula": r.choice(formulas)}),
+        "simplificar": ("/simplificar", lambda r: {"formula": r.choice(formulas)}),
+        "equivalencia": ("/equivalencia", lambda r: {"formula_a": r.choice(formulas), "formula_b": r.choice(formulas)}),
+        "simbolo_a_texto": ("/simbolo_a_texto", lambda r: {"formula": r.choice(formulas), "legend": ""}),
+    }
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _summary(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+class PoolSampler(threading.Thread):
+    """Muestrea periódicamente la cola y los hilos ocupados del pool del modelo."""
+
+    def __init__(self, modelo):
+        super().__init__(daemon=True)
+        self.modelo = modelo
+        self.stop_event = threading.Event()
+        self.samples = []
+
+    def run(self):
+        executor = self.modelo._executor
+        while not self.stop_event.wait(SAMPLE_INTERVAL):
+            queued = sum(executor.stats()["queued"].values())
+            busy = self.modelo._limiter.stats()["inflight"]
+            self.samples.append((queued, busy))
+
+    def summary(self, workers):
+        if not self.samples:
+            return {"max_queue": 0, "avg_queue": 0.0, "saturated_ratio": 0.0}
+        queues = [q for q, _ in self.samples]
+        return {
+            "max_queue": max(queues),
+            "avg_queue": round(sum(queues) / len(queues), 2),
+            # Proporción del tiempo con todos los hilos ocupados y tareas esperando
+            "saturated_ratio": round(sum(1 for q, b in self.samples if q > 0 and b >= workers) / len(self.samples), 3),
+        }
+
+
+def run_load(app, workload, duration, concurrency, seed):
+    """Cada hilo usa su propio cliente (sesión y tokens CSRF) y elige rutas al azar."""
+    latencies = defaultdict(list)
+    outcomes = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    names = list(workload)
+
+    def client_loop(index):
+        rng = random.Random(seed * 1000 + index)
+        client = app.test_client()
+        # Como un navegador: el token es el que incluye el formulario de cada página
+        tokens = {}
+        for path, _ in workload.values():
+            match = _CSRF_RE.search(client.get(path).get_data(as_text=True))
+            tokens[path] = match.group(1) if match else None
+        while time.perf_counter() < deadline:
+            name = rng.choice(names)
+            path, make_data = workload[name]
+            data = make_data(rng)
+            if tokens[path]:
+                data["csrf_token"] = tokens[path]
+            start = time.perf_counter()
+            resp = client.post(path, data=data)
+            body = resp.get_data(as_text=True)
+            elapsed = time.perf_counter() - start
+            if resp.status_code >= 400:
+                outcome = f"http_{resp.status_code}"
+            elif MARCAS[name] in body:
+                outcome = "ok"
+            elif MARCA_ERROR in body:
+                outcome = "app_error"
+            else:
+                outcome = "sin_resultado"
+            with lock:
+                latencies[name].append(elapsed)
+                outcomes[name][outcome] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client_loop, range(concurrency)))
+    return time.perf_counter() - started, latencies, outcomes
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def record(result):
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def load_previous(label=None):
+    """Última ejecución guardada (con esa etiqueta, si se indica)."""
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH, encoding="utf-8") as f:
+        for line in f:
+            run = json.loads(line)
+            if label is None or run.get("label") == label:
+                previous = run
+    return previous
+
+
+def print_report(result, previous=None):
+    def delta(new, old):
+        return f" ({(new - old) / old:+.0%})" if old else ""
+
+    old = previous or {}
+    print(f"\nrendimiento: {result['throughput_rps']:.1f} pet/s"
+          + delta(result["throughput_rps"], old.get("throughput_rps")))
+    overall, old_overall = result["overall"], old.get("overall", {})
+    print("latencia: " + ", ".join(f"{k[:3]} {overall[k]:.1f} ms{delta(overall[k], old_overall.get(k))}"
+                                   for k in ("p50_ms", "p95_ms", "p99_ms")))
+    print(f"\n{'ruta':<16} {'pet.':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  resultados")
+    for name, stats in result["routes"].items():
+        outcomes = ", ".join(f"{k}={v}" for k, v in sorted(stats["outcomes"].items()))
+        print(f"{name:<16} {stats['count']:>6} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}  {outcomes}")
+    cache = result["cache"]
+    print(f"\ncaché IA: {cache['hit_ratio']:.1%} aciertos ({cache['hits']}/{cache['hits'] + cache['misses']})")
+    pool = result["pool"]
+    print(f"pool de hilos: cola máx {pool['max_queue']}, media {pool['avg_queue']}, saturado {pool['saturated_ratio']:.1%} del tiempo")
+    fake = result["upstream"]
+    print(f"Gemini simulado: {fake['calls']} llamadas, {fake['throttled']} 429, {fake['errors']} 5xx, máx. {fake['max_inflight']} simultáneas")
+    if previous:
+        print(f"\ncomparado con {previous.get('label') or previous.get('commit') or 'la ejecución anterior'} ({previous['timestamp']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga contra un Gemini simulado")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos de carga")
+    parser.add_argument("--concurrency", type=int, default=16, help="clientes simultáneos")
+    parser.add_argument("--workers", type=int, default=4, help="max_workers de LogicaModelo")
+    parser.add_argument("--latency", type=float, default=0.2, help="latencia media de Gemini (s)")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--unique", type=int, default=50, help="entradas distintas por tipo")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", help="etiqueta con la que se guarda la ejecución (p. ej. baseline)")
+    parser.add_argument("--compare", nargs="?", const="", help="comparar con la última ejecución con esa etiqueta (o la última)")
+    parser.add_argument("--no-record", action="store_true", help="no guardar la ejecución")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    previous = load_previous(args.compare or None) if args.compare is not None else None
+
+    with FakeGemini(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                    rate_429=args.rate_429, retry_after=0, seed=args.seed) as fake:
+        modelo = LogicaModelo(api_base=fake.url, api_key="fake", max_workers=args.workers)
+        controller.logica_modelo = modelo
+        app = controller.app
+        app.config["TESTING"] = True
+
+        sampler = PoolSampler(modelo)
+        sampler.start()
+        elapsed, latencies, outcomes = run_load(app, build_workload(args.unique, args.seed),
+                                                args.duration, args.concurrency, args.seed)
+        sampler.stop_event.set()
+        sampler.join()
+        upstream = fake.stats()
+        cache = modelo._cache.stats()
+        cache = cache.get("l1", cache)
+        modelo.shutdown()
+
+    total = sum(len(v) for v in latencies.values())
+    result = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "commit": _git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("label", "compare", "no_record")},
+        "throughput_rps": round(total / elapsed, 2),
+        "overall": _summary([x for v in latencies.values() for x in v]),
+        "routes": {name: {**_summary(latencies[name]), "outcomes": dict(outcomes[name])} for name in sorted(latencies)},
+        "cache": {"hits": cache["hits"], "misses": cache["misses"], "hit_ratio": round(cache["hit_ratio"], 4)},
+        "pool": sampler.summary(args.workers),
+        "upstream": upstream,
+    }
+    print_report(result, previous)
+    if not args.no_record:
+        record(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Evaluación bit-paralela de fórmulas.
+
+Cada columna de la tabla de verdad se representa como un entero de 2^n bits
+(el bit i corresponde a la fila i, con la fila 0 = todas las variables en V).
+Cada conectivo se aplica así a todas las filas a la vez con una única
+operación entera (&, |, ^), en lugar de recorrer la tabla fila a fila.
+"""
+from formulas import AND, OR, XOR, IMPLIES, IFF, Var, Const, Not, variables, postorder
+
+# Límite práctico: 2^24 filas = columnas de 2 MiB
+MAX_VARIABLES_BITS = 24
+
+_TO_VF = str.maketrans('10', 'VF')
+
+
+def variable_mask(index, n_vars):
+    """Máscara de la variable en la posición index (0 = la que cambia más despacio)."""
+    n_rows = 1 << n_vars
+    block = 1 << (n_vars - 1 - index)
+    # Un periodo: `block` filas en V seguidas de `block` filas en F
+    mask = (1 << block) - 1
+    width = block << 1
+    while width < n_rows:
+        mask |= mask << width
+        width <<= 1
+    return mask
+
+
+def evaluate_bits(node, names=None, memo=None):
+    """
+    Evalúa la fórmula sobre todas las asignaciones de `names`.
+    Devuelve el entero con los resultados de las 2^n filas.
+    `memo` (dict nodo -> máscara) permite reutilizar columnas ya calculadas.
+    """
+    names = variables(node) if names is None else names
+    n_vars = len(names)
+    leaves = {name: variable_mask(i, n_vars) for i, name in enumerate(names)}
+    return evaluate_leaves(node, leaves, 1 << n_vars, memo)
+
+
+def evaluate_leaves(node, leaves, n_rows, memo=None):
+    """
+    Evaluación bit-paralela con máscaras de variables arbitrarias
+    ({variable: máscara} sobre n_rows filas). Permite evaluar un bloque de la
+    tabla por separado, fijando como constantes las variables que no cambian en él.
+    """
+    full = (1 << n_rows) - 1
+    memo = {} if memo is None else memo
+    # Cada nodo distinto una vez, hijos antes que padres (sin recursión)
+    for n in postorder(node):
+        if n in memo:
+            continue
+        if isinstance(n, Var):
+            res = leaves[n.name]
+        elif isinstance(n, Const):
+            res = full if n.value else 0
+        elif isinstance(n, Not):
+            res = full ^ memo[n.operand]
+        else:
+            a = memo[n.left]
+            b = memo[n.right]
+            op = n.op
+            if op == AND:
+                res = a & b
+            elif op == OR:
+                res = a | b
+            elif op == IMPLIES:
+                res = (full ^ a) | b
+            elif op == IFF:
+                res = full ^ (a ^ b)
+            elif op == XOR:
+                res = a ^ b
+            else:
+                raise ValueError(f"Conectivo desconocido: {op}")
+        memo[n] = res
+    return memo[node]
+
+
+def classify_bits(mask, n_vars):
+    """Devuelve (siempre_verdadera, siempre_falsa) para una columna."""
+    full = (1 << (1 << n_vars)) - 1
+    return mask == full, mask == 0
+
+
+def column_letters(mask, n_vars):
+    """Convierte una columna en la cadena de 'V'/'F' por fila."""
+    n_rows = 1 << n_vars
+    return format(mask, f'0{n_rows}b')[::-1].translate(_TO_VF)
@@ -0,0 +1,338 @@
+"""
+Cachés para las respuestas de la IA: LRU en memoria (SimpleCache), persistente
+en SQLite compartida entre procesos (SQLiteCache) y la combinación de ambas
+(TieredCache).
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+class _Stripe:
+    __slots__ = ('store', 'lock', 'maxsize', 'hits', 'misses', 'evictions', 'expirations')
+
+    def __init__(self, maxsize):
+        self.store = OrderedDict()
+        self.lock = Lock()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+
+class SimpleCache:
+    """
+    Caché LRU con caducidad (TTL) perezosa.
+
+    get y set son O(1): las entradas caducadas se descartan al consultarlas o
+    cuando quedan al principio del orden LRU, sin recorrer toda la caché.
+    Con stripes > 1 las claves se reparten en varios segmentos con su propio
+    lock para que los hilos no se serialicen todos en el mismo (maxsize se
+    reparte entre los segmentos).
+    """
+
+    def __init__(self, maxsize=128, ttl=300, *, stripes=1):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        n = max(1, int(stripes))
+        per_stripe = max(1, -(-maxsize // n))
+        self._stripes = [_Stripe(per_stripe) for _ in range(n)]
+
+    def _stripe(self, key):
+        stripes = self._stripes
+        return stripes[0] if len(stripes) == 1 else stripes[hash(key) % len(stripes)]
+
+    def get(self, key):
+        stripe = self._stripe(key)
+        now = time.monotonic()
+        with stripe.lock:
+            entry = stripe.store.get(key)
+            if entry is None:
+                stripe.misses += 1
+                return None
+            value, expires = entry
+            if expires <= now:
+                del stripe.store[key]
+                stripe.expirations += 1
+                stripe.misses += 1
+                return None
+            stripe.store.move_to_end(key)
+            stripe.hits += 1
+            return value
+
+    def set(self, key, value):
+        stripe = self._stripe(key)
+        now = time.monotonic()
+        with stripe.lock:
+            store = stripe.store
+            store[key] = (value, now + self.ttl)
+            store.move_to_end(key)
+            # Descarte oportunista de caducadas al frente y, si sobra, de las menos usadas
+            while store:
+                oldest_key, (_, expires) = next(iter(store.items()))
+                if expires <= now:
+                    stripe.expirations += 1
+                elif len(store) > stripe.maxsize:
+                    stripe.evictions += 1
+                else:
+                    break
+                del store[oldest_key]
+
+    def delete(self, key):
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.store.pop(key, None)
+
+    def clear(self):
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.store.clear()
+
+    def __len__(self):
+        return sum(len(stripe.store) for stripe in self._stripes)
+
+    def stats(self):
+        """Contadores acumulados: aciertos, fallos, desalojos y caducadas."""
+        totals = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        for stripe in self._stripes:
+            with stripe.lock:
+                totals["hits"] += stripe.hits
+                totals["misses"] += stripe.misses
+                totals["evictions"] += stripe.evictions
+                totals["expirations"] += stripe.expirations
+        totals["size"] = len(self)
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_ratio"] = totals["hits"] / lookups if lookups else 0.0
+        return totals
+
+
+class SQLiteCache:
+    """
+    Caché persistente en un fichero SQLite en modo WAL.
+
+    La comparten todos los procesos (workers de gunicorn) del mismo host y
+    sobrevive a los reinicios. Los valores se guardan como JSON. Aplica TTL y
+    un tamaño máximo con desalojo aproximadamente LRU. Cualquier error de
+    SQLite se registra y se trata como un fallo de caché.
+    """
+
+    # Cada cuántas escrituras se purgan caducadas y se aplica el tamaño máximo
+    PRUNE_EVERY = 64
+    # Resolución con la que se actualiza la marca de último acceso (segundos)
+    TOUCH_RESOLUTION = 60
+
+    def __init__(self, path, maxsize=10000, ttl=86400, *, timeout=5.0):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        self._counter_lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _conn(self):
+        # sqlite3 no permite compartir conexiones entre hilos: una por hilo
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, expires, accessed FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            value, expires, accessed = row
+            if expires <= now:
+                conn.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now))
+                self._count("misses")
+                return None
+            if now - accessed > self.TOUCH_RESOLUTION:
+                conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self._count("hits")
+            return json.loads(value)
+        except (sqlite3.Error, ValueError):
+            logger.exception("Fallo al leer la caché persistente")
+            self._count("errors")
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, now + self.ttl, now),
+            )
+            with self._counter_lock:
+                self._writes += 1
+                prune = self._writes % self.PRUNE_EVERY == 0
+            if prune:
+                self.prune()
+        except (sqlite3.Error, TypeError, ValueError):
+            logger.exception("Fallo al escribir en la caché persistente")
+            self._count("errors")
+
+    def prune(self):
+        """Elimina las entradas caducadas y las menos usadas por encima de maxsize."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+            (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if count > self.maxsize:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                    (count - self.maxsize,),
+                )
+
+    def delete(self, key):
+        try:
+            self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error:
+            logger.exception("Fallo al borrar de la caché persistente")
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+    def __len__(self):
+        try:
+            return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            logger.exception("Fallo al contar las entradas de la caché persistente")
+            self._count("errors")
+            return 0
+
+    def stats(self):
+        size = len(self)
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "size": size,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TieredCache:
+    """
+    Caché de dos niveles: L1 en memoria del proceso (SimpleCache) delante de
+    un L2 compartido (p. ej. SQLiteCache). Lo que se encuentra en L2 se copia a L1.
+    """
+
+    def __init__(self, l1, l2):
+        self.l1 = l1
+        self.l2 = l2
+
+    def get(self, key):
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+        value = self.l2.get(key)
+        if value is not None:
+            self.l1.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.l1.set(key, value)
+        self.l2.set(key, value)
+
+    def delete(self, key):
+        self.l1.delete(key)
+        self.l2.delete(key)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def __len__(self):
+        return len(self.l1)
+
+    def stats(self):
+        return {"l1": self.l1.stats(), "l2": self.l2.stats()}
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes idénticas: la primera con una clave crea el
+    future y las demás que llegan mientras sigue en vuelo esperan ese mismo
+    future en lugar de repetir la llamada.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._inflight = {}
+        self._waiters = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key, submit):
+        """
+        Devuelve (future, es_lider). `submit()` solo se invoca si no hay
+        ninguna llamada en vuelo para la clave.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None and not future.done():
+                self._waiters[future] += 1
+                self.coalesced += 1
+                return future, False
+            future = submit()
+            self._inflight[key] = future
+            self._waiters[future] = 1
+            self.leaders += 1
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future, True
+
+    def leave(self, future):
+        """
+        Un llamante deja de esperar (p. ej. por timeout). Devuelve True si ya
+        no queda nadie esperando ese future, en cuyo caso puede cancelarse.
+        """
+        with self._lock:
+            remaining = self._waiters.get(future, 0) - 1
+            if remaining > 0:
+                self._waiters[future] = remaining
+                return False
+            self._waiters.pop(future, None)
+            return True
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            self._waiters.pop(future, None)
+
+    def __len__(self):
+        return len(self._inflight)
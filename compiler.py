@@ -0,0 +1,72 @@
+"""
+Compilación de fórmulas a funciones de Python.
+
+Para evaluar la misma fórmula en muchas asignaciones, compile_formula genera
+una sola vez el código de una función con una variable por argumento y una
+línea por sub-fórmula distinta (→ y ↔ pasan a `not a or b` y `a == b`), de
+modo que cada fila es una llamada sin recorrer el árbol. Las fórmulas que solo
+difieren en los nombres de las variables comparten la función: se compila la
+forma canónica (x0, x1, ...) y se guarda por su texto.
+"""
+from functools import lru_cache
+
+from formulas import AND, OR, XOR, IMPLIES, IFF, Var, Const, Not, canonicalize, parse_formula, postorder, to_str, variables
+
+_BINARY = {
+    AND: "{} and {}",
+    OR: "{} or {}",
+    IMPLIES: "not {} or {}",
+    IFF: "{} == {}",
+    XOR: "{} != {}",
+}
+
+
+def formula_source(node, name="formula"):
+    """
+    Código de la función que evalúa `node`: los argumentos son sus variables
+    en el orden de variables(), que deben ser identificadores válidos.
+    """
+    lines = []
+    refs = {}
+    for n in postorder(node):
+        if isinstance(n, Var):
+            refs[n] = n.name
+            continue
+        if isinstance(n, Const):
+            refs[n] = "True" if n.value else "False"
+            continue
+        temp = f"t{len(lines)}"
+        if isinstance(n, Not):
+            expr = f"not {refs[n.operand]}"
+        else:
+            template = _BINARY.get(n.op)
+            if template is None:
+                raise ValueError(f"Conectivo desconocido: {n.op}")
+            expr = template.format(refs[n.left], refs[n.right])
+        lines.append(f"    {temp} = {expr}")
+        refs[n] = temp
+    lines.append(f"    return {refs[node]}")
+    return f"def {name}({', '.join(variables(node))}):\n" + "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=512)
+def _compile_text(text):
+    """Función compilada de una fórmula canónica, por su texto."""
+    namespace = {}
+    exec(compile(formula_source(parse_formula(text)), "<formula>", "exec"), namespace)
+    return namespace["formula"]
+
+
+@lru_cache(maxsize=1024)
+def compile_formula(node):
+    """
+    Devuelve (fn, nombres): fn(*valores) es el valor de la fórmula cuando la
+    variable nombres[i] vale valores[i].
+    """
+    (canonica,), names = canonicalize(node)
+    return _compile_text(to_str(canonica)), names
+
+
+def cache_info():
+    """Aciertos de la caché por nodo y de la caché por texto canónico."""
+    return {"nodes": compile_formula.cache_info(), "texts": _compile_text.cache_info()}
@@ -1,11 +1,18 @@
 # c:\Users\mseca\OneDrive\Documents\Proyecto_Logica\controller.py
-from flask import Flask, render_template, request, flash, redirect, url_for
+from flask import Flask, render_template, request, flash, redirect, url_for, jsonify, stream_template, stream_with_context, Response, g
+from flask.signals import before_render_template, template_rendered
 from flask_wtf import CSRFProtect, FlaskForm
 from wtforms import StringField, SubmitField
 from wtforms.validators import DataRequired
-import re
 import os
-from model import LogicaModelo
+import csv
+import io
+import json
+import time
+import metrics
+from http_cache import PageCache, StaticDigests, PAGE_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL
+from model import LogicaModelo, FILAS_POR_PAGINA, MAX_VARIABLES_DESCARGA
+from formulas import parse_formula, variables, to_text, FormulaError
 from flask_wtf.csrf import generate_csrf
 
 app = Flask(__name__)
@@ -15,7 +22,83 @@ csrf = CSRFProtect(app)
 
 logica_modelo = LogicaModelo()
 
-# Asegúrate de tener sympy instalado: pip install sympy
+# Cabecera Server-Timing con los tiempos por etapa de cada petición (opcional)
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+metrics.REGISTRY.add_collector(logica_modelo.collect_metrics)
+
+@app.before_request
+def iniciar_medicion():
+    g.metrics_token = metrics.begin_request()
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def registrar_medicion(response):
+    # En las respuestas en streaming se mide hasta enviar las cabeceras. Si un
+    # before_request anterior (p. ej. el de CSRF) cortó la petición, no hay inicio.
+    start = g.get('request_start')
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    metrics.REQUEST_SECONDS.observe(elapsed, endpoint=request.endpoint or "desconocido", method=request.method, status=str(response.status_code))
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = metrics.server_timing_header(metrics.request_timings() or [], elapsed)
+    return response
+
+@app.teardown_request
+def terminar_medicion(exc):
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        try:
+            metrics.end_request(token)
+        except ValueError:
+            pass  # streaming: el generador termina en otro contexto
+
+def _inicio_render(sender, template, context, **extra):
+    g.render_start = time.perf_counter()
+
+def _fin_render(sender, template, context, **extra):
+    start = g.pop('render_start', None)
+    if start is not None:
+        metrics.RENDER_SECONDS.observe(time.perf_counter() - start, template=template.name or "")
+
+before_render_template.connect(_inicio_render, app)
+template_rendered.connect(_fin_render, app)
+
+@app.route("/metrics")
+def metricas():
+    """Métricas en formato de texto de Prometheus."""
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+# Páginas de solo lectura renderizadas una vez y ficheros estáticos con hash en la URL
+paginas_estaticas = PageCache(app.jinja_env)
+digests_estaticos = StaticDigests(app.static_folder)
+
+@app.url_defaults
+def version_estaticos(endpoint, values):
+    # url_for('static', ...) añade ?v=<hash del contenido>
+    if endpoint == 'static' and 'v' not in values and values.get('filename'):
+        digest = digests_estaticos.digest(values['filename'])
+        if digest:
+            values['v'] = digest
+
+@app.after_request
+def cache_estaticos(response):
+    # Solo la URL con el hash vigente se puede guardar sin caducidad
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        version = request.args.get('v')
+        if version and version == digests_estaticos.digest(request.view_args['filename']):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+def pagina_estatica(template):
+    """Sirve una página sin datos variables desde la caché, con ETag/Last-Modified y 304."""
+    pagina = paginas_estaticas.get(request.endpoint, lambda: render_template(template), (template, "base.html"),
+                                    version=digests_estaticos.version)
+    response = Response(pagina.body, mimetype="text/html")
+    response.set_etag(pagina.etag)
+    response.headers['Last-Modified'] = pagina.last_modified
+    response.headers['Cache-Control'] = PAGE_CACHE_CONTROL
+    return response.make_conditional(request)
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -50,18 +133,62 @@ def tabla_verdad():
     tabla_rows = None
     clasificacion = None
     error = None
+    total_filas = 0
     formula_input = request.args.get('formula') # Para enlaces GET
+    desde = max(0, request.args.get('desde', 0, type=int))
 
     if form.validate_on_submit(): # Es un POST válido con CSRF
         formula_to_process = form.formula.data
-        tabla_header, tabla_rows, clasificacion, error = logica_modelo.generar_tabla_verdad(formula_to_process)
+        desde = 0
+        tabla_header, tabla_rows, clasificacion, total_filas, error = logica_modelo.tabla_verdad_paginada(formula_to_process)
         formula_input = formula_to_process # Para mostrarla de nuevo en el campo
     elif request.method == 'GET' and formula_input:
-        # Es un GET con una fórmula en la URL
+        # Es un GET con una fórmula en la URL (también la navegación entre páginas)
         form.formula.data = formula_input
-        tabla_header, tabla_rows, clasificacion, error = logica_modelo.generar_tabla_verdad(formula_input)
+        tabla_header, tabla_rows, clasificacion, total_filas, error = logica_modelo.tabla_verdad_paginada(formula_input, desde=desde)
+        if total_filas and desde >= total_filas:
+            # Más allá de la última fila: se muestra la última página
+            desde = (total_filas - 1) // FILAS_POR_PAGINA * FILAS_POR_PAGINA
+            tabla_header, tabla_rows, clasificacion, total_filas, error = logica_modelo.tabla_verdad_paginada(formula_input, desde=desde)
+
+    # Las filas se envían a medida que se generan en lugar de construir toda la página en memoria
+    return stream_template("tabla_verdad.html", form=form, tabla_header=tabla_header, tabla_rows=tabla_rows, clasificacion=clasificacion, error=error, formula_input=formula_input,
+                           desde=desde, total_filas=total_filas, filas_por_pagina=FILAS_POR_PAGINA,
+                           n_variables=max(total_filas - 1, 0).bit_length(), max_variables_descarga=MAX_VARIABLES_DESCARGA)
 
-    return render_template("tabla_verdad.html", form=form, tabla_header=tabla_header, tabla_rows=tabla_rows, clasificacion=clasificacion, error=error, formula_input=formula_input)
+@app.route("/tabla-verdad/descargar")
+def tabla_verdad_descargar():
+    """Descarga la tabla completa en CSV o NDJSON, generada y enviada fila a fila."""
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({"error": "Formato no soportado: usa csv o ndjson."}), 400
+    header, rows, error = logica_modelo.exportar_tabla_verdad(request.args.get('formula', ''))
+    if error:
+        return jsonify({"error": error}), 400
+
+    def generar_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if i % 1024 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def generar_ndjson():
+        yield json.dumps({"header": header}, ensure_ascii=False) + "\n"
+        for row in rows:
+            yield json.dumps(row) + "\n"
+
+    if formato == 'csv':
+        body, mimetype = generar_csv(), "text/csv"
+    else:
+        body, mimetype = generar_ndjson(), "application/x-ndjson"
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename=tabla_verdad.{formato}"})
 
 @app.route("/simplificar", methods=["GET", "POST"])
 def simplificar():
@@ -95,35 +222,87 @@ def equivalencia():
 
     form = EquivalenciaForm()
     resultado_equivalencia = None
+    contraejemplo = None
     error = None
     
     if form.validate_on_submit():
         formula_a = form.formula_a.data
         formula_b = form.formula_b.data
-        
-        # Creamos la fórmula bicondicional para probar la equivalencia
-        formula_bicondicional = f"({formula_a}) \u2194 ({formula_b})" # \u2194 es ↔
-        
-        _, _, clasificacion, err = logica_modelo.generar_tabla_verdad(formula_bicondicional)
-        
-        if err:
-            error = err
-        elif clasificacion == "Tautología":
-            resultado_equivalencia = True
-        else:
-            resultado_equivalencia = False
+
+        resultado_equivalencia, contraejemplo, error = logica_modelo.verificar_equivalencia(formula_a, formula_b)
             
-    return render_template("equivalencia.html", form=form, resultado=resultado_equivalencia, error=error)
+    return render_template("equivalencia.html", form=form, resultado=resultado_equivalencia, contraejemplo=contraejemplo, error=error)
+
+@app.route("/api/lote", methods=["POST"])
+@csrf.exempt  # API JSON: los navegadores no pueden enviar JSON entre orígenes sin CORS
+def lote():
+    """Procesa un lote de oraciones o fórmulas: {"tipo": "oraciones", "items": [...]}."""
+    if not request.is_json:
+        return jsonify({"error": "Se esperaba un cuerpo JSON."}), 415
+    datos = request.get_json(silent=True) or {}
+    resultados, error = logica_modelo.procesar_lote(datos.get("items"), tipo=datos.get("tipo", "oraciones"))
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify({"resultados": resultados})
+
+# Tareas con respuesta en streaming: eventos NDJSON según se calculan o según los escribe la IA
+TAREAS_STREAM = {
+    "tabla-verdad": logica_modelo.generar_tabla_verdad_stream,
+    "simplificar": logica_modelo.simplificar_formula_stream,
+}
+
+@app.route("/api/stream/<tarea>", methods=["POST"])
+@csrf.exempt  # API JSON, como /api/lote
+def stream_tarea(tarea):
+    """
+    Tabla de verdad o simplificación en streaming (NDJSON): POST {"formula": "..."}.
+    Una línea por evento: {"evento": "valor" | "elemento", "clave", "valor"}, y al final
+    {"evento": "fin"} o {"evento": "error", "mensaje"}.
+    """
+    generar = TAREAS_STREAM.get(tarea)
+    if generar is None:
+        return jsonify({"error": f"Tarea desconocida: {tarea}."}), 404
+    if not request.is_json:
+        return jsonify({"error": "Se esperaba un cuerpo JSON."}), 415
+    formula = ((request.get_json(silent=True) or {}).get("formula") or "").strip()
+    if not formula:
+        return jsonify({"error": "Introduce una fórmula."}), 400
+
+    def eventos():
+        for evento in generar(formula):
+            if evento[0] == "error":
+                linea = {"evento": "error", "mensaje": evento[1]}
+            elif evento[0] == "fin":
+                linea = {"evento": "fin"}
+            else:
+                linea = {"evento": evento[0], "clave": evento[1], "valor": evento[2]}
+            yield json.dumps(linea, ensure_ascii=False) + "\n"
+
+    # X-Accel-Buffering: que un proxy (nginx) no acumule la respuesta antes de reenviarla
+    return Response(stream_with_context(eventos()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no"})
 
 @app.route("/acerca-de")
 def acerca_de():
     """Muestra la página 'Acerca de'."""
-    return render_template("acerca_de.html")
+    return pagina_estatica("acerca_de.html")
 
 @app.route("/leyes-logicas")
 def leyes_logicas():
     """Muestra una página con la explicación de las leyes lógicas."""
-    return render_template("leyes_logicas.html")
+    return pagina_estatica("leyes_logicas.html")
+
+# Frases de ejemplo para las variables que no aparecen en la leyenda
+FRASES_EJEMPLO = (
+    "Juan come en el restaurante",
+    "María viste una camisa roja",
+    "Pedro estudia en la universidad",
+    "El equipo ganó el partido",
+    "La habitación está iluminada",
+    "El motor funciona correctamente",
+    "La puerta está cerrada",
+    "El correo fue enviado",
+)
 
 # Añadir esta ruta para la nueva página "Símbolos -> Texto"
 @app.route('/simbolo_a_texto', methods=['GET', 'POST'])
@@ -147,71 +326,15 @@ def simbolo_a_texto():
                         k, v = line.split(':', 1)
                         leyenda[k.strip()] = v.strip()
 
-            # Si no hay leyenda, generamos frases de ejemplo para las variables encontradas
-            import re
-            vars_found = sorted(set(re.findall(r'\b[A-Z]\b', formula)))
-            ejemplo_frases = [
-                "Juan come en el restaurante",
-                "María viste una camisa roja",
-                "Pedro estudia en la universidad",
-                "El equipo ganó el partido",
-                "La habitación está iluminada",
-                "El motor funciona correctamente",
-                "La puerta está cerrada",
-                "El correo fue enviado"
-            ]
-            for i, v in enumerate(vars_found):
-                if v not in leyenda:
-                    leyenda[v] = ejemplo_frases[i % len(ejemplo_frases)]
-
-            # Función simple para convertir fórmula simbólica a oración en español
-            def expr_to_text(expr):
-                expr = expr.strip()
-                # Negación: ¬X or ~X
-                expr = re.sub(r'¬\s*([A-Z])', lambda m: f"no {leyenda.get(m.group(1), m.group(1))}", expr)
-                expr = re.sub(r'~\s*([A-Z])', lambda m: f"no {leyenda.get(m.group(1), m.group(1))}", expr)
-                # Paréntesis: procesar recursivamente es complejo; se hace reemplazo simple
-                # Implicación: A → B  -> "Si A, entonces B"
-                if '→' in expr or '->' in expr:
-                    parts = re.split(r'\s*(?:→|->)\s*', expr, maxsplit=1)
-                    left = parts[0]
-                    right = parts[1] if len(parts) > 1 else ''
-                    left_text = expr_to_text(left)
-                    right_text = expr_to_text(right)
-                    return f"Si {left_text}, entonces {right_text}"
-                # Bicondicional
-                if '↔' in expr or '<->' in expr:
-                    parts = re.split(r'\s*(?:↔|<->)\s*', expr, maxsplit=1)
-                    a = expr_to_text(parts[0])
-                    b = expr_to_text(parts[1] if len(parts) > 1 else '')
-                    return f"{a} si y solo si {b}"
-                # Conjunción y Disyunción: manejar operadores binarios de forma lineal
-                # Reemplazar variables sueltas por su frase
-                # Primero reemplazar conjunción y disyunción por conectores en español
-                # Manejar conjunción
-                if '∧' in expr or '&' in expr:
-                    parts = re.split(r'\s*(?:∧|&)\s*', expr)
-                    parts_text = [expr_to_text(p) for p in parts]
-                    return ' y '.join(parts_text)
-                # Manejar disyunción
-                if '∨' in expr or 'v' in expr or '\\/' in expr:
-                    parts = re.split(r'\s*(?:∨|v|\\\/)\s*', expr)
-                    parts_text = [expr_to_text(p) for p in parts]
-                    return ' o '.join(parts_text)
-                # Si es solo una variable, devolver la frase de la leyenda
-                m = re.match(r'^\s*([A-Z])\s*$', expr)
-                if m:
-                    return leyenda.get(m.group(1), m.group(1))
-                # Si queda algo más complejo, intentar reemplazar variables dentro del texto
-                def replace_var(match):
-                    sym = match.group(0)
-                    return leyenda.get(sym, sym)
-                return re.sub(r'\b[A-Z]\b', replace_var, expr)
-
             try:
-                resultado = expr_to_text(formula)
-            except Exception as e:
-                error = "No se pudo convertir la fórmula. Revisa la sintaxis."
+                arbol = parse_formula(formula)
+                # Las variables sin frase en la leyenda reciben una frase de ejemplo
+                for i, v in enumerate(variables(arbol)):
+                    if v not in leyenda:
+                        leyenda[v] = FRASES_EJEMPLO[i % len(FRASES_EJEMPLO)]
+                resultado = to_text(arbol, leyenda)
+            except FormulaError as e:
+                error = f"No se pudo convertir la fórmula ({e}). Revisa la sintaxis."
     # generar token CSRF y pasarlo a la plantilla
     csrf_token = generate_csrf()
     return render_template('simbolo_a_texto.html', resultado=resultado, leyenda=leyenda, error=error, csrf_token=csrf_token)
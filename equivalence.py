@@ -0,0 +1,64 @@
+"""
+Verificación de equivalencia lógica con contraejemplo.
+
+A ≡ B si y solo si ¬(A ↔ B) es insatisfacible. Con pocas variables basta con
+comparar las columnas bit-paralelas; a partir de ahí se usa el resolutor SAT
+sobre la codificación de Tseitin, que no recorre las 2^n filas.
+"""
+from formulas import merge_variables
+from bitsets import evaluate_bits, MAX_VARIABLES_BITS
+from sat import Solver, TseitinEncoder, BudgetExceeded
+
+# Hasta este número de variables comparar columnas completas es más rápido que SAT
+MAX_VARIABLES_BITSET = 16
+# Conflictos que se conceden al resolutor antes de volver a las columnas (si caben) o rendirse
+SAT_CONFLICT_BUDGET = 20000
+
+
+def _row_assignment(row, names):
+    """Asignación correspondiente a la fila `row` de la tabla (fila 0 = todo V)."""
+    n_vars = len(names)
+    return {name: not (row >> (n_vars - 1 - i)) & 1 for i, name in enumerate(names)}
+
+
+def _check_bits(a, b, names):
+    diff = evaluate_bits(a, names) ^ evaluate_bits(b, names)
+    if not diff:
+        return True, None
+    row = (diff & -diff).bit_length() - 1
+    return False, _row_assignment(row, names)
+
+
+def _check_sat(a, b, names, max_conflicts=None):
+    solver = Solver()
+    encoder = TseitinEncoder(solver)
+    la = encoder.literal(a)
+    lb = encoder.literal(b)
+    # ¬(A ↔ B): exactamente una de las dos es verdadera
+    solver.add_clause([la, lb])
+    solver.add_clause([-la, -lb])
+    model = solver.solve(max_conflicts)
+    if model is None:
+        return True, None
+    return False, {name: model[encoder.var_ids[name]] for name in names}
+
+
+def check_equivalence(a, b):
+    """
+    Decide si las fórmulas (ya analizadas) a y b son equivalentes.
+    Devuelve (equivalentes, contraejemplo), donde contraejemplo es una
+    asignación {variable: bool} en la que difieren, o None.
+    Con más de MAX_VARIABLES_BITS variables lanza BudgetExceeded si el
+    resolutor no decide en SAT_CONFLICT_BUDGET conflictos.
+    """
+    names = merge_variables(a, b)
+    if len(names) <= MAX_VARIABLES_BITSET:
+        return _check_bits(a, b, names)
+    if len(names) > MAX_VARIABLES_BITS:
+        # Sin columnas a las que volver: si se agota el presupuesto, BudgetExceeded
+        return _check_sat(a, b, names, SAT_CONFLICT_BUDGET)
+    try:
+        return _check_sat(a, b, names, SAT_CONFLICT_BUDGET)
+    except BudgetExceeded:
+        # Casos difíciles para CDCL (p. ej. cadenas de ⊕): las columnas aún caben en memoria
+        return _check_bits(a, b, names)
@@ -0,0 +1,276 @@
+"""
+Pool de hilos con prioridades y cancelación real para las llamadas a la IA.
+
+- Dos clases de prioridad: INTERACTIVA (una petición web esperando) y LOTE
+  (procesamiento por lotes). Un hilo libre toma siempre la tarea interactiva
+  más antigua antes que cualquiera de lote.
+- Cada clase tiene una cola acotada: si está llena, submit() lanza
+  QueueFullError al momento en lugar de encolar una tarea que agotaría su
+  timeout esperando.
+- TaskFuture.cancel() también interrumpe una tarea que ya se está
+  ejecutando: avisa a las funciones registradas con on_cancel(). Con
+  cancellable_pool_classes() la conexión HTTP en curso de ese hilo se cierra
+  y la llamada termina con TaskCancelled sin reintentos.
+
+Los hilos se crean bajo demanda hasta `max_workers`.
+"""
+import heapq
+import itertools
+import logging
+import socket
+import threading
+from concurrent.futures import Future
+
+from metrics import EXECUTOR_REJECTED, EXECUTOR_CANCELLED
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVA = 0
+LOTE = 1
+PRIORIDADES = {INTERACTIVA: "interactiva", LOTE: "lote"}
+# Tareas que pueden esperar en cola por clase antes de rechazar
+DEFAULT_MAX_QUEUE = {INTERACTIVA: 64, LOTE: 16}
+
+_local = threading.local()
+
+
+class QueueFullError(RuntimeError):
+    """La cola de esa prioridad está llena: la tarea se rechaza sin encolarla."""
+
+
+class TaskCancelled(Exception):
+    """
+    La tarea en curso se ha cancelado. No hereda de OSError para que urllib3
+    no lo trate como un fallo de red y reintente.
+    """
+
+
+def current_task():
+    """TaskFuture de la tarea que ejecuta el hilo actual, o None fuera del pool."""
+    return getattr(_local, "task", None)
+
+
+class TaskFuture(Future):
+    """Future cuyo cancel() también avisa a la tarea si ya ha empezado."""
+
+    def __init__(self):
+        super().__init__()
+        self._cancel_event = threading.Event()
+        self._cancel_lock = threading.Lock()
+        self._cancel_callbacks = []
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def on_cancel(self, callback):
+        """
+        Registra `callback()` para cuando se cancele la tarea en curso (se
+        llama al momento si ya se canceló). Devuelve la función que lo retira.
+        """
+        with self._cancel_lock:
+            if not self._cancel_event.is_set():
+                self._cancel_callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback):
+        with self._cancel_lock:
+            try:
+                self._cancel_callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def cancel(self):
+        """
+        Cancela la tarea. Si aún está en cola se descarta y devuelve True; si
+        ya se ejecuta devuelve False (como Future) pero la tarea recibe el aviso.
+        """
+        if super().cancel():
+            return True
+        if not self.running():
+            return False
+        with self._cancel_lock:
+            if self._cancel_event.is_set():
+                return False
+            self._cancel_event.set()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Error al cancelar una tarea en curso")
+        return False
+
+
+class PriorityExecutor:
+    """Pool de hilos con cola por prioridad, límite de cola y cancelación de tareas en curso."""
+
+    def __init__(self, max_workers=4, *, max_queue=None, name="logica-ia"):
+        self.max_workers = max_workers
+        self.max_queue = {**DEFAULT_MAX_QUEUE, **(max_queue or {})}
+        self._name = name
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._heap = []
+        self._seq = itertools.count()
+        self._threads = []
+        self._idle = 0
+        self._running = 0
+        self._closed = False
+        # Tareas en cola por prioridad (sin contar las canceladas antes de empezar)
+        self._queued = {p: 0 for p in PRIORIDADES}
+        self.rejected = {p: 0 for p in PRIORIDADES}
+        self.cancelled_queued = 0
+        self.cancelled_running = 0
+
+    def submit(self, fn, *args, priority=INTERACTIVA, **kwargs):
+        """Encola fn(*args, **kwargs) y devuelve su TaskFuture; QueueFullError si no cabe."""
+        future = TaskFuture()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("No se pueden enviar tareas tras shutdown()")
+            if self._queued[priority] >= self.max_queue[priority]:
+                self.rejected[priority] += 1
+                EXECUTOR_REJECTED.inc(priority=PRIORIDADES[priority])
+                raise QueueFullError(f"Cola {PRIORIDADES[priority]} llena ({self.max_queue[priority]} tareas)")
+            self._queued[priority] += 1
+            heapq.heappush(self._heap, (priority, next(self._seq), future, fn, args, kwargs))
+            if len(self._heap) > self._idle and len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker, name=f"{self._name}-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._not_empty.notify()
+        future.add_done_callback(lambda f: self._discard(f, priority))
+        return future
+
+    def _discard(self, future, priority):
+        """Una tarea cancelada en cola deja de contar (se retira del montículo al salir)."""
+        if future.cancelled():
+            with self._lock:
+                self._queued[priority] -= 1
+                self.cancelled_queued += 1
+            EXECUTOR_CANCELLED.inc(state="en_cola")
+
+    def _cancelled_running(self):
+        with self._lock:
+            self.cancelled_running += 1
+        EXECUTOR_CANCELLED.inc(state="en_curso")
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                while not self._heap and not self._closed:
+                    self._idle += 1
+                    self._not_empty.wait()
+                    self._idle -= 1
+                if not self._heap:
+                    return
+                priority, _, future, fn, args, kwargs = heapq.heappop(self._heap)
+                # Si se canceló en cola, _discard ya la ha descontado
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._queued[priority] -= 1
+                self._running += 1
+            future.on_cancel(self._cancelled_running)
+            _local.task = future
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+            finally:
+                _local.task = None
+                with self._lock:
+                    self._running -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": {PRIORIDADES[p]: n for p, n in self._queued.items()},
+                "running": self._running,
+                "workers": len(self._threads),
+                "max_workers": self.max_workers,
+                "rejected": {PRIORIDADES[p]: n for p, n in self.rejected.items()},
+                "cancelled_queued": self.cancelled_queued,
+                "cancelled_running": self.cancelled_running,
+            }
+
+    def shutdown(self, wait=True, cancel_futures=True):
+        """Detiene los hilos; por defecto cancela lo que aún está en cola."""
+        with self._lock:
+            self._closed = True
+            pending = [entry[2] for entry in self._heap] if cancel_futures else []
+            if cancel_futures:
+                self._heap.clear()
+            self._not_empty.notify_all()
+            threads = list(self._threads)
+        for future in pending:
+            future.cancel()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+# --- Cancelación de la petición HTTP en curso (requests/urllib3) ---
+
+def _shutdown_socket(sock):
+    try:
+        # socket.shutdown y no SSLSocket.shutdown: no se toca el estado TLS que usa el otro hilo
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+_pool_classes = None
+
+
+def cancellable_pool_classes():
+    """
+    Clases de pool de urllib3 ({"http": ..., "https": ...}) cuyas conexiones,
+    ejecutadas dentro de una tarea del pool, cierran el socket al cancelarla:
+    la espera de la respuesta termina al momento con TaskCancelled. Se asignan
+    a `HTTPAdapter.poolmanager.pool_classes_by_scheme`. urllib3 se importa al usarla.
+    """
+    global _pool_classes
+    if _pool_classes is None:
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+        class CancellableMixin:
+            def request(self, *args, **kwargs):
+                task = current_task()
+                if task is not None and task.cancel_requested:
+                    raise TaskCancelled("Tarea cancelada antes de enviar la petición")
+                return super().request(*args, **kwargs)
+
+            def getresponse(self, *args, **kwargs):
+                task = current_task()
+                if task is None or self.sock is None:
+                    return super().getresponse(*args, **kwargs)
+                unregister = task.on_cancel(lambda sock=self.sock: _shutdown_socket(sock))
+                try:
+                    return super().getresponse(*args, **kwargs)
+                except Exception as exc:
+                    if task.cancel_requested:
+                        raise TaskCancelled("Petición cancelada mientras esperaba la respuesta") from exc
+                    raise
+                finally:
+                    unregister()
+
+        class CancellableHTTPConnection(CancellableMixin, HTTPConnection):
+            pass
+
+        class CancellableHTTPSConnection(CancellableMixin, HTTPSConnection):
+            pass
+
+        class CancellableHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = CancellableHTTPConnection
+
+        class CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = CancellableHTTPSConnection
+
+        _pool_classes = {"http": CancellableHTTPConnectionPool, "https": CancellableHTTPSConnectionPool}
+    return _pool_classes
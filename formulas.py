@@ -0,0 +1,548 @@
+"""
+Analizador de fórmulas de lógica proposicional.
+
+Reconoce la notación usada en la interfaz (¬ ∧ ∨ ⊕ → ↔) y sus alias ASCII
+habituales (~ ! & ^ | v -> => <-> <=>), y produce un árbol sintáctico inmutable.
+"""
+import re
+import weakref
+from functools import lru_cache
+from threading import Lock
+
+# Conectivos canónicos
+NOT = '¬'
+AND = '∧'
+OR = '∨'
+XOR = '⊕'
+IMPLIES = '→'
+IFF = '↔'
+
+# Tamaño de la caché de análisis (textos normalizados distintos)
+PARSE_CACHE_SIZE = 1024
+
+# Precedencia (mayor número = liga más fuerte) y asociatividad de los binarios
+_PRECEDENCE = {IFF: 1, IMPLIES: 2, XOR: 3, OR: 4, AND: 5}
+_RIGHT_ASSOC = {IFF, IMPLIES}
+
+_ALIASES = {
+    '¬': NOT, '~': NOT, '!': NOT,
+    '∧': AND, '&': AND, '^': AND, '/\\': AND,
+    '∨': OR, '|': OR, '\\/': OR, 'v': OR,
+    '⊕': XOR,
+    '→': IMPLIES, '->': IMPLIES, '=>': IMPLIES, '⊃': IMPLIES,
+    '↔': IFF, '<->': IFF, '<=>': IFF, '≡': IFF,
+}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<op><->|<=>|->|=>|/\\|\\/|[¬~!∧&^∨|⊕→⊃↔≡])
+      | (?P<lpar>[(\[])
+      | (?P<rpar>[)\]])
+      | (?P<const>[⊤⊥01])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_']*)
+    )""", re.VERBOSE)
+
+
+class FormulaError(ValueError):
+    """Error de sintaxis en una fórmula proposicional."""
+
+
+class Formula:
+    """
+    Nodo inmutable del árbol sintáctico.
+
+    Los nodos se construyen con consing (hash-consing): dos sub-fórmulas
+    estructuralmente iguales son el mismo objeto, así que la igualdad y el
+    hash son por identidad y los resultados pueden memorizarse por nodo.
+    """
+    __slots__ = ('connectives', '__weakref__')
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Las fórmulas son inmutables")
+
+    def __delattr__(self, name):
+        raise AttributeError("Las fórmulas son inmutables")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# Tabla de consing: clave estructural -> nodo vivo. Las claves usan id() de los
+# hijos, que son válidos mientras el padre (que los referencia) siga vivo.
+_interned = weakref.WeakValueDictionary()
+_intern_lock = Lock()
+
+
+def _intern(cls, key, fields, connectives):
+    with _intern_lock:
+        node = _interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in fields:
+                object.__setattr__(node, name, value)
+            object.__setattr__(node, 'connectives', connectives)
+            _interned[key] = node
+        return node
+
+
+class Var(Formula):
+    __slots__ = ('name',)
+
+    def __new__(cls, name):
+        return _intern(cls, ('var', name), (('name', name),), 0)
+
+    def __reduce__(self):
+        return Var, (self.name,)
+
+    def __repr__(self):
+        return f"Var({self.name!r})"
+
+
+class Const(Formula):
+    __slots__ = ('value',)
+
+    def __new__(cls, value):
+        value = bool(value)
+        return _intern(cls, ('const', value), (('value', value),), 0)
+
+    def __reduce__(self):
+        return Const, (self.value,)
+
+    def __repr__(self):
+        return f"Const({self.value!r})"
+
+
+class Not(Formula):
+    __slots__ = ('operand',)
+
+    def __new__(cls, operand):
+        return _intern(cls, (NOT, id(operand)), (('operand', operand),), operand.connectives + 1)
+
+    def __reduce__(self):
+        return Not, (self.operand,)
+
+    def __repr__(self):
+        return f"Not({self.operand!r})"
+
+
+class BinOp(Formula):
+    __slots__ = ('op', 'left', 'right')
+
+    def __new__(cls, op, left, right):
+        return _intern(cls, (op, id(left), id(right)),
+                       (('op', op), ('left', left), ('right', right)),
+                       left.connectives + right.connectives + 1)
+
+    def __reduce__(self):
+        return BinOp, (self.op, self.left, self.right)
+
+    def __repr__(self):
+        return f"BinOp({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+def tokenize(text):
+    """Convierte el texto en una lista de tokens (tipo, valor)."""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise FormulaError(f"símbolo no reconocido '{text[pos:].lstrip()[:1]}' en la posición {pos + 1}")
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == 'name' and value == 'v':
+            kind, value = 'op', 'v'
+        if kind == 'op':
+            value = _ALIASES[value]
+        elif kind == 'const':
+            value = value in ('⊤', '1')
+        tokens.append((kind, value))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Parser por precedencia de operadores con pilas explícitas (sin recursión):
+    una sola pasada sobre los tokens, en tiempo lineal y sin límite de
+    profundidad para cadenas largas o paréntesis muy anidados.
+    """
+
+    _LPAR = '('
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.operands = []
+        self.operators = []
+
+    def parse(self):
+        if not self.tokens:
+            raise FormulaError("la fórmula está vacía")
+        operands = self.operands
+        operators = self.operators
+        expect_operand = True
+        for token in self.tokens:
+            kind, value = token
+            if expect_operand:
+                if kind == 'op' and value == NOT:
+                    operators.append(NOT)
+                    continue
+                if kind == 'lpar':
+                    operators.append(self._LPAR)
+                    continue
+                if kind == 'name':
+                    operands.append(Var(value))
+                elif kind == 'const':
+                    operands.append(Const(value))
+                else:
+                    raise FormulaError(f"símbolo inesperado '{_token_text(token)}'")
+                self._apply_negations()
+                expect_operand = False
+            elif kind == 'op' and value != NOT:
+                prec = _PRECEDENCE[value]
+                while operators and operators[-1] is not self._LPAR:
+                    top = _PRECEDENCE[operators[-1]]
+                    if top < prec or (top == prec and value in _RIGHT_ASSOC):
+                        break
+                    self._reduce()
+                operators.append(value)
+                expect_operand = True
+            elif kind == 'rpar':
+                while operators and operators[-1] is not self._LPAR:
+                    self._reduce()
+                if not operators:
+                    raise FormulaError(f"símbolo inesperado '{_token_text(token)}'")
+                operators.pop()
+                self._apply_negations()
+            elif self._LPAR in operators:
+                raise FormulaError("falta cerrar un paréntesis")
+            else:
+                raise FormulaError(f"símbolo inesperado '{_token_text(token)}'")
+
+        if expect_operand:
+            raise FormulaError("la fórmula termina de forma incompleta")
+        while operators:
+            if operators[-1] is self._LPAR:
+                raise FormulaError("falta cerrar un paréntesis")
+            self._reduce()
+        return operands[0]
+
+    def _reduce(self):
+        op = self.operators.pop()
+        right = self.operands.pop()
+        left = self.operands.pop()
+        self.operands.append(BinOp(op, left, right))
+
+    def _apply_negations(self):
+        # La negación liga más que cualquier binario: se aplica en cuanto su operando está completo
+        operators = self.operators
+        while operators and operators[-1] == NOT:
+            operators.pop()
+            self.operands.append(Not(self.operands.pop()))
+
+
+def _token_text(token):
+    kind, value = token
+    if kind == 'const':
+        return '⊤' if value else '⊥'
+    if kind == 'lpar':
+        return '('
+    if kind == 'rpar':
+        return ')'
+    return str(value)
+
+
+def normalize_text(text):
+    """Normaliza espacios para que variantes triviales compartan la entrada de la caché."""
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_normalized(text):
+    return _Parser(tokenize(text)).parse()
+
+
+def parse_formula(text):
+    """
+    Analiza una fórmula y devuelve su árbol sintáctico. Lanza FormulaError si no es válida.
+    El resultado se guarda en una caché LRU por texto normalizado; como los nodos
+    son inmutables y compartidos, todas las rutas reutilizan el mismo árbol.
+    """
+    if text is None:
+        raise FormulaError("la fórmula está vacía")
+    return _parse_normalized(normalize_text(text))
+
+
+def to_str(node):
+    """Representa el árbol con los símbolos canónicos y los paréntesis necesarios."""
+    out = []
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, str):
+            out.append(n)
+        elif isinstance(n, Var):
+            out.append(n.name)
+        elif isinstance(n, Const):
+            out.append('⊤' if n.value else '⊥')
+        elif isinstance(n, Not):
+            if isinstance(n.operand, BinOp):
+                stack += [')', n.operand, NOT + '(']
+            else:
+                stack += [n.operand, NOT]
+        else:
+            right = [')', n.right, '('] if isinstance(n.right, BinOp) else [n.right]
+            if isinstance(n.left, BinOp) and not (n.left.op == n.op and n.op in (AND, OR)):
+                left = [')', n.left, '(']
+            else:
+                left = [n.left]
+            stack += right + [f" {n.op} "] + left
+    return ''.join(out)
+
+
+_TEXT_CONNECTIVES = {AND: 'y', OR: 'o'}
+
+
+def to_text(node, leyenda=None, nested=False):
+    """Traduce la fórmula a una oración en español usando la leyenda {variable: frase}."""
+    leyenda = leyenda or {}
+    out = []
+    # Pila de trabajo: textos ya hechos o pares (nodo, anidado); se recorre una vez
+    stack = [(node, nested)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+            continue
+        n, nested = item
+        if isinstance(n, Var):
+            out.append(leyenda.get(n.name, n.name))
+        elif isinstance(n, Const):
+            out.append('verdadero' if n.value else 'falso')
+        elif isinstance(n, Not):
+            if not isinstance(n.operand, BinOp):
+                stack += [(n.operand, True), "no "]
+            elif nested:
+                stack += [")", (n.operand, True), "no es cierto que ("]
+            else:
+                stack += [(n.operand, True), "no es cierto que "]
+        else:
+            left, right = (n.left, True), (n.right, True)
+            if n.op == IMPLIES:
+                stack += [right, ", entonces ", left, 'si ' if nested else 'Si ']
+            elif n.op == IFF:
+                stack += [right, " si y solo si ", left]
+            elif n.op == XOR:
+                stack += [right, " o bien ", left, "o bien "]
+            else:
+                # En cadenas mixtas de ∧/∨ se marcan los grupos con paréntesis
+                if isinstance(n.right, BinOp) and n.right.op != n.op:
+                    stack += [")", right, "("]
+                else:
+                    stack.append(right)
+                stack.append(f" {_TEXT_CONNECTIVES[n.op]} ")
+                if isinstance(n.left, BinOp) and n.left.op != n.op:
+                    stack += [")", left, "("]
+                else:
+                    stack.append(left)
+    return ''.join(out)
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def variables(node):
+    """Devuelve las variables de la fórmula en orden alfabético natural (P2 antes que P10)."""
+    return list(_variables(node))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _variables(node):
+    found = set()
+    stack = [node]
+    seen = set()
+    while stack:
+        n = stack.pop()
+        if n in seen:
+            continue
+        seen.add(n)
+        if isinstance(n, Var):
+            found.add(n.name)
+        elif isinstance(n, Not):
+            stack.append(n.operand)
+        elif isinstance(n, BinOp):
+            stack.append(n.left)
+            stack.append(n.right)
+    return tuple(sorted(found, key=_natural_key))
+
+
+def postorder(node):
+    """
+    Nodos distintos de la fórmula, cada hijo antes que su padre. Gracias al
+    consing las sub-fórmulas repetidas son el mismo nodo y aparecen una sola
+    vez (el árbol se recorre como un grafo acíclico), así que evaluar en este
+    orden calcula cada sub-fórmula común una única vez.
+    """
+    return _postorder(node)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _postorder(node):
+    order = []
+    seen = set()
+    stack = [(node, False)]
+    while stack:
+        n, expanded = stack.pop()
+        if expanded:
+            order.append(n)
+            continue
+        if n in seen:
+            continue
+        seen.add(n)
+        stack.append((n, True))
+        if isinstance(n, BinOp):
+            stack.append((n.right, False))
+            stack.append((n.left, False))
+        elif isinstance(n, Not):
+            stack.append((n.operand, False))
+    return tuple(order)
+
+
+def merge_variables(*nodes):
+    """Variables de varias fórmulas a la vez, en el mismo orden que variables()."""
+    found = set()
+    for node in nodes:
+        found.update(variables(node))
+    return sorted(found, key=_natural_key)
+
+
+def connective_count(node):
+    """Número de conectivos de la fórmula (medida de complejidad)."""
+    return node.connectives
+
+
+def canonical_text(text):
+    """
+    Forma léxica canónica: símbolos canónicos en lugar de los alias ASCII y
+    espaciado uniforme. No necesita que la fórmula sea válida, solo que se
+    reconozcan sus símbolos; si no, se normalizan únicamente los espacios.
+    """
+    try:
+        tokens = tokenize(normalize_text(text or ''))
+    except FormulaError:
+        return normalize_text(text or '')
+    out = []
+    for kind, value in tokens:
+        piece = _token_text((kind, value))
+        if kind == 'op' and value != NOT:
+            piece = f" {piece} "
+        out.append(piece)
+    return ' '.join(''.join(out).split())
+
+
+def rename(node, mapping):
+    """Sustituye las variables según mapping {nombre: nuevo_nombre} (una vez por nodo distinto)."""
+    memo = {}
+    for n in postorder(node):
+        if isinstance(n, Var):
+            res = Var(mapping.get(n.name, n.name))
+        elif isinstance(n, Const):
+            res = n
+        elif isinstance(n, Not):
+            res = Not(memo[n.operand])
+        else:
+            res = BinOp(n.op, memo[n.left], memo[n.right])
+        memo[n] = res
+    return memo[node]
+
+
+# Conectivos asociativos y conmutativos: sus cadenas pueden reordenarse
+_AC_OPS = (AND, OR, XOR, IFF)
+
+
+def _chain_operands(node):
+    """Operandos de la cadena de node.op que empieza en node, de izquierda a derecha."""
+    operands = []
+    stack = [node]
+    while stack:
+        m = stack.pop()
+        if isinstance(m, BinOp) and m.op == node.op:
+            stack.append(m.right)
+            stack.append(m.left)
+        else:
+            operands.append(m)
+    return operands
+
+
+def _sort_operands(node):
+    keys = {}
+
+    def key(n):
+        k = keys.get(n)
+        if k is None:
+            k = keys[n] = to_str(n)
+        return k
+
+    # Nodos que se reescriben: cada cadena de ∧ ∨ ⊕ ↔ cuenta como un solo nodo
+    # con todos sus operandos (sus nodos intermedios no se tratan por separado)
+    children = {}
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if n in children:
+            continue
+        if isinstance(n, Not):
+            kids = [n.operand]
+        elif isinstance(n, BinOp):
+            kids = _chain_operands(n) if n.op in _AC_OPS else [n.left, n.right]
+        else:
+            kids = []
+        children[n] = kids
+        stack.extend(kids)
+
+    memo = {}
+    for n in postorder(node):
+        kids = children.get(n)
+        if kids is None:
+            continue
+        if isinstance(n, Not):
+            res = Not(memo[n.operand])
+        elif isinstance(n, BinOp) and n.op in _AC_OPS:
+            operands = sorted((memo[k] for k in kids), key=key)
+            res = operands[0]
+            for operand in operands[1:]:
+                res = BinOp(n.op, res, operand)
+        elif isinstance(n, BinOp):
+            res = BinOp(n.op, memo[n.left], memo[n.right])
+        else:
+            res = n
+        memo[n] = res
+    return memo[node]
+
+
+def canonicalize(*nodes, commutative=False):
+    """
+    Forma canónica para compartir resultados entre fórmulas que solo difieren
+    en los nombres de las variables: se renombran a x0, x1, ... conservando el
+    orden de variables(), así que la tabla de verdad y la simplificación son
+    las mismas salvo los nombres. Con commutative=True también se reordenan
+    los operandos de las cadenas de ∧ ∨ ⊕ ↔ (válido cuando solo importa la
+    función lógica, como en la equivalencia).
+    Devuelve (nodos_canonicos, nombres): nombres[i] es la variable original de xi.
+    """
+    names = merge_variables(*nodes)
+    mapping = {name: f"x{i}" for i, name in enumerate(names)}
+    result = tuple(rename(node, mapping) for node in nodes)
+    if commutative:
+        result = tuple(_sort_operands(node) for node in result)
+    return result, names
+
+
+def restore(node, names):
+    """Inversa de canonicalize: devuelve a las variables xi sus nombres originales."""
+    return rename(node, {f"x{i}": name for i, name in enumerate(names)})
@@ -0,0 +1,115 @@
+"""
+Cliente asíncrono (asyncio + httpx) para la API de Gemini.
+
+Es la alternativa a LogicaModelo._send_gemini_request para despliegues
+asíncronos (Flask con vistas async o ASGI). Un semáforo limita cuántas
+llamadas están en vuelo a la vez, httpx reutiliza las conexiones (keep-alive)
+y los reintentos siguen la misma política que el adaptador urllib3 de la
+sesión síncrona: solo fallos de conexión (3, backoff_factor=0.6). Un 429 o
+5xx se devuelve al momento para que el cortocircuito y el límite adaptativo
+de LogicaModelo lo registren.
+
+httpx es una dependencia opcional: solo se importa al crear el cliente.
+"""
+import asyncio
+
+from metrics import UPSTREAM_RETRIES
+
+BACKOFF_MAX = 120
+
+
+class GeminiHTTPError(Exception):
+    """Respuesta HTTP de error de Gemini tras agotar los reintentos."""
+
+    def __init__(self, status_code, response):
+        super().__init__(f"HTTP {status_code} de la API de Gemini")
+        self.status_code = status_code
+        self.response = response
+
+
+class AsyncGeminiClient:
+    def __init__(self, api_base, api_key=None, *, max_concurrency=64, timeout=(5, 20),
+                 max_connections=100, max_keepalive_connections=20,
+                 retries=3, backoff_factor=0.6, transport=None):
+        try:
+            import httpx
+        except ImportError as e:  # pragma: no cover - depende del entorno
+            raise RuntimeError("El cliente asíncrono de Gemini necesita httpx: pip install httpx") from e
+        self._httpx = httpx
+        self.api_base = api_base
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_concurrency = max_concurrency
+        # Las primitivas de asyncio y el pool de conexiones pertenecen al bucle actual
+        self.loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+            transport=transport,
+        )
+        # Llamadas en vuelo por cache_key (single-flight dentro del bucle)
+        self.inflight = {}
+        self._closed = False
+        # Generador asíncrono registrado en el bucle: al terminar este (asyncio.run
+        # llama a shutdown_asyncgens) o al descartarse el cliente, cierra el pool
+        self._closer = self._close_on_shutdown()
+        self.loop.create_task(self._closer.__anext__())
+
+    async def _close_on_shutdown(self):
+        try:
+            yield
+        finally:
+            await self.aclose()
+
+    def _backoff(self, consecutive_errors):
+        # Misma fórmula que urllib3.Retry.get_backoff_time
+        if consecutive_errors <= 1:
+            return 0
+        return min(BACKOFF_MAX, self.backoff_factor * (2 ** (consecutive_errors - 1)))
+
+    async def send(self, payload, timeout=None):
+        """
+        Envía la petición generateContent y devuelve el JSON de la respuesta.
+        Lanza GeminiHTTPError si la respuesta final es un error HTTP.
+        """
+        connect, read = timeout or self.timeout
+        params = {"key": self.api_key} if self.api_key else {}
+        headers = {"Content-Type": "application/json"}
+        request_timeout = self._httpx.Timeout(read, connect=connect)
+        errors = 0
+        async with self._semaphore:
+            while True:
+                try:
+                    resp = await self._client.post(self.api_base, json=payload, params=params,
+                                                   headers=headers, timeout=request_timeout)
+                except (self._httpx.ConnectError, self._httpx.ConnectTimeout):
+                    # La petición no llegó a enviarse: se puede repetir sin riesgo
+                    if errors >= self.retries:
+                        UPSTREAM_RETRIES.observe(errors)
+                        raise
+                    errors += 1
+                    await asyncio.sleep(self._backoff(errors))
+                    continue
+                UPSTREAM_RETRIES.observe(errors)
+                if resp.status_code >= 400:
+                    raise GeminiHTTPError(resp.status_code, resp)
+                return resp.json()
+
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            await self._client.aclose()
+
+    def close_soon(self):
+        """
+        Cierra el cliente desde otro hilo o bucle. Si su bucle está en marcha,
+        aclose() se programa en él. Un bucle detenido ya no ejecuta corrutinas:
+        no se programa nada y basta con soltar el cliente; se cierra si el bucle
+        vuelve a arrancar y termina con shutdown_asyncgens, y si no, sus sockets
+        se liberan cuando el bucle se cierra y se recogen sus transportes.
+        """
+        if not self._closed and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.aclose(), self.loop)
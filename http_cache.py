@@ -0,0 +1,111 @@
+"""
+Caché HTTP de las páginas de solo lectura y de los ficheros estáticos.
+
+- PageCache guarda el HTML ya renderizado de las páginas cuyo contenido no
+  cambia (leyes lógicas, acerca de) con su ETag y Last-Modified, y responde
+  304 a las peticiones condicionales. Se vuelve a renderizar solo si cambia
+  alguna de sus plantillas.
+- StaticDigests calcula el hash del contenido de cada fichero estático para
+  añadirlo a su URL (`?v=<hash>`); esas URLs no cambian mientras no cambie el
+  fichero y pueden guardarse en el navegador con caducidad de un año.
+"""
+import hashlib
+import os
+import time
+from collections import namedtuple
+from email.utils import formatdate
+from threading import Lock
+
+# Las páginas se pueden reutilizar un rato sin preguntar; después, 304 por ETag
+PAGE_CACHE_CONTROL = "public, max-age=300"
+# URLs con hash de contenido: el fichero de esa URL no cambia nunca
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+RenderedPage = namedtuple("RenderedPage", ("body", "etag", "last_modified", "version", "uptodate"))
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class PageCache:
+    """HTML renderizado por clave, con validadores HTTP y recarga si cambian las plantillas."""
+
+    def __init__(self, jinja_env):
+        self._env = jinja_env
+        self._lock = Lock()
+        self._pages = {}
+        self.hits = 0
+        self.renders = 0
+
+    def _uptodate(self, templates):
+        """Funciones `uptodate` de Jinja de las plantillas (False si el fichero cambió)."""
+        checks = []
+        for name in templates:
+            _, _, uptodate = self._env.loader.get_source(self._env, name)
+            if uptodate is not None:
+                checks.append(uptodate)
+        return tuple(checks)
+
+    def get(self, key, render, templates, version=None):
+        """
+        Devuelve la RenderedPage de `key`, llamando a `render()` (que devuelve el
+        HTML) solo la primera vez, si alguna de `templates` ha cambiado o si
+        cambia `version()` (p. ej. los hashes de los estáticos enlazados).
+        """
+        with self._lock:
+            page = self._pages.get(key)
+        if (page is not None and all(check() for check in page.uptodate)
+                and (version is None or page.version == version())):
+            with self._lock:
+                self.hits += 1
+            return page
+        # Se renderiza fuera del candado; dos peticiones simultáneas dan el mismo HTML
+        body = render().encode("utf-8")
+        page = RenderedPage(body, _digest(body), formatdate(time.time(), usegmt=True),
+                            version() if version is not None else None, self._uptodate(templates))
+        with self._lock:
+            self._pages[key] = page
+            self.renders += 1
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"pages": len(self._pages), "hits": self.hits, "renders": self.renders}
+
+
+class StaticDigests:
+    """Hash del contenido de los ficheros estáticos, recalculado si cambian tamaño o fecha."""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self._lock = Lock()
+        self._digests = {}
+
+    def digest(self, filename):
+        """Hash corto de `filename` (relativo a la carpeta estática), o None si no existe."""
+        path = os.path.join(self.static_folder, filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._digests.get(filename)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        with open(path, "rb") as fh:
+            value = _digest(fh.read())
+        with self._lock:
+            self._digests[filename] = (stamp, value)
+        return value
+
+    def version(self):
+        """Hashes actuales de todos los ficheros ya enlazados: cambia si cambia alguno."""
+        with self._lock:
+            filenames = sorted(self._digests)
+        return tuple(self.digest(name) for name in filenames)
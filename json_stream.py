@@ -0,0 +1,172 @@
+"""
+Análisis incremental del JSON que devuelve la IA.
+
+La respuesta de streamGenerateContent llega por trozos y el texto del modelo
+puede venir rodeado de otras cosas (un bloque ```json, una frase). El
+analizador examina cada carácter una sola vez, ignora lo que hay antes de la
+primera '{' y después de su cierre, y decodifica cada valor del objeto en
+cuanto se completa. Los elementos de las listas indicadas (p. ej. "rows" o
+"pasos") se entregan uno a uno según terminan, sin esperar al resto.
+"""
+import json
+import re
+
+# Siguiente carácter con significado fuera de una cadena / dentro de una cadena
+_STRUCTURAL = re.compile(r'["{}\[\],:]')
+_STRING_END = re.compile(r'["\\]')
+
+# Estados dentro del objeto principal
+_KEY, _COLON, _VALUE = "clave", "dos_puntos", "valor"
+
+
+class IncrementalJSONParser:
+    """
+    Analizador por trozos del primer objeto JSON de un texto.
+
+    feed(trozo) devuelve los eventos completados con ese trozo:
+    - ("valor", clave, valor) al terminar cada valor del objeto principal;
+    - ("elemento", clave, elemento) por cada elemento de las listas de
+      `stream_keys` (su valor completo no se vuelve a emitir).
+    close() devuelve el objeto completo o lanza json.JSONDecodeError.
+    """
+
+    def __init__(self, stream_keys=()):
+        self.stream_keys = frozenset(stream_keys)
+        self.result = {}
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._state = _KEY
+        self._key = None
+        self._value_start = None
+        self._value_done = False
+        # Lista de una stream_key en curso: elementos ya decodificados e inicio del actual
+        self._items = None
+        self._item_start = None
+
+    @property
+    def done(self):
+        """True cuando ya se ha cerrado el objeto principal."""
+        return self._done
+
+    def feed(self, chunk):
+        if self._done or not chunk:
+            return []
+        self._text += chunk
+        text = self._text
+        events = []
+        pos = self._pos
+        while not self._done:
+            if not self._started:
+                start = text.find('{', pos)
+                if start == -1:
+                    pos = len(text)
+                    break
+                self._started = True
+                self._depth = 1
+                pos = start + 1
+                continue
+            if self._in_string:
+                m = _STRING_END.search(text, pos)
+                if m is None:
+                    # Un '\\' al final del trozo deja pos más allá del texto: se respeta
+                    pos = max(pos, len(text))
+                    break
+                if m.group() == '\\':
+                    pos = m.end() + 1
+                    continue
+                self._in_string = False
+                pos = m.end()
+                if self._depth == 1 and self._state == _KEY:
+                    self._key = self._decode(self._string_start, pos)
+                    self._state = _COLON
+                continue
+            m = _STRUCTURAL.search(text, pos)
+            if m is None:
+                pos = len(text)
+                break
+            i = m.start()
+            pos = m.end()
+            self._structural(m.group(), i, events)
+        self._pos = pos
+        return events
+
+    def _structural(self, ch, i, events):
+        depth = self._depth
+        if ch == '"':
+            self._in_string = True
+            self._string_start = i
+        elif ch == ':':
+            if depth == 1 and self._state == _COLON:
+                self._state = _VALUE
+                self._value_start = i + 1
+                self._value_done = False
+        elif ch == ',':
+            if depth == 1:
+                self._end_value(i, events)
+                self._state = _KEY
+            elif depth == 2 and self._items is not None:
+                self._end_item(i, events)
+        elif ch in '{[':
+            if depth == 1 and ch == '[' and self._state == _VALUE and self._key in self.stream_keys:
+                self._items = []
+                self._item_start = i + 1
+            self._depth = depth + 1
+        else:  # '}' o ']'
+            if depth == 2 and self._items is not None:
+                self._end_item(i, events)
+                self.result[self._key] = self._items
+                self._items = None
+                self._value_done = True
+            self._depth = depth - 1
+            if self._depth == 0:
+                self._end_value(i, events)
+                self._done = True
+
+    def _decode(self, start, end):
+        return json.loads(self._text[start:end])
+
+    def _end_value(self, i, events):
+        if self._state != _VALUE or self._value_done:
+            return
+        value = self._decode(self._value_start, i)
+        self.result[self._key] = value
+        self._value_done = True
+        events.append(("valor", self._key, value))
+
+    def _end_item(self, i, events):
+        if self._text[self._item_start:i].strip():
+            item = self._decode(self._item_start, i)
+            self._items.append(item)
+            events.append(("elemento", self._key, item))
+        self._item_start = i + 1
+
+    def close(self):
+        if not self._started:
+            raise json.JSONDecodeError("No se encontró un objeto JSON", self._text, 0)
+        if not self._done:
+            raise json.JSONDecodeError("JSON incompleto", self._text, len(self._text))
+        return self.result
+
+
+def iter_sse_data(lines):
+    """
+    Cuerpo JSON de cada evento de un flujo Server-Sent Events (líneas de texto).
+    Las líneas 'data:' seguidas de un evento se unen; los comentarios se ignoran.
+    """
+    data = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line:
+            if data:
+                yield json.loads("\n".join(data))
+                data = []
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield json.loads("\n".join(data))
@@ -0,0 +1,208 @@
+"""
+Métricas de rendimiento en formato de texto de Prometheus.
+
+Histogramas y contadores con etiquetas, y colectores que devuelven valores
+instantáneos (gauges) al generar la exposición. Cada observación de un
+histograma con `stage` se anota además en los tiempos de la petición en curso
+(ContextVar) para la cabecera Server-Timing.
+"""
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+# Límites (segundos) por defecto de los histogramas de latencia
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0)
+
+# Tiempos (etapa, segundos) de la petición en curso; None fuera de una petición
+_request_timings = ContextVar("logica_request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(items))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self, items):
+        return [f"{self.name}_total{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, stage=None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.stage = stage
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+        if self.stage:
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.append((self.stage, value))
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, (("le", _format_value(float(bound))),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas y colectores que se exponen juntos en /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """
+        `collector()` devuelve una lista de gauges
+        (nombre, descripción, [({etiqueta: valor}, valor), ...]).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, stage=None):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets, stage))
+
+
+# --- Tiempos por petición (Server-Timing) ---
+
+def begin_request():
+    """Empieza a anotar las etapas de la petición actual. Devuelve el token para end_request."""
+    return _request_timings.set([])
+
+
+def end_request(token):
+    _request_timings.reset(token)
+
+
+def request_timings():
+    """Lista (etapa, segundos) de la petición actual, o None fuera de una petición."""
+    return _request_timings.get()
+
+
+def server_timing_header(timings, total=None):
+    """Valor de la cabecera Server-Timing: suma por etapa, en milisegundos."""
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    if total is not None:
+        totals["total"] = total
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+# --- Métricas de la aplicación ---
+
+REQUEST_SECONDS = histogram("logica_request_seconds", "Duración de las peticiones HTTP hasta enviar las cabeceras", ("endpoint", "method", "status"))
+RENDER_SECONDS = histogram("logica_render_seconds", "Tiempo de renderizado de plantillas", ("template",), stage="render")
+CACHE_LOOKUP_SECONDS = histogram("logica_cache_lookup_seconds", "Duración de las consultas a la caché de respuestas de la IA", ("result",), stage="cache")
+QUEUE_WAIT_SECONDS = histogram("logica_executor_queue_wait_seconds", "Espera en la cola del pool de hilos antes de llamar a la IA", ("priority",), stage="queue")
+EXECUTOR_REJECTED = counter("logica_executor_rejected", "Tareas rechazadas por tener la cola de su prioridad llena", ("priority",))
+EXECUTOR_CANCELLED = counter("logica_executor_cancelled", "Tareas del pool canceladas, en cola o en curso", ("state",))
+UPSTREAM_SECONDS = histogram("logica_upstream_seconds", "Latencia de las llamadas a Gemini, reintentos incluidos", ("status",), stage="upstream")
+UPSTREAM_RETRIES = histogram("logica_upstream_retries", "Reintentos por llamada a Gemini", buckets=(0, 1, 2, 3, 5))
+PARSE_SECONDS = histogram("logica_parse_seconds", "Extracción y análisis del JSON de las respuestas de Gemini", stage="parse")
+LOCAL_TASK_SECONDS = histogram("logica_local_task_seconds", "Simplificaciones y equivalencias locales en los procesos de cálculo", ("task", "result"), stage="local")
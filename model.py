@@ -1,54 +1,34 @@
 # c:\Users\mseca\OneDrive\Documents\Proyecto_Logica\model.py
 import os
-import re
 import json
-import requests # Usaremos la librería requests para hacer la llamada a la API directamente
 from dotenv import load_dotenv
-from sympy.logic.boolalg import truth_table
-from sympy import sympify, simplify_logic, symbols
 import time
+import asyncio
+import contextvars
 import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 from threading import Lock
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from formulas import parse_formula, variables, FormulaError, canonical_text, canonicalize, restore, to_str
+from truth_table import evaluate, TAUTOLOGIA, table_columns, iter_rows, classify_formula
+from equivalence import check_equivalence
+from simplifier import simplify
+from sat import BudgetExceeded
+from caching import SimpleCache, SQLiteCache, TieredCache, SingleFlight
+from gemini_async import AsyncGeminiClient, GeminiHTTPError
+from resilience import CircuitBreaker, AdaptiveLimiter, UpstreamUnavailable, CircuitOpenError, ConcurrencyLimitError
+from metrics import CACHE_LOOKUP_SECONDS, QUEUE_WAIT_SECONDS, UPSTREAM_SECONDS, UPSTREAM_RETRIES, PARSE_SECONDS, LOCAL_TASK_SECONDS
+from json_stream import IncrementalJSONParser, iter_sse_data
+from prefetch import PrefetchScheduler
+from process_pool import ProcessPool, PoolBusy, TaskTimeout, WorkerCrashed
+from executor import (PriorityExecutor, INTERACTIVA, LOTE, PRIORIDADES, QueueFullError, TaskCancelled,
+                      current_task, cancellable_pool_classes)
+from prompts import (Prompt, TokenUsage, build_prompt, TOKEN_BUDGETS,
+                     TAREA_ORACION, TAREA_LOTE, TAREA_TABLA, TAREA_SIMPLIFICACION)
 
 logger = logging.getLogger(__name__)
 
-class SimpleCache:
-    def __init__(self, maxsize=128, ttl=300):
-        self.maxsize = maxsize
-        self.ttl = ttl
-        self.store = {}
-        self.lock = Lock()
-
-    def _prune(self):
-        # remove expired entries, keep size under maxsize
-        now = time.time()
-        keys = list(self.store.keys())
-        for k in keys:
-            v, ts = self.store.get(k, (None, 0))
-            if now - ts > self.ttl:
-                self.store.pop(k, None)
-        if len(self.store) > self.maxsize:
-            # remove oldest
-            items = sorted(self.store.items(), key=lambda x: x[1][1])
-            for k, _ in items[: len(self.store) - self.maxsize]:
-                self.store.pop(k, None)
-
-    def get(self, key):
-        with self.lock:
-            self._prune()
-            val = self.store.get(key)
-            if val:
-                return val[0]
-            return None
-
-    def set(self, key, value):
-        with self.lock:
-            self.store[key] = (value, time.time())
-            self._prune()
+_JSON_DECODER = json.JSONDecoder()
 
 # --- Carga de la Clave de API ---
 # Carga las variables de entorno desde un archivo .env
@@ -57,9 +37,76 @@ API_KEY = os.environ.get("GOOGLE_API_KEY")
 # Mantener compatibilidad: si existe variable con URL completa en env, usarla
 ENV_API_URL = os.environ.get("GEMINI_API_URL")
 DEFAULT_API_URL = ENV_API_URL or f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+# Caché persistente opcional compartida por los workers del host (ruta a un fichero SQLite)
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH")
+# Precálculo opcional de la tabla y la simplificación tras convertir una oración
+PREFETCH_FOLLOWUPS = os.environ.get("PREFETCH_FOLLOWUPS", "").lower() in ("1", "true", "yes")
+# Procesos para la simplificación y la equivalencia locales (0: en el propio hilo, sin límite de tiempo)
+CPU_WORKERS = int(os.environ.get("CPU_WORKERS", "2"))
+
+# Límite de variables para materializar una tabla de verdad completa (2^n filas)
+MAX_VARIABLES_TABLA = 12
+# Tabla paginada/descargable: se genera por bloques sin materializarla
+FILAS_POR_PAGINA = 1024
+MAX_VARIABLES_PAGINADA = 30
+MAX_VARIABLES_DESCARGA = 20
+# Tamaño máximo de las fórmulas que se precalculan de forma especulativa
+MAX_VARIABLES_PREFETCH = 8
+# Simplificación y equivalencia locales: variables admitidas y tiempo máximo (real y de CPU)
+MAX_VARIABLES_SIMPLIFICACION = 24
+MAX_VARIABLES_EQUIVALENCIA = 64
+LIMITE_CALCULO_LOCAL = 5.0
+
+# Procesamiento por lotes
+LOTE_ORACIONES = "oraciones"
+LOTE_TABLAS = "tablas"
+LOTE_SIMPLIFICACIONES = "simplificaciones"
+MAX_ITEMS_LOTE = 100
+# Filas en total de las tablas de un lote (p. ej. 64 tablas de 8 variables)
+MAX_FILAS_LOTE = 1 << 14
+ITEMS_POR_PROMPT = 10
+FORMAT_ERROR_MESSAGE = "La IA devolvió una respuesta en un formato inesperado. Inténtalo de nuevo."
+UNAVAILABLE_MESSAGE = "La IA no está disponible en este momento. Por favor, inténtalo de nuevo en unos segundos."
+BUSY_MESSAGE = "Hay demasiadas consultas a la IA en espera. Por favor, inténtalo de nuevo en unos segundos."
+# Respuestas de Gemini que indican sobrecarga: reducen el límite de llamadas en vuelo
+OVERLOAD_STATUS = (429, 503)
+
+def _simplify_steps(text):
+    """Pasos de simplify() para una fórmula en texto (tarea de los procesos de cálculo)."""
+    pasos, _ = simplify(parse_formula(text))
+    return pasos
+
+
+def _check_equivalence_text(text_a, text_b):
+    """check_equivalence() para dos fórmulas en texto (tarea de los procesos de cálculo)."""
+    return check_equivalence(parse_formula(text_a), parse_formula(text_b))
+
+
+def _classify_text(text):
+    """classify_formula() para una fórmula en texto (tarea de los procesos de cálculo)."""
+    return classify_formula(parse_formula(text))
+
+
+def _chunk_text(chunk):
+    """Texto del primer candidato de un trozo de streamGenerateContent."""
+    candidates = chunk.get("candidates") or []
+    if not candidates:
+        return ""
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _replay(data, stream_keys):
+    """Los eventos del analizador incremental para un resultado ya completo."""
+    for key, value in data.items():
+        if key in stream_keys and isinstance(value, list):
+            for item in value:
+                yield ("elemento", key, item)
+        else:
+            yield ("valor", key, value)
 
 class LogicaModelo:
-    def __init__(self, api_base=None, api_key=None, *, max_workers=4, cache_ttl=300, cache_size=256, default_timeout=(5,20)):
+    def __init__(self, api_base=None, api_key=None, *, max_workers=4, cache_ttl=300, cache_size=256, cache_stripes=1, cache_backend=None, default_timeout=(5,20), max_async_concurrency=64, cached_contents=None, breaker=None, limiter=None, prefetch=None, max_queue=None, cpu_workers=None):
         """Constructor optimizado: session con retries, pool de hilos y caché en memoria."""
         self.api_key = api_key or API_KEY
         self.api_base = api_base or DEFAULT_API_URL
@@ -67,28 +114,46 @@ class LogicaModelo:
         if not self.api_key and not os.environ.get("FLASK_RUN_FROM_CLI"):
             logger.warning("ADVERTENCIA: La clave de API de Google no se encontró en las variables de entorno.")
 
-        # HTTP session with retries & connection pooling
-        self._session = requests.Session()
-        retries = Retry(
-            total=3,
-            backoff_factor=0.6,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS']),
-            respect_retry_after_header=True
-        )
-        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries)
-        self._session.mount("https://", adapter)
-        self._session.mount("http://", adapter)
-
-        # Thread pool to avoid blocking main thread on slow API calls
-        self._executor = ThreadPoolExecutor(max_workers=max_workers)
-
-        # Simple in-memory cache for repeated prompts
-        self._cache = SimpleCache(maxsize=cache_size, ttl=cache_ttl)
+        # HTTP session with retries & connection pooling, creada (e importado requests)
+        # en la primera llamada a la IA: el arranque del worker no la necesita
+        self._session = None
+        self._session_lock = Lock()
+
+        # Pool de hilos para las llamadas a la IA: las peticiones web (INTERACTIVA)
+        # pasan antes que los lotes, cada prioridad tiene la cola acotada por
+        # max_queue ({prioridad: tareas}) y cancelar un future corta su petición HTTP
+        self._executor = PriorityExecutor(max_workers=max_workers, max_queue=max_queue)
+
+        # In-memory LRU+TTL cache for repeated prompts (O(1), opcionalmente segmentada)
+        self._cache = SimpleCache(maxsize=cache_size, ttl=cache_ttl, stripes=cache_stripes)
+
+        # Backend compartido opcional (L2) detrás de la caché en memoria:
+        # un objeto con get/set o la ruta a un fichero SQLite
+        cache_backend = cache_backend or CACHE_DB_PATH
+        if isinstance(cache_backend, str):
+            cache_backend = SQLiteCache(cache_backend)
+        if cache_backend is not None:
+            self._cache = TieredCache(self._cache, cache_backend)
+
+        # Resultados locales (tablas, equivalencias, simplificaciones) por forma canónica:
+        # "P ∧ Q", "(A & B)" o "Q ∧ P" comparten la misma entrada. Son deterministas, sin TTL.
+        self._local_results = SimpleCache(maxsize=cache_size, ttl=float("inf"), stripes=cache_stripes)
+
+        # Cortocircuito y límite adaptativo (AIMD) de llamadas en vuelo a Gemini,
+        # compartidos por la ruta síncrona y la asíncrona
+        self._breaker = breaker or CircuitBreaker(slow_call_seconds=default_timeout[1] / 2)
+        self._limiter = limiter or AdaptiveLimiter(maximum=max(max_workers, max_async_concurrency))
+
+        # Llamadas a la IA en vuelo, agrupadas por cache_key (single-flight)
+        self._inflight = SingleFlight()
 
         # Default request timeout (connect, read)
         self._timeout = default_timeout  # tuple (connect, read)
 
+        # Cliente asíncrono (httpx), creado al primer uso dentro del bucle de eventos
+        self._async_client = None
+        self._max_async_concurrency = max_async_concurrency
+
         # Default generation config to reduce latency (ajustable)
         self._default_generation_config = {
             "maxOutputTokens": 512,
@@ -96,165 +161,97 @@ class LogicaModelo:
             "topP": 0.95
         }
 
-    def _get_system_prompt(self):
-        """Define las instrucciones para el modelo de IA."""
-        return """
-        Eres un experto en lógica proposicional. Tu tarea es convertir una oración en lenguaje natural a su forma simbólica.
-        Sigue estas reglas estrictamente:
-        1.  Identifica las proposiciones atómicas en la oración.
-        2.  Asigna una variable proposicional (P, Q, R, etc.) a cada proposición atómica única.
-        3.  Si una proposición está negada (ej. "no vi la película"), la proposición atómica es la forma afirmativa ("vi la película").
-        4.  Reconoce los conectores lógicos y sus sinónimos:
-            - 'y', 'pero', 'aunque' se traducen a '∧'.
-            - 'o' se traduce a '∨'.
-            - 'si...entonces' o 'si..., ...' se traducen a '→'.
-            - 'si y solo si' se traduce a '↔'.
-            - 'no' se traduce a '¬'.
-        5.  Construye la fórmula simbólica final.
-        6.  Devuelve el resultado en un formato JSON VÁLIDO, sin ningún texto adicional antes o después. El JSON debe tener dos claves: "formula" y "leyenda".
-            - "formula": Un string con la expresión simbólica.
-            - "leyenda": Un objeto donde cada clave es una variable (P, Q, ...) y su valor es la proposición atómica correspondiente en su forma afirmativa.
-
-        Ejemplo 1:
-        Oración: "si no estuvieras loca, no habrías venido aquí"
-        Respuesta JSON:
-        {
-          "formula": "¬ P → ¬ Q",
-          "leyenda": {
-            "P": "estuvieras loca",
-            "Q": "habrías venido aquí"
-          }
-        }
+        # Caché de contexto de Gemini por tarea ({tarea: "cachedContents/..."}), si se ha creado una.
+        # Sustituye a la instrucción de sistema, que ya va dentro del contenido cacheado.
+        self._cached_contents = dict(cached_contents or {})
+        # Tokens consumidos por tarea (usageMetadata de las respuestas)
+        self._token_usage = TokenUsage()
 
-        Ejemplo 2:
-        Oración: "vi la pelicula aunque no lei la novela"
-        Respuesta JSON:
-        {
-          "formula": "P ∧ ¬ Q",
-          "leyenda": {
-            "P": "vi la pelicula",
-            "Q": "lei la novela"
-          }
-        }
-        """
+        # Precálculo de las operaciones siguientes (opcional): True, un
+        # PrefetchScheduler o, por defecto, la variable de entorno PREFETCH_FOLLOWUPS
+        prefetch = PREFETCH_FOLLOWUPS if prefetch is None else prefetch
+        if prefetch is True:
+            prefetch = PrefetchScheduler(busy=self._foreground_busy)
+        self._prefetcher = prefetch or None
 
-    def _get_truth_table_prompt(self):
-        """Define las instrucciones para que la IA genere una tabla de verdad."""
-        return """
-        Eres un experto en lógica proposicional. Tu tarea es generar una tabla de verdad detallada para una fórmula simbólica dada, mostrando todos los pasos intermedios.
-        Sigue estas reglas estrictamente:
-        1.  Identifica las variables proposicionales (P, Q, R, etc.) en la fórmula.
-        2.  Identifica todas las sub-fórmulas de la expresión, desde las más simples hasta la más compleja (la fórmula completa).
-        3.  Calcula todas las combinaciones de valores de verdad (Usa 'V' para verdadero y 'F' para falso).
-        4.  Evalúa el valor de verdad para cada sub-fórmula y para la fórmula completa en cada combinación.
-        5.  Clasifica la fórmula final como "Tautología", "Contradicción" o "Contingencia".
-        6.  Devuelve el resultado en un formato JSON VÁLIDO, sin ningún texto adicional antes o después. El JSON debe tener tres claves: "header", "rows" y "clasificacion".
-            - "header": Una lista de strings con los nombres de las columnas. Debe incluir primero las variables, luego todas las sub-fórmulas en orden de complejidad, y finalmente la fórmula completa.
-            - "rows": Una lista de listas, donde cada sublista representa una fila de la tabla con los valores 'V' o 'F'.
-            - "clasificacion": Un string que puede ser "Tautología", "Contradicción" o "Contingencia".
-
-        Ejemplo 1:
-        Fórmula: "(P ∧ Q) → P"
-        Respuesta JSON:
-        {
-          "header": ["P", "Q", "P ∧ Q", "(P ∧ Q) → P"],
-          "rows": [
-            ["V", "V", "V", "V"],
-            ["V", "F", "F", "V"],
-            ["F", "V", "F", "V"],
-            ["F", "F", "F", "V"]
-          ],
-          "clasificacion": "Tautología"
-        }
+        # Procesos para el cálculo local costoso, arrancados en el primer uso
+        self._cpu_workers = CPU_WORKERS if cpu_workers is None else cpu_workers
+        self._cpu_pool = None
+        self._cpu_pool_lock = Lock()
 
-        Usa los siguientes símbolos en la fórmula del header:
-        - Conjunción: ∧
-        - Disyunción: ∨
-        - Negación: ¬
-        - Condicional: →
-        - Bicondicional: ↔
-        """
-
-    def _get_simplification_prompt(self):
-        """Define las instrucciones para que la IA simplifique una fórmula lógica."""
-        return """
-        Eres un experto en lógica proposicional y álgebra booleana. Tu tarea es simplificar una fórmula lógica dada, mostrando cada paso del proceso.
-
-        Sigue estas reglas estrictamente:
-        1.  Analiza la fórmula de entrada.
-        2.  Aplica las leyes de equivalencia lógica (De Morgan, distributiva, asociativa, negación, identidad, etc.) una por una para reducir la fórmula.
-        3.  El objetivo es obtener la fórmula lógicamente equivalente más corta.
-        4.  Devuelve el resultado en un formato JSON VÁLIDO, sin ningún texto adicional antes o después. El JSON debe tener dos claves: "pasos" y "formula_simplificada".
-            - "formula_simplificada": Un string con la expresión simbólica final.
-            - "pasos": Una lista de objetos, donde cada objeto representa un paso de la simplificación y tiene dos claves: "formula" y "regla".
-
-        Ejemplo 1:
-        Fórmula: "(P ∧ Q) ∨ (P ∧ ¬Q)"
-        Respuesta JSON:
-        {
-          "pasos": [
-            {
-              "formula": "(P ∧ Q) ∨ (P ∧ ¬Q)",
-              "regla": "Fórmula original"
-            },
-            {
-              "formula": "P ∧ (Q ∨ ¬Q)",
-              "regla": "Ley distributiva"
-            },
-            {
-              "formula": "P ∧ V",
-              "regla": "Ley de negación (Q ∨ ¬Q ≡ V)"
-            },
-            {
-              "formula": "P",
-              "regla": "Ley de identidad (P ∧ V ≡ P)"
-            }
-          ],
-          "formula_simplificada": "P"
-        }
+    def _get_session(self):
+        """Sesión de requests con reintentos y pool de conexiones (se crea al primer uso)."""
+        session = self._session
+        if session is not None:
+            return session
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
 
-        Usa los siguientes símbolos en la fórmula de salida:
-        - Conjunción: ∧
-        - Disyunción: ∨
-        - Negación: ¬
-        - Condicional: →
-        - Bicondicional: ↔
+                session = requests.Session()
+                # Solo se reintenta la conexión: un 429/5xx vuelve al momento para que
+                # el cortocircuito y el límite adaptativo vean cada señal de sobrecarga
+                retries = Retry(
+                    total=3,
+                    connect=3,
+                    read=False,
+                    status=False,
+                    other=False,
+                    backoff_factor=0.6,
+                    allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS']),
+                    respect_retry_after_header=False,
+                )
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries)
+                # Conexiones que se cierran al cancelar la tarea del pool que las usa
+                adapter.poolmanager.pool_classes_by_scheme = cancellable_pool_classes()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def _get_cpu_pool(self):
+        """Procesos de cálculo (con la lógica ya importada), o None si cpu_workers=0."""
+        if self._cpu_pool is None and self._cpu_workers > 0:
+            with self._cpu_pool_lock:
+                if self._cpu_pool is None:
+                    self._cpu_pool = ProcessPool(self._cpu_workers, preload=("model",))
+        return self._cpu_pool
+
+    def _calculo_local(self, task, fn, *args):
         """
+        Ejecuta fn(*args) en un proceso de cálculo con LIMITE_CALCULO_LOCAL
+        segundos como máximo, para que una fórmula patológica no bloquee los
+        hilos del worker. Devuelve (resultado, error).
+        """
+        pool = self._get_cpu_pool()
+        start = time.perf_counter()
+        result = "ok"
+        try:
+            if pool is None:
+                return fn(*args), None
+            return pool.run(fn, *args, timeout=LIMITE_CALCULO_LOCAL), None
+        except (TaskTimeout, WorkerCrashed) as e:
+            result = "timeout" if isinstance(e, TaskTimeout) else "crash"
+            logger.warning("Cálculo local de %s detenido: %s", task, e)
+            return None, f"El cálculo superó el límite de {LIMITE_CALCULO_LOCAL:g} s y se ha detenido. Prueba con una fórmula más pequeña."
+        except PoolBusy:
+            result = "busy"
+            return None, "Hay demasiados cálculos en curso. Por favor, inténtalo de nuevo en unos segundos."
+        except BudgetExceeded:
+            result = "indeterminada"
+            return None, "No se pudo decidir: la búsqueda SAT agotó su límite. Prueba con menos variables."
+        except RecursionError:
+            result = "error"
+            return None, "La fórmula está demasiado anidada para calcularla."
+        finally:
+            LOCAL_TASK_SECONDS.observe(time.perf_counter() - start, task=task, result=result)
 
     def _cache_key(self, prompt, params):
         key_raw = json.dumps({"p": prompt, "params": params}, sort_keys=True, ensure_ascii=False)
         return hashlib.sha256(key_raw.encode("utf-8")).hexdigest()
 
-    def _extract_json_substring(self, text):
-        """
-        Busca y extrae el primer bloque JSON válido dentro de text.
-        Retorna el string JSON o lanza JSONDecodeError.
-        """
-        # Intento rápido: búsqueda de bloque que empieza en { y termina en matching }
-        start = text.find('{')
-        if start == -1:
-            raise json.JSONDecodeError("No JSON start", text, 0)
-        # Intentar encontrar el final buscando el cierre balanceado
-        depth = 0
-        for i in range(start, len(text)):
-            ch = text[i]
-            if ch == '{':
-                depth += 1
-            elif ch == '}':
-                depth -= 1
-                if depth == 0:
-                    candidate = text[start:i+1]
-                    # validar parseo
-                    json.loads(candidate)
-                    return candidate
-        # última posibilidad: buscar con regex un bloque grande de JSON
-        m = re.search(r'(\{[\s\S]*\})', text)
-        if m:
-            candidate = m.group(1)
-            json.loads(candidate)
-            return candidate
-        raise json.JSONDecodeError("No se pudo extraer JSON válido", text, 0)
-
     def _send_gemini_request(self, payload, timeout=None):
         """
         Envia la petición a Gemini usando la session configurada.
@@ -267,102 +264,285 @@ class LogicaModelo:
             # La API soporta key en query param; usarlo por compatibilidad
             params["key"] = self.api_key
 
-        resp = self._session.post(self.api_base, headers=headers, json=payload, params=params, timeout=timeout)
+        started = self._admit()
+        try:
+            resp = self._get_session().post(self.api_base, headers=headers, json=payload, params=params, timeout=timeout)
+        except Exception as exc:
+            task = current_task()
+            if isinstance(exc, TaskCancelled) or (task is not None and task.cancel_requested):
+                # Nadie espera ya el resultado: no cuenta como fallo de la API
+                UPSTREAM_SECONDS.observe(time.monotonic() - started, status="cancelled")
+                self._settle(started, cancelled=True)
+                raise TaskCancelled("Llamada a Gemini cancelada") from exc
+            UPSTREAM_SECONDS.observe(time.monotonic() - started, status="error")
+            self._settle(started, error=True)
+            raise
+        UPSTREAM_SECONDS.observe(time.monotonic() - started, status=str(resp.status_code))
+        # El adaptador de urllib3 deja en la respuesta el historial de reintentos
+        retries = getattr(getattr(resp, "raw", None), "retries", None)
+        UPSTREAM_RETRIES.observe(len(retries.history) if retries is not None else 0)
+        self._settle(started, resp.status_code)
         resp.raise_for_status()
         return resp.json()
 
-    def _call_gemini_api(self, full_prompt, expect_json_response=False, generation_config_override=None, timeout_seconds=None):
+    def _admit(self):
         """
-        Llama a Gemini de forma segura y devuelve (data_dict, error_str).
-        Esta versión usa la session con retries, extrae JSON dentro del texto si es necesario y aplica generación config.
+        Reserva plaza para una llamada a Gemini o lanza UpstreamUnavailable si
+        el cortocircuito está abierto o se ha alcanzado el límite adaptativo.
         """
-        try:
-            gen_cfg = dict(self._default_generation_config)
-            if generation_config_override:
-                gen_cfg.update(generation_config_override)
+        if not self._limiter.try_acquire():
+            raise ConcurrencyLimitError("Límite de llamadas simultáneas a la IA alcanzado")
+        if not self._breaker.allow():
+            self._limiter.release(adjust=False)
+            raise CircuitOpenError("Cortocircuito abierto: la API de Gemini está fallando")
+        return time.monotonic()
+
+    def _settle(self, started, status=None, error=False, cancelled=False):
+        """Registra el resultado de la llamada en el cortocircuito y en el límite adaptativo."""
+        if cancelled:
+            self._breaker.release()
+            self._limiter.release(adjust=False)
+            return
+        overloaded = status in OVERLOAD_STATUS
+        failed = error or overloaded or (status is not None and status >= 500)
+        self._breaker.record(not failed, time.monotonic() - started)
+        self._limiter.release(overloaded)
+
+    def upstream_stats(self):
+        """Estado del cortocircuito y del límite adaptativo de llamadas a Gemini."""
+        return {"breaker": self._breaker.stats(), "limiter": self._limiter.stats()}
+
+    def _build_payload(self, full_prompt, expect_json_response=False, generation_config_override=None):
+        """
+        Cuerpo de la petición generateContent con la configuración de generación.
+        Un Prompt de una tarea envía sus instrucciones en systemInstruction (o la
+        caché de contexto de la tarea) y su presupuesto de salida; un texto se envía tal cual.
+        """
+        gen_cfg = dict(self._default_generation_config)
+        if isinstance(full_prompt, Prompt):
+            gen_cfg["maxOutputTokens"] = TOKEN_BUDGETS[full_prompt.task]["output"]
+        if generation_config_override:
+            gen_cfg.update(generation_config_override)
 
+        if not isinstance(full_prompt, Prompt):
+            payload = {"contents": [{"parts": [{"text": full_prompt}]}]}
+        elif full_prompt.task in self._cached_contents:
+            payload = {
+                "cachedContent": self._cached_contents[full_prompt.task],
+                "contents": [{"role": "user", "parts": [{"text": full_prompt.user}]}],
+            }
+        else:
             payload = {
-                "contents": [{"parts": [{"text": full_prompt}]}],
-                "generationConfig": gen_cfg
+                "systemInstruction": {"parts": [{"text": full_prompt.system}]},
+                "contents": [{"role": "user", "parts": [{"text": full_prompt.user}]}],
             }
-            if expect_json_response:
-                # el mime-type ayuda al modelo a devolver JSON cuando está soportado
-                payload["generationConfig"]["responseMimeType"] = "application/json"
+        payload["generationConfig"] = gen_cfg
+        if expect_json_response:
+            # el mime-type ayuda al modelo a devolver JSON cuando está soportado
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+        return payload
 
-            response_data = self._send_gemini_request(payload, timeout=(self._timeout[0], timeout_seconds or self._timeout[1]))
+    def _parse_gemini_response(self, response_data):
+        """
+        Extrae el JSON del texto del primer candidato.
+        Devuelve (data_dict, error_str).
+        """
+        # structure: response_data['candidates'][0]['content']['parts'][0]['text']
+        candidates = response_data.get('candidates') or []
+        if not candidates:
+            error_info = response_data.get('promptFeedback') or response_data.get('validation') or 'Sin detalles adicionales.'
+            logger.warning("Respuesta vacía de Gemini: %s", error_info)
+            return None, "La IA devolvió una respuesta vacía o bloqueada."
 
-            # structure: response_data['candidates'][0]['content']['parts'][0]['text']
-            candidates = response_data.get('candidates') or []
-            if not candidates:
-                error_info = response_data.get('promptFeedback') or response_data.get('validation') or 'Sin detalles adicionales.'
-                logger.warning("Respuesta vacía de Gemini: %s", error_info)
-                return None, "La IA devolvió una respuesta vacía o bloqueada."
+        raw_text = candidates[0].get('content', {}).get('parts', [])[0].get('text', '')
+        if not raw_text:
+            logger.warning("Texto vacío en candidato de Gemini.")
+            return None, "La IA devolvió una respuesta sin contenido."
 
-            raw_text = candidates[0].get('content', {}).get('parts', [])[0].get('text', '')
-            if not raw_text:
-                logger.warning("Texto vacío en candidato de Gemini.")
-                return None, "La IA devolvió una respuesta sin contenido."
+        # Un solo análisis desde la primera '{' o '[': el texto de alrededor (p. ej. un bloque ```json) se ignora
+        starts = [i for i in (raw_text.find('{'), raw_text.find('[')) if i != -1]
+        start = min(starts, default=-1)
+        try:
+            if start == -1:
+                raise json.JSONDecodeError("No JSON start", raw_text, 0)
+            return _JSON_DECODER.raw_decode(raw_text, start)[0], None
+        except (json.JSONDecodeError, ValueError) as jerr:
+            logger.exception("Error al parsear JSON devuelto por Gemini: %s", jerr)
+            return None, FORMAT_ERROR_MESSAGE
 
-            # Si el texto parece JSON limpio, parsear directo; si no, intentar extraer bloque JSON dentro del texto
-            try:
-                result = json.loads(raw_text)
-                return result, None
-            except (json.JSONDecodeError, ValueError):
-                try:
-                    json_sub = self._extract_json_substring(raw_text)
-                    result = json.loads(json_sub)
-                    return result, None
-                except (json.JSONDecodeError, ValueError) as jerr:
-                    logger.exception("Error al parsear JSON devuelto por Gemini: %s", jerr)
-                    return None, "La IA devolvió una respuesta en un formato inesperado. Inténtalo de nuevo."
-
-        except requests.exceptions.HTTPError as http_err:
+    def _http_error_message(self, status, response, exc):
+        """Mensaje para el usuario a partir de un error HTTP de Gemini."""
+        if status in (429, 503):
+            return "La IA está recibiendo muchas solicitudes en este momento. Por favor, espera y vuelve a intentarlo."
+        try:
+            error_details = response.json()
+            api_message = error_details.get('error', {}).get('message', str(exc))
+        except Exception:
+            api_message = str(exc)
+        return f"Error de la API de Gemini: {api_message}"
+
+    def _call_gemini_api(self, full_prompt, expect_json_response=False, generation_config_override=None, timeout_seconds=None):
+        """
+        Llama a Gemini de forma segura y devuelve (data_dict, error_str).
+        Esta versión usa la session con retries, extrae JSON dentro del texto si es necesario y aplica generación config.
+        """
+        from requests.exceptions import HTTPError
+
+        try:
+            payload = self._build_payload(full_prompt, expect_json_response, generation_config_override)
+            response_data = self._send_gemini_request(payload, timeout=(self._timeout[0], timeout_seconds or self._timeout[1]))
+            self._token_usage.record(getattr(full_prompt, "task", None), response_data.get("usageMetadata"))
+            with PARSE_SECONDS.time():
+                return self._parse_gemini_response(response_data)
+
+        except UpstreamUnavailable as e:
+            logger.warning("Llamada a Gemini rechazada: %s", e)
+            return None, UNAVAILABLE_MESSAGE
+        except TaskCancelled:
+            logger.info("Llamada a Gemini cancelada: ningún llamante espera el resultado")
+            return None, "Llamada a la IA cancelada."
+        except HTTPError as http_err:
             status = getattr(http_err.response, "status_code", None)
             logger.exception("HTTP error calling Gemini: %s", http_err)
-            if status in (429, 503):
-                msg = "La IA está recibiendo muchas solicitudes en este momento. Por favor, espera y vuelve a intentarlo."
-                return None, msg
-            try:
-                error_details = http_err.response.json()
-                api_message = error_details.get('error', {}).get('message', str(http_err))
-            except Exception:
-                api_message = str(http_err)
-            return None, f"Error de la API de Gemini: {api_message}"
+            return None, self._http_error_message(status, http_err.response, http_err)
         except Exception as e:
             logger.exception("Error inesperado al llamar a Gemini: %s", e)
             return None, f"No se pudo procesar la petición con la IA. Error: {e}"
 
-    def _request_with_cache_and_timeout(self, prompt, expect_json_response=False, timeout_seconds=20, use_cache=True, generation_config_override=None):
+    def _submit_api_call(self, cache_key, prompt, expect_json_response=False, generation_config_override=None, timeout_seconds=20, use_cache=True, priority=INTERACTIVA):
         """
-        Coordinador: verifica caché, ejecuta la llamada en un hilo y aplica timeout.
+        Envía la llamada a Gemini al pool de hilos y devuelve el future (o lanza
+        QueueFullError). Con caché activa, las llamadas idénticas concurrentes
+        (misma cache_key) comparten un único future (single-flight) y el
+        resultado se guarda en caché dentro de la propia tarea, aunque el primer
+        llamante ya no espere; la llamada se cancela cuando no espera nadie.
+        """
+        def task():
+            data, error = self._call_gemini_api(prompt, expect_json_response, generation_config_override, timeout_seconds)
+            if data is not None and use_cache:
+                try:
+                    self._cache.set(cache_key, data)
+                except Exception:
+                    logger.exception("Fallo al escribir en cache")
+            return data, error
+
+        if not use_cache:
+            return self._submit(task, priority=priority)
+        future, leader = self._inflight.join(cache_key, lambda: self._submit(task, priority=priority))
+        if not leader:
+            logger.debug("Petición idéntica en vuelo; se espera su resultado")
+        return future
+
+    def _submit(self, fn, *args, priority=INTERACTIVA):
+        """
+        Envía fn(*args) al pool de hilos con la prioridad dada, midiendo la
+        espera en cola; lanza QueueFullError si la cola de esa prioridad está
+        llena. La tarea se ejecuta en una copia del contexto para que sus
+        tiempos cuenten en la petición.
+        """
+        submitted = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def run():
+            QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted, priority=PRIORIDADES[priority])
+            return fn(*args)
+
+        return self._executor.submit(context.run, run, priority=priority)
+
+    def _cache_get(self, key):
+        start = time.perf_counter()
+        value = self._cache.get(key)
+        CACHE_LOOKUP_SECONDS.observe(time.perf_counter() - start, result="miss" if value is None else "hit")
+        return value
+
+    def collect_metrics(self):
+        """Valores instantáneos para /metrics: cachés, llamadas en vuelo y estado de la API."""
+        cache_stats = self._cache.stats()
+        tiers = cache_stats.items() if "l1" in cache_stats else [("l1", cache_stats)]
+        breaker = self._breaker.stats()
+        limiter = self._limiter.stats()
+        local = self._local_results.stats()
+        executor = self._executor.stats()
+        gauges = [
+            ("logica_cache_hit_ratio", "Proporción de aciertos de la caché de respuestas de la IA",
+             [({"tier": tier}, stats["hit_ratio"]) for tier, stats in tiers]
+             + [({"tier": "local"}, local["hit_ratio"])]),
+            ("logica_cache_entries", "Entradas en la caché",
+             [({"tier": tier}, stats["size"]) for tier, stats in tiers]
+             + [({"tier": "local"}, local["size"])]),
+            ("logica_executor_queue_depth", "Tareas esperando en el pool de hilos",
+             [({"priority": name}, n) for name, n in executor["queued"].items()]),
+            ("logica_executor_running", "Tareas en ejecución en el pool de hilos", [({}, executor["running"])]),
+            ("logica_inflight_requests", "Llamadas distintas a la IA en vuelo (single-flight)",
+             [({}, len(self._inflight))]),
+            ("logica_upstream_inflight", "Llamadas a Gemini en curso", [({}, limiter["inflight"])]),
+            ("logica_upstream_concurrency_limit", "Límite adaptativo de llamadas a Gemini", [({}, limiter["limit"])]),
+            ("logica_circuit_open", "1 si el cortocircuito de Gemini está abierto",
+             [({"state": breaker["state"]}, 1 if breaker["state"] == "abierto" else 0)]),
+        ]
+        if self._cpu_pool is not None:
+            pool = self._cpu_pool.stats()
+            gauges.append(("logica_cpu_workers", "Procesos de cálculo local: total y libres",
+                           [({"state": "total"}, pool["processes"]), ({"state": "idle"}, pool["idle"])]))
+        prefetch = self.prefetch_stats()
+        if prefetch is not None:
+            gauges.append(("logica_prefetch_tasks", "Tareas de precálculo por resultado",
+                           [({"result": name}, prefetch[name]) for name in ("scheduled", "completed", "dropped", "skipped_busy", "failed")]))
+            gauges.append(("logica_prefetch_results", "Resultados precalculados: usados, desperdiciados o aún sin usar",
+                           [({"result": name}, prefetch[name]) for name in ("hits", "wasted", "unused")]))
+        return gauges
+
+    def _abandon(self, future, use_cache):
+        """
+        El llamante deja de esperar: si nadie más espera el future se cancela,
+        y si ya estaba en curso se corta su petición HTTP y se libera el hilo.
+        """
+        if not use_cache or self._inflight.leave(future):
+            future.cancel()
+
+    def _request_with_cache_and_timeout(self, prompt, expect_json_response=False, timeout_seconds=20, use_cache=True, generation_config_override=None, priority=INTERACTIVA):
+        """
+        Coordinador: verifica caché, ejecuta la llamada en un hilo (agrupando
+        peticiones idénticas en vuelo) y aplica timeout.
         Retorna (data, error)
         """
+        if isinstance(prompt, Prompt) and prompt.over_budget():
+            return None, self._budget_error(prompt)
         cache_key = self._cache_key(prompt, {"json": expect_json_response, "gen_cfg": generation_config_override or {}})
         if use_cache:
-            cached = self._cache.get(cache_key)
+            cached = self._cache_get(cache_key)
             if cached is not None:
                 logger.debug("Cache hit para prompt")
                 return cached, None
+        if self._breaker.is_open():
+            # Sin ocupar un hilo ni esperar el timeout mientras la API está caída
+            return None, UNAVAILABLE_MESSAGE
 
-        future = self._executor.submit(self._call_gemini_api, prompt, expect_json_response, generation_config_override, timeout_seconds)
+        try:
+            future = self._submit_api_call(cache_key, prompt, expect_json_response, generation_config_override, timeout_seconds, use_cache, priority)
+        except QueueFullError as e:
+            # Rechazo inmediato: encolarla solo serviría para agotar el timeout
+            logger.warning("Llamada a IA rechazada: %s", e)
+            return None, BUSY_MESSAGE
         try:
             data, error = future.result(timeout=timeout_seconds + 2)  # pequeño margen
         except FutureTimeoutError:
-            future.cancel()
+            self._abandon(future, use_cache)
             logger.warning("Llamada a IA excedió timeout de %s s", timeout_seconds)
             return None, f"Tiempo de espera agotado ({timeout_seconds}s) al consultar la IA."
         except Exception as e:
             logger.exception("Error en ejecución de hilo para llamada IA: %s", e)
             return None, f"Error interno al consultar la IA: {e}"
 
-        if data is not None and use_cache:
-            try:
-                self._cache.set(cache_key, data)
-            except Exception:
-                logger.exception("Fallo al escribir en cache")
-
         return data, error
 
+    def _budget_error(self, prompt):
+        return f"La entrada es demasiado larga ({prompt.input_tokens} tokens aprox.; máximo {TOKEN_BUDGETS[prompt.task]['input']})."
+
+    def token_usage(self):
+        """Tokens de entrada/salida consumidos por tarea, según Gemini."""
+        return self._token_usage.stats()
+
     def procesar_con_ia(self, texto, timeout_seconds=18, use_cache=True):
         """
         Usa un modelo de IA para procesar el texto.
@@ -371,9 +551,20 @@ class LogicaModelo:
         if not self.api_key:
             return None, None, "Error de configuración: La clave de API de Google no está definida."
 
-        full_prompt = self._get_system_prompt() + "\nOración: \"" + texto + "\"\nRespuesta JSON:"
-        data, error = self._request_with_cache_and_timeout(full_prompt, expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+        result = self._procesar_oracion(texto, timeout_seconds, use_cache, INTERACTIVA)
+        if self._prefetcher is not None and result[0]:
+            self._prefetch_followups(result[0])
+        return result
 
+    def _procesar_oracion(self, texto, timeout_seconds, use_cache, priority):
+        data, error = self._request_with_cache_and_timeout(self._sentence_prompt(texto), expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache, priority=priority)
+        return self._formula_result(data, error)
+
+    def _sentence_prompt(self, texto):
+        return build_prompt(TAREA_ORACION, texto=texto)
+
+    def _formula_result(self, data, error):
+        """Valida la respuesta de la IA para la conversión de oraciones."""
         if error:
             return None, None, error
 
@@ -387,15 +578,169 @@ class LogicaModelo:
 
     def generar_tabla_verdad(self, formula_str, timeout_seconds=22, use_cache=True):
         """
-        Genera una tabla de verdad para una fórmula simbólica dada usando IA.
+        Genera una tabla de verdad para una fórmula simbólica dada.
+        Se calcula localmente; solo si la notación no se reconoce se recurre a la IA.
+        Devuelve: (header, rows, clasificacion, error)
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError as e:
+            if not self.api_key:
+                return None, None, None, f"Fórmula no válida: {e}."
+            logger.debug("Fórmula no reconocida localmente (%s); se consulta a la IA", e)
+            return self._generar_tabla_verdad_ia(formula_str, timeout_seconds=timeout_seconds, use_cache=use_cache)
+
+        return self._tabla_local(formula)
+
+    def _local_result(self, key):
+        """Resultado local en caché; si lo dejó un precálculo, cuenta como acierto."""
+        cached = self._local_results.get(key)
+        if cached is not None and self._prefetcher is not None:
+            self._prefetcher.consumed(key)
+        return cached
+
+    # --- Precálculo de las operaciones siguientes ---
+
+    def _foreground_busy(self):
+        """
+        True si el pool de la IA o los procesos de cálculo local están saturados
+        (hora punta): el precálculo espera a otra ocasión.
+        """
+        executor = self._executor.stats()
+        if any(executor["queued"].values()) or executor["running"] >= executor["max_workers"]:
+            return True
+        if self._cpu_pool is not None:
+            pool = self._cpu_pool.stats()
+            return pool["idle"] == 0 or pool["waiting"] > 0
+        return False
+
+    def _prefetch_followups(self, formula_str):
+        """Encola la tabla de verdad y la simplificación de la fórmula que se acaba de obtener."""
+        self._prefetcher.schedule(canonical_text(formula_str), lambda: self._run_prefetch(formula_str))
+
+    def _run_prefetch(self, formula_str):
+        """
+        Tarea de precálculo: solo cálculo local (no se gasta cuota de la IA en
+        especulaciones). Devuelve las claves que ha añadido a la caché.
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError:
+            return []
+        if len(variables(formula)) > MAX_VARIABLES_PREFETCH:
+            return []
+        (canonica,), _ = canonicalize(formula)
+        produced = []
+        for key, compute in ((("tabla", canonica), self._tabla_resumen), (("simplificacion", canonica), self._simplificacion_local)):
+            if self._local_results.get(key) is None:
+                compute(formula)
+                if self._local_results.get(key) is not None:
+                    produced.append(key)
+        return produced
+
+    def prefetch_stats(self):
+        """Contadores del precálculo (aciertos, desperdicio, descartes) o None si está desactivado."""
+        return self._prefetcher.stats() if self._prefetcher is not None else None
+
+    def _tabla_resumen(self, formula):
+        """
+        Cabecera y clasificación de la tabla, con caché por forma canónica. Se
+        guardan las sub-fórmulas y la clasificación, no las filas: ocupan lo
+        mismo con 2 variables que con 12.
+        Devuelve: (canonica, header, clasificacion)
+        """
+        (canonica,), names = canonicalize(formula)
+        key = ("tabla", canonica)
+        cached = self._local_result(key)
+        if cached is None:
+            cached = (table_columns(canonica)[1], classify_formula(canonica))
+            self._local_results.set(key, cached)
+        # Las filas no dependen de los nombres; la cabecera se traduce a los del usuario
+        columns, clasificacion = cached
+        header = names + [to_str(restore(c, names)) for c in columns]
+        return canonica, header, clasificacion
+
+    def _tabla_local(self, formula):
+        n_vars = len(variables(formula))
+        if n_vars > MAX_VARIABLES_TABLA:
+            return None, None, None, f"La fórmula tiene {n_vars} variables; el máximo para mostrar la tabla es {MAX_VARIABLES_TABLA}."
+        canonica, header, clasificacion = self._tabla_resumen(formula)
+        return header, list(iter_rows(canonica)), clasificacion, None
+
+    def tabla_verdad_paginada(self, formula_str, desde=0, filas=FILAS_POR_PAGINA, timeout_seconds=22, use_cache=True):
+        """
+        Como generar_tabla_verdad, pero las filas [desde, desde+filas) se
+        devuelven como un generador que las calcula por bloques, sin evaluar
+        las anteriores ni guardar la tabla completa en memoria.
+        Devuelve: (header, rows, clasificacion, total_filas, error)
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError:
+            header, rows, clasificacion, error = self.generar_tabla_verdad(formula_str, timeout_seconds=timeout_seconds, use_cache=use_cache)
+            if error:
+                return None, None, None, 0, error
+            return header, iter(rows[desde:desde + filas]), clasificacion, len(rows), None
+
+        n_vars = len(variables(formula))
+        if n_vars <= MAX_VARIABLES_TABLA:
+            # Tablas pequeñas: cabecera y clasificación en la caché de resultados locales (la que rellena el precálculo)
+            canonica, header, clasificacion = self._tabla_resumen(formula)
+            return header, iter_rows(canonica, desde, desde + filas), clasificacion, 1 << n_vars, None
+        if n_vars > MAX_VARIABLES_PAGINADA:
+            return None, None, None, 0, f"La fórmula tiene {n_vars} variables; el máximo para mostrar la tabla es {MAX_VARIABLES_PAGINADA}."
+        clasificacion, error = self._clasificacion_local(formula)
+        if error:
+            return None, None, None, 0, error
+        _, _, header = table_columns(formula)
+        return header, iter_rows(formula, desde, desde + filas), clasificacion, 1 << n_vars, None
+
+    def _clasificacion_local(self, formula):
+        """
+        classify_formula con caché por forma canónica, calculada en un proceso
+        de cálculo: con muchas variables son búsquedas SAT que pueden alargarse.
+        Devuelve: (clasificacion, error)
+        """
+        (canonica,), _ = canonicalize(formula)
+        key = ("clasificacion", canonica)
+        clasificacion = self._local_results.get(key)
+        if clasificacion is None:
+            clasificacion, error = self._calculo_local("clasificacion", _classify_text, to_str(canonica))
+            if error:
+                return None, error
+            self._local_results.set(key, clasificacion)
+        return clasificacion, None
+
+    def exportar_tabla_verdad(self, formula_str):
+        """
+        Tabla completa para descargar, calculada localmente y fila a fila.
+        Devuelve: (header, rows, error)
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError as e:
+            return None, None, f"Fórmula no válida: {e}."
+        names, _, header = table_columns(formula)
+        if len(names) > MAX_VARIABLES_DESCARGA:
+            return None, None, f"La fórmula tiene {len(names)} variables; el máximo para descargar la tabla es {MAX_VARIABLES_DESCARGA}."
+        return header, iter_rows(formula), None
+
+    def _generar_tabla_verdad_ia(self, formula_str, timeout_seconds=22, use_cache=True):
+        """
+        Genera una tabla de verdad usando IA (para notaciones que el analizador local no reconoce).
         Devuelve: (header, rows, clasificacion, error)
         """
         if not self.api_key:
             return None, None, None, "Error de configuración: La clave de API de Google no está definida."
 
-        full_prompt = self._get_truth_table_prompt() + "\nFórmula: \"" + formula_str + "\"\nRespuesta JSON:"
-        data, error = self._request_with_cache_and_timeout(full_prompt, expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+        data, error = self._request_with_cache_and_timeout(self._truth_table_ai_prompt(formula_str), expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+        return self._tabla_result(data, error)
+
+    def _truth_table_ai_prompt(self, formula_str):
+        return build_prompt(TAREA_TABLA, formula=canonical_text(formula_str))
 
+    def _tabla_result(self, data, error):
+        """Valida la respuesta de la IA para la tabla de verdad."""
         if error:
             return None, None, None, error
 
@@ -408,17 +753,109 @@ class LogicaModelo:
 
         return header, rows, clasificacion, None
 
+    def verificar_equivalencia(self, formula_a, formula_b, timeout_seconds=22, use_cache=True):
+        """
+        Verifica si dos fórmulas son lógicamente equivalentes.
+        Se decide localmente (columnas bit-paralelas o SAT sobre ¬(A ↔ B));
+        solo si la notación no se reconoce se recurre a la IA con el bicondicional.
+        Devuelve: (equivalentes, contraejemplo, error)
+        contraejemplo es una fila {variable: 'V'/'F', ...} donde difieren, o None.
+        """
+        try:
+            a = parse_formula(formula_a)
+            b = parse_formula(formula_b)
+        except FormulaError as e:
+            if not self.api_key:
+                return None, None, f"Fórmula no válida: {e}."
+            formula_bicondicional = f"({canonical_text(formula_a)}) \u2194 ({canonical_text(formula_b)})"
+            _, _, clasificacion, error = self._generar_tabla_verdad_ia(formula_bicondicional, timeout_seconds=timeout_seconds, use_cache=use_cache)
+            if error:
+                return None, None, error
+            return clasificacion == TAUTOLOGIA, None, None
+
+        equivalentes, asignacion, error = self._equivalencia_local(a, b)
+        if error:
+            return None, None, error
+        if equivalentes:
+            return True, None, None
+
+        contraejemplo = {name: 'V' if value else 'F' for name, value in asignacion.items()}
+        contraejemplo['Fórmula A'] = 'V' if evaluate(a, asignacion) else 'F'
+        contraejemplo['Fórmula B'] = 'V' if evaluate(b, asignacion) else 'F'
+        return False, contraejemplo, None
+
+    def _equivalencia_local(self, a, b):
+        """
+        check_equivalence con caché por forma canónica (conmutativa y sin orden
+        entre A y B), calculada en un proceso de cálculo.
+        Devuelve: (equivalentes, asignacion, error)
+        """
+        (ca, cb), names = canonicalize(a, b, commutative=True)
+        if len(names) > MAX_VARIABLES_EQUIVALENCIA:
+            return None, None, f"Las fórmulas tienen {len(names)} variables; el máximo para comparar es {MAX_VARIABLES_EQUIVALENCIA}."
+        text_a, text_b = to_str(ca), to_str(cb)
+        if text_b < text_a:
+            ca, cb = cb, ca
+            text_a, text_b = text_b, text_a
+        key = ("equivalencia", ca, cb)
+        cached = self._local_results.get(key)
+        if cached is None:
+            cached, error = self._calculo_local("equivalencia", _check_equivalence_text, text_a, text_b)
+            if error:
+                return None, None, error
+            self._local_results.set(key, cached)
+        equivalentes, asignacion = cached
+        if equivalentes:
+            return True, None, None
+        return False, {names[int(var[1:])]: value for var, value in asignacion.items()}, None
+
     def simplificar_formula(self, formula_str, timeout_seconds=20, use_cache=True):
         """
-        Simplifica una fórmula lógica usando IA.
+        Simplifica una fórmula lógica.
+        Se calcula localmente (leyes de equivalencia + Quine–McCluskey/Espresso);
+        solo si la notación no se reconoce se recurre a la IA.
+        Devuelve: (pasos, formula_simplificada, error)
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError as e:
+            if not self.api_key:
+                return None, None, f"Fórmula no válida: {e}."
+            logger.debug("Fórmula no reconocida localmente (%s); se consulta a la IA", e)
+            return self._simplificar_formula_ia(formula_str, timeout_seconds=timeout_seconds, use_cache=use_cache)
+
+        return self._simplificacion_local(formula)
+
+    def _simplificacion_local(self, formula):
+        (canonica,), names = canonicalize(formula)
+        if len(names) > MAX_VARIABLES_SIMPLIFICACION:
+            return None, None, f"La fórmula tiene {len(names)} variables; el máximo para simplificarla es {MAX_VARIABLES_SIMPLIFICACION}."
+        key = ("simplificacion", canonica)
+        pasos = self._local_result(key)
+        if pasos is None:
+            pasos, error = self._calculo_local("simplificacion", _simplify_steps, to_str(canonica))
+            if error:
+                return None, None, error
+            self._local_results.set(key, pasos)
+        pasos = [{"formula": to_str(restore(parse_formula(p["formula"]), names)), "regla": p["regla"]} for p in pasos]
+        return pasos, pasos[-1]["formula"], None
+
+    def _simplificar_formula_ia(self, formula_str, timeout_seconds=20, use_cache=True):
+        """
+        Simplifica una fórmula lógica usando IA (para notaciones que el analizador local no reconoce).
         Devuelve: (pasos, formula_simplificada, error)
         """
         if not self.api_key:
             return None, None, "Error de configuración: La clave de API de Google no está definida."
 
-        full_prompt = self._get_simplification_prompt() + "\nFórmula: \"" + formula_str + "\"\nRespuesta JSON:"
-        data, error = self._request_with_cache_and_timeout(full_prompt, expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+        data, error = self._request_with_cache_and_timeout(self._simplification_ai_prompt(formula_str), expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+        return self._simplificacion_result(data, error)
+
+    def _simplification_ai_prompt(self, formula_str):
+        return build_prompt(TAREA_SIMPLIFICACION, formula=canonical_text(formula_str))
 
+    def _simplificacion_result(self, data, error):
+        """Valida la respuesta de la IA para la simplificación."""
         if error:
             return None, None, error
 
@@ -438,16 +875,18 @@ class LogicaModelo:
         cache_key = self._cache_key(prompt, params)
 
         if use_cache:
-            cached = self._cache.get(cache_key)
+            cached = self._cache_get(cache_key)
             if cached is not None:
                 logger.debug("Cache hit for prompt")
                 return cached
+        if self._breaker.is_open():
+            raise CircuitOpenError(UNAVAILABLE_MESSAGE)
 
-        future = self._executor.submit(self._call_gemini_api, prompt, False, None, timeout_seconds)
+        future = self._submit_api_call(cache_key, prompt, timeout_seconds=timeout_seconds, use_cache=use_cache)  # QueueFullError si la cola está llena
         try:
             result, error = future.result(timeout=timeout_seconds + 2)
         except FutureTimeoutError:
-            future.cancel()
+            self._abandon(future, use_cache)
             logger.warning("AI call timed out after %s seconds", timeout_seconds)
             raise TimeoutError(f"AI call timed out after {timeout_seconds}s")
         except Exception as e:
@@ -458,18 +897,474 @@ class LogicaModelo:
             logger.warning("AI returned error: %s", error)
             raise RuntimeError(error)
 
-        if use_cache and result is not None:
+        return result
+
+    # --- Respuestas en streaming (streamGenerateContent) ---
+
+    def _stream_url(self):
+        return self.api_base.replace(":generateContent", ":streamGenerateContent")
+
+    def _stream_gemini(self, prompt, stream_keys, timeout_seconds=20, use_cache=True):
+        """
+        Llama a streamGenerateContent (SSE) y genera eventos según llega el texto:
+        ("valor", clave, valor) y ("elemento", clave, elemento) del analizador
+        incremental (ver json_stream.py) y al final ("resultado", datos) o
+        ("error", mensaje). El resultado se guarda en la misma caché que la
+        llamada sin streaming; un acierto se reproduce como los mismos eventos.
+        """
+        if prompt.over_budget():
+            yield ("error", self._budget_error(prompt))
+            return
+        cache_key = self._cache_key(prompt, {"json": True, "gen_cfg": {}})
+        if use_cache:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                yield from _replay(cached, stream_keys)
+                yield ("resultado", cached)
+                return
+        if self._breaker.is_open():
+            yield ("error", UNAVAILABLE_MESSAGE)
+            return
+
+        from requests.exceptions import HTTPError
+
+        params = {"alt": "sse"}
+        if self.api_key:
+            params["key"] = self.api_key
+        payload = self._build_payload(prompt, expect_json_response=True)
+        parser = IncrementalJSONParser(stream_keys)
+        deadline = time.monotonic() + timeout_seconds
+        try:
+            started = self._admit()
+        except UpstreamUnavailable as e:
+            logger.warning("Llamada a Gemini rechazada: %s", e)
+            yield ("error", UNAVAILABLE_MESSAGE)
+            return
+        settled = False
+        resp = None
+        try:
             try:
-                self._cache.set(cache_key, result)
+                resp = self._get_session().post(self._stream_url(), headers={"Content-Type": "application/json"},
+                                                json=payload, params=params, stream=True,
+                                                timeout=(self._timeout[0], timeout_seconds))
             except Exception:
-                logger.exception("Failed to set cache")
+                UPSTREAM_SECONDS.observe(time.monotonic() - started, status="error")
+                settled = True
+                self._settle(started, error=True)
+                raise
+            # La latencia del histograma es la de las cabeceras; el cortocircuito espera al flujo completo
+            UPSTREAM_SECONDS.observe(time.monotonic() - started, status=str(resp.status_code))
+            if resp.status_code >= 400:
+                settled = True
+                self._settle(started, resp.status_code)
+                resp.raise_for_status()
 
-        return result
+            usage = None
+            for chunk in iter_sse_data(resp.iter_lines()):
+                usage = chunk.get("usageMetadata") or usage
+                with PARSE_SECONDS.time():
+                    events = parser.feed(_chunk_text(chunk))
+                yield from events
+                if time.monotonic() > deadline:
+                    logger.warning("Streaming de la IA excedió timeout de %s s", timeout_seconds)
+                    settled = True
+                    self._settle(started, error=True)
+                    yield ("error", f"Tiempo de espera agotado ({timeout_seconds}s) al consultar la IA.")
+                    return
+            settled = True
+            self._settle(started, resp.status_code)
+            self._token_usage.record(prompt.task, usage)
+            data = parser.close()
+        except HTTPError as http_err:
+            logger.exception("HTTP error calling Gemini: %s", http_err)
+            yield ("error", self._http_error_message(getattr(http_err.response, "status_code", None), http_err.response, http_err))
+            return
+        except (json.JSONDecodeError, ValueError) as jerr:
+            # El flujo llegó, pero su contenido no es el JSON esperado: no es un fallo de Gemini
+            if not settled:
+                settled = True
+                self._settle(started, resp.status_code)
+            logger.exception("Error al parsear el streaming de Gemini: %s", jerr)
+            yield ("error", FORMAT_ERROR_MESSAGE)
+            return
+        except Exception as e:
+            # El flujo se cortó a medias (conexión, lectura...): cuenta como fallo
+            if not settled and not isinstance(e, TaskCancelled):
+                settled = True
+                self._settle(started, error=True)
+            logger.exception("Error inesperado en el streaming de Gemini: %s", e)
+            yield ("error", f"No se pudo procesar la petición con la IA. Error: {e}")
+            return
+        finally:
+            # El cliente abandonó el flujo (GeneratorExit) o se canceló la tarea
+            if not settled:
+                self._settle(started, cancelled=True)
+            if resp is not None:
+                resp.close()
+
+        if use_cache:
+            self._cache.set(cache_key, data)
+        yield ("resultado", data)
+
+    def _stream_ai_result(self, prompt, stream_keys, validate, timeout_seconds, use_cache):
+        """Eventos de _stream_gemini; el resultado final se valida y se sustituye por ("fin", None)."""
+        for event in self._stream_gemini(prompt, stream_keys, timeout_seconds, use_cache):
+            if event[0] != "resultado":
+                yield event
+                continue
+            error = validate(event[1], None)[-1]
+            yield ("error", error) if error else ("fin", None)
+
+    def generar_tabla_verdad_stream(self, formula_str, timeout_seconds=22, use_cache=True):
+        """
+        Versión en streaming de generar_tabla_verdad. Genera ("valor", "header", ...),
+        ("elemento", "rows", fila) por cada fila, ("valor", "clasificacion", ...) y
+        al final ("fin", None), o ("error", mensaje). Con la IA cada fila se
+        entrega en cuanto el modelo termina de escribirla.
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError as e:
+            if not self.api_key:
+                yield ("error", f"Fórmula no válida: {e}.")
+                return
+            yield from self._stream_ai_result(self._truth_table_ai_prompt(formula_str), ("rows",), self._tabla_result, timeout_seconds, use_cache)
+            return
+
+        header, rows, clasificacion, error = self._tabla_local(formula)
+        if error:
+            yield ("error", error)
+            return
+        yield from _replay({"header": header, "rows": rows, "clasificacion": clasificacion}, ("rows",))
+        yield ("fin", None)
+
+    def simplificar_formula_stream(self, formula_str, timeout_seconds=20, use_cache=True):
+        """
+        Versión en streaming de simplificar_formula: ("elemento", "pasos", paso) por
+        cada paso, ("valor", "formula_simplificada", ...) y ("fin", None), o ("error", mensaje).
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError as e:
+            if not self.api_key:
+                yield ("error", f"Fórmula no válida: {e}.")
+                return
+            yield from self._stream_ai_result(self._simplification_ai_prompt(formula_str), ("pasos",), self._simplificacion_result, timeout_seconds, use_cache)
+            return
+
+        pasos, formula_simplificada, error = self._simplificacion_local(formula)
+        if error:
+            yield ("error", error)
+            return
+        yield from _replay({"pasos": pasos, "formula_simplificada": formula_simplificada}, ("pasos",))
+        yield ("fin", None)
+
+    # --- Procesamiento por lotes ---
+
+    def procesar_lote(self, items, tipo=LOTE_ORACIONES, timeout_seconds=30, use_cache=True):
+        """
+        Procesa una lista de oraciones o fórmulas de una vez.
+        - oraciones: los aciertos de caché se sirven al momento; los fallos se
+          agrupan en el menor número de prompts posible (ITEMS_POR_PROMPT por
+          llamada, en paralelo) y lo que no se resuelva así se pide de uno en uno.
+        - tablas / simplificaciones: se calculan localmente y en paralelo, con
+          un único plazo de timeout_seconds para todo el lote; las tablas
+          suman como mucho MAX_FILAS_LOTE filas.
+        Devuelve: (resultados, error). resultados tiene un dict por elemento,
+        en el mismo orden, cada uno con su propia clave "error".
+        """
+        if not isinstance(items, (list, tuple)) or not all(isinstance(i, str) for i in items):
+            return None, "El lote debe ser una lista de textos."
+        if len(items) > MAX_ITEMS_LOTE:
+            return None, f"El lote tiene {len(items)} elementos; el máximo es {MAX_ITEMS_LOTE}."
+
+        if tipo == LOTE_ORACIONES:
+            return self._lote_oraciones(items, timeout_seconds, use_cache), None
+        if tipo == LOTE_TABLAS:
+            campos = ("header", "rows", "clasificacion")
+            metodo = self.generar_tabla_verdad
+        elif tipo == LOTE_SIMPLIFICACIONES:
+            campos = ("pasos", "formula_simplificada")
+            metodo = self.simplificar_formula
+        else:
+            return None, f"Tipo de lote desconocido: {tipo}."
+
+        unique = list(dict.fromkeys(items))
+        hechos = self._lote_filas_excedidas(unique) if tipo == LOTE_TABLAS else {}
+        pendientes = [t for t in unique if t not in hechos]
+        if pendientes:
+            # Los procesos de cálculo marcan el paralelismo útil: más hilos solo esperarían proceso libre
+            fan_out = ThreadPoolExecutor(max_workers=min(8, len(pendientes), self._cpu_workers or 8))
+            try:
+                futures = {fan_out.submit(metodo, t, timeout_seconds=timeout_seconds, use_cache=use_cache): t for t in pendientes}
+                done, not_done = wait(futures, timeout=timeout_seconds)
+            finally:
+                fan_out.shutdown(wait=False, cancel_futures=True)
+            for future in done:
+                try:
+                    *valores, error = future.result()
+                except Exception as e:
+                    logger.exception("Error al procesar un elemento del lote")
+                    valores, error = [], f"Error interno al procesar el elemento: {e}"
+                hechos[futures[future]] = (valores, error)
+            for future in not_done:
+                hechos[futures[future]] = ([], f"Tiempo de espera agotado ({timeout_seconds}s) al procesar el lote.")
+
+        resultados = []
+        for item in items:
+            valores, error = hechos[item]
+            resultado = dict.fromkeys(campos)
+            resultado.update(zip(campos, valores))
+            resultados.append({"entrada": item, "error": error, **resultado})
+        return resultados, None
+
+    def _lote_filas_excedidas(self, items):
+        """
+        Errores de las tablas del lote que ya no caben en MAX_FILAS_LOTE, por
+        orden de llegada: esas se deben pedir por separado.
+        """
+        filas = 0
+        excedidas = {}
+        for item in items:
+            try:
+                n_vars = len(variables(parse_formula(item)))
+            except FormulaError:
+                continue  # la tabla la genera la IA, con su propio límite de tamaño
+            if n_vars > MAX_VARIABLES_TABLA:
+                continue  # _tabla_local devuelve su propio error
+            if filas + (1 << n_vars) > MAX_FILAS_LOTE:
+                excedidas[item] = ([], f"El lote supera el máximo de {MAX_FILAS_LOTE} filas en total; pide esta tabla por separado.")
+            else:
+                filas += 1 << n_vars
+        return excedidas
+
+    def _lote_oraciones(self, items, timeout_seconds, use_cache):
+        if not self.api_key:
+            error = "Error de configuración: La clave de API de Google no está definida."
+            return [{"entrada": t, "formula": None, "leyenda": None, "error": error} for t in items]
+
+        unique = list(dict.fromkeys(items))
+        keys = {t: self._cache_key(self._sentence_prompt(t), {"json": True, "gen_cfg": {}}) for t in unique}
+        hechos = {}
+        pendientes = []
+        for texto in unique:
+            cached = self._cache_get(keys[texto]) if use_cache else None
+            if cached is not None:
+                hechos[texto] = self._formula_result(cached, None)
+            else:
+                pendientes.append(texto)
+
+        # Fallos agrupados: varias oraciones por prompt, todos los prompts en paralelo,
+        # con prioridad LOTE para no retrasar las peticiones interactivas
+        grupos = [pendientes[i:i + ITEMS_POR_PROMPT] for i in range(0, len(pendientes), ITEMS_POR_PROMPT)]
+        salida = TOKEN_BUDGETS[TAREA_ORACION]["output"]
+        futures = []
+        for grupo in grupos:
+            prompt = self._batch_prompt(grupo)
+            if prompt.over_budget():  # los lotes demasiado largos se piden de uno en uno
+                continue
+            try:
+                futures.append((grupo, self._submit(self._call_gemini_api, prompt, True,
+                                                    {"maxOutputTokens": min(TOKEN_BUDGETS[TAREA_LOTE]["output"], salida * len(grupo))},
+                                                    timeout_seconds, priority=LOTE)))
+            except QueueFullError:
+                logger.warning("Cola de lotes llena: las oraciones restantes se piden de una en una")
+                break
+        for grupo, future in futures:
+            try:
+                data, error = future.result(timeout=timeout_seconds + 2)
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("Lote de %s oraciones excedió timeout de %s s", len(grupo), timeout_seconds)
+                continue
+            except Exception:
+                logger.exception("Error en la llamada por lotes a la IA")
+                continue
+            if error:
+                logger.warning("La llamada por lotes devolvió error: %s", error)
+                continue
+            lista = data.get("resultados") if isinstance(data, dict) else data
+            if not isinstance(lista, list) or len(lista) != len(grupo):
+                logger.warning("Respuesta por lotes con formato inesperado; se procesa de uno en uno")
+                continue
+            for texto, item in zip(grupo, lista):
+                if not isinstance(item, dict):
+                    continue
+                resultado = self._formula_result(item, None)
+                if resultado[2] is None:
+                    hechos[texto] = resultado
+                    if use_cache:
+                        self._cache.set(keys[texto], item)
+
+        # Lo que el lote no resolvió se pide individualmente, en paralelo
+        restantes = [t for t in pendientes if t not in hechos]
+        if restantes:
+            with ThreadPoolExecutor(max_workers=min(8, len(restantes))) as fan_out:
+                individuales = fan_out.map(lambda t: self._procesar_oracion(t, timeout_seconds, use_cache, LOTE), restantes)
+                hechos.update(zip(restantes, individuales))
+
+        return [
+            {"entrada": t, "formula": hechos[t][0], "leyenda": hechos[t][1], "error": hechos[t][2]}
+            for t in items
+        ]
+
+    def _batch_prompt(self, textos):
+        return build_prompt(TAREA_LOTE, textos=json.dumps(textos, ensure_ascii=False))
+
+    # --- Ruta asíncrona (asyncio/httpx) para despliegues async/ASGI ---
+
+    def _get_async_client(self):
+        """Cliente asíncrono del bucle de eventos actual (se crea uno por bucle)."""
+        loop = asyncio.get_running_loop()
+        client = self._async_client
+        if client is None or client.loop is not loop:
+            if client is not None:
+                # Sus conexiones pertenecen al bucle anterior: se cierran allí (ver close_soon)
+                client.close_soon()
+            client = AsyncGeminiClient(
+                self.api_base, self.api_key,
+                max_concurrency=self._max_async_concurrency,
+                timeout=self._timeout,
+            )
+            self._async_client = client
+        return client
+
+    async def _call_gemini_api_async(self, client, full_prompt, expect_json_response=False, generation_config_override=None, timeout_seconds=None):
+        """Versión asíncrona de _call_gemini_api. Devuelve (data_dict, error_str)."""
+        try:
+            payload = self._build_payload(full_prompt, expect_json_response, generation_config_override)
+            started = self._admit()
+            try:
+                response_data = await client.send(payload, timeout=(self._timeout[0], timeout_seconds or self._timeout[1]))
+            except GeminiHTTPError as http_err:
+                UPSTREAM_SECONDS.observe(time.monotonic() - started, status=str(http_err.status_code))
+                self._settle(started, http_err.status_code)
+                raise
+            except asyncio.CancelledError:
+                self._settle(started, cancelled=True)
+                raise
+            except Exception:
+                UPSTREAM_SECONDS.observe(time.monotonic() - started, status="error")
+                self._settle(started, error=True)
+                raise
+            UPSTREAM_SECONDS.observe(time.monotonic() - started, status="200")
+            self._settle(started, 200)
+            self._token_usage.record(getattr(full_prompt, "task", None), response_data.get("usageMetadata"))
+            with PARSE_SECONDS.time():
+                return self._parse_gemini_response(response_data)
+        except UpstreamUnavailable as e:
+            logger.warning("Llamada a Gemini rechazada: %s", e)
+            return None, UNAVAILABLE_MESSAGE
+        except GeminiHTTPError as http_err:
+            logger.exception("HTTP error calling Gemini: %s", http_err)
+            return None, self._http_error_message(http_err.status_code, http_err.response, http_err)
+        except Exception as e:
+            logger.exception("Error inesperado al llamar a Gemini: %s", e)
+            return None, f"No se pudo procesar la petición con la IA. Error: {e}"
+
+    async def _request_async(self, prompt, expect_json_response=False, timeout_seconds=20, use_cache=True, generation_config_override=None):
+        """
+        Equivalente asíncrono de _request_with_cache_and_timeout: caché,
+        agrupación de peticiones idénticas en vuelo y timeout.
+        Retorna (data, error)
+        """
+        if isinstance(prompt, Prompt) and prompt.over_budget():
+            return None, self._budget_error(prompt)
+        cache_key = self._cache_key(prompt, {"json": expect_json_response, "gen_cfg": generation_config_override or {}})
+        if use_cache:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug("Cache hit para prompt")
+                return cached, None
+        if self._breaker.is_open():
+            # Sin ocupar un hilo ni esperar el timeout mientras la API está caída
+            return None, UNAVAILABLE_MESSAGE
+
+        client = self._get_async_client()
+
+        async def task():
+            data, error = await self._call_gemini_api_async(client, prompt, expect_json_response, generation_config_override, timeout_seconds)
+            if data is not None and use_cache:
+                try:
+                    self._cache.set(cache_key, data)
+                except Exception:
+                    logger.exception("Fallo al escribir en cache")
+            return data, error
+
+        future = client.inflight.get(cache_key) if use_cache else None
+        if future is None or future.done():
+            future = asyncio.ensure_future(task())
+            if use_cache:
+                client.inflight[cache_key] = future
+                future.add_done_callback(lambda f: client.inflight.pop(cache_key, None) if client.inflight.get(cache_key) is f else None)
+
+        try:
+            # shield: si este llamante se rinde, la llamada sigue para los demás
+            return await asyncio.wait_for(asyncio.shield(future), timeout_seconds + 2)
+        except asyncio.TimeoutError:
+            logger.warning("Llamada a IA excedió timeout de %s s", timeout_seconds)
+            return None, f"Tiempo de espera agotado ({timeout_seconds}s) al consultar la IA."
+        except Exception as e:
+            logger.exception("Error en llamada asíncrona a la IA: %s", e)
+            return None, f"Error interno al consultar la IA: {e}"
+
+    async def procesar_con_ia_async(self, texto, timeout_seconds=18, use_cache=True):
+        """
+        Versión asíncrona de procesar_con_ia.
+        Devuelve: (formula_visual, leyenda, error)
+        """
+        if not self.api_key:
+            return None, None, "Error de configuración: La clave de API de Google no está definida."
+
+        data, error = await self._request_async(self._sentence_prompt(texto), expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+        return self._formula_result(data, error)
+
+    async def generar_tabla_verdad_async(self, formula_str, timeout_seconds=22, use_cache=True):
+        """
+        Versión asíncrona de generar_tabla_verdad. El cálculo local se hace en
+        un hilo para no bloquear el bucle de eventos.
+        Devuelve: (header, rows, clasificacion, error)
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError as e:
+            if not self.api_key:
+                return None, None, None, f"Fórmula no válida: {e}."
+            data, error = await self._request_async(self._truth_table_ai_prompt(formula_str), expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+            return self._tabla_result(data, error)
+
+        return await asyncio.to_thread(self._tabla_local, formula)
+
+    async def simplificar_formula_async(self, formula_str, timeout_seconds=20, use_cache=True):
+        """
+        Versión asíncrona de simplificar_formula.
+        Devuelve: (pasos, formula_simplificada, error)
+        """
+        try:
+            formula = parse_formula(formula_str)
+        except FormulaError as e:
+            if not self.api_key:
+                return None, None, f"Fórmula no válida: {e}."
+            data, error = await self._request_async(self._simplification_ai_prompt(formula_str), expect_json_response=True, timeout_seconds=timeout_seconds, use_cache=use_cache)
+            return self._simplificacion_result(data, error)
+
+        return await asyncio.to_thread(self._simplificacion_local, formula)
+
+    async def ashutdown(self):
+        """Cierra el cliente asíncrono (sus conexiones keep-alive)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
 
     # Optionally add a graceful shutdown helper
     def shutdown(self):
         try:
+            if self._prefetcher is not None:
+                self._prefetcher.shutdown()
             self._executor.shutdown(wait=False)
-            self._session.close()
+            if self._cpu_pool is not None:
+                self._cpu_pool.shutdown()
+            if self._session is not None:
+                self._session.close()
         except Exception:
             pass
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Precálculo especulativo de las operaciones que suelen seguir a otra.
+
+Tras convertir una oración, lo habitual es pedir a continuación la tabla de
+verdad o la simplificación de la fórmula obtenida. PrefetchScheduler ejecuta
+esas tareas en un único hilo de fondo para que la siguiente página sea un
+acierto de caché, con un presupuesto que evita competir con las peticiones:
+
+- cola acotada (lo que no cabe se descarta) y un máximo de tareas por minuto;
+- antes de cada tarea se consulta `busy()`: en hora punta se descarta;
+- las tareas deben ser solo de cálculo local (nunca llamadas a la IA).
+
+Cuenta los aciertos (resultados precalculados que luego se usaron) y el
+desperdicio (los que nadie pidió antes de `ttl` segundos).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    def __init__(self, *, max_pending=32, max_per_minute=120, busy=None, ttl=600.0):
+        self.max_pending = max_pending
+        self.max_per_minute = max_per_minute
+        self.ttl = ttl
+        self._busy = busy or (lambda: False)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._queue = deque()
+        self._queued = set()
+        self._started = deque()          # inicio de las tareas del último minuto
+        self._prefetched = OrderedDict()  # clave de caché -> momento en que se precalculó
+        self._thread = None
+        self._closed = False
+        self.scheduled = 0
+        self.completed = 0
+        self.dropped = 0
+        self.skipped_busy = 0
+        self.failed = 0
+        self.hits = 0
+        self.wasted = 0
+
+    def schedule(self, job_key, fn):
+        """
+        Encola `fn()` (que devuelve las claves de caché que ha rellenado) salvo
+        que ya esté en cola la misma `job_key` o la cola esté llena.
+        Devuelve True si se ha encolado.
+        """
+        with self._lock:
+            if self._closed or job_key in self._queued:
+                return False
+            if len(self._queue) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._queue.append((job_key, fn))
+            self._queued.add(job_key)
+            self.scheduled += 1
+            if self._thread is None:
+                # El hilo se crea con la primera tarea: no retrasa el arranque del worker
+                self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+            return True
+
+    def consumed(self, cache_key):
+        """Anota que una petición ha usado `cache_key`; cuenta como acierto si se había precalculado."""
+        with self._lock:
+            if self._prefetched.pop(cache_key, None) is not None:
+                self.hits += 1
+                return True
+            return False
+
+    def _within_budget(self, now):
+        while self._started and now - self._started[0] > 60.0:
+            self._started.popleft()
+        return len(self._started) < self.max_per_minute
+
+    def _expire(self, now):
+        while self._prefetched:
+            key, produced_at = next(iter(self._prefetched.items()))
+            if now - produced_at < self.ttl:
+                break
+            del self._prefetched[key]
+            self.wasted += 1
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                job_key, fn = self._queue.popleft()
+                self._queued.discard(job_key)
+                now = time.monotonic()
+                if not self._within_budget(now):
+                    self.dropped += 1
+                    continue
+                self._started.append(now)
+            if self._busy():
+                with self._lock:
+                    self.skipped_busy += 1
+                continue
+            try:
+                produced = fn() or ()
+            except Exception:
+                logger.exception("Error en el precálculo de %r", job_key)
+                with self._lock:
+                    self.failed += 1
+                continue
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                for key in produced:
+                    self._prefetched[key] = now
+                    self._prefetched.move_to_end(key)
+                self.completed += 1
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "pending": len(self._queue),
+                "scheduled": self.scheduled,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "skipped_busy": self.skipped_busy,
+                "failed": self.failed,
+                "hits": self.hits,
+                "wasted": self.wasted,
+                "unused": len(self._prefetched),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+            self._queued.clear()
+            self._wakeup.notify_all()
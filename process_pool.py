@@ -0,0 +1,219 @@
+"""
+Procesos aparte para el cálculo local costoso (simplificación, equivalencia).
+
+Un cálculo de CPU en un hilo retiene el GIL: una sola fórmula patológica
+(p. ej. una cadena larga de ⊕ al simplificar) deja sin servicio a todos los
+hilos del worker de Flask. ProcessPool ejecuta esas tareas en procesos
+persistentes que ya han importado los módulos de lógica (`preload`) y:
+
+- mata el proceso si la tarea supera su tiempo real (`timeout`) y, donde
+  existe `resource` (Linux, macOS), también si supera su tiempo de CPU;
+- sustituye al momento el proceso muerto por otro ya arrancado;
+- rechaza con PoolBusy si no queda ningún proceso libre en `timeout`.
+
+Las tareas y sus argumentos se envían por pickle: deben ser funciones de
+módulo y datos sencillos (textos, listas, dicts).
+"""
+import importlib
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows: solo límite de tiempo real
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Los procesos no comparten pila con los hilos de Flask: pueden recorrer fórmulas más profundas
+RECURSION_LIMIT = 20000
+
+
+class PoolBusy(RuntimeError):
+    """Todos los procesos están ocupados."""
+
+
+class TaskTimeout(RuntimeError):
+    """La tarea superó su límite de tiempo y se ha matado su proceso."""
+
+
+class WorkerCrashed(RuntimeError):
+    """El proceso terminó durante la tarea (límite de CPU, memoria o fallo)."""
+
+
+def _limit_cpu(seconds):
+    """Limita el tiempo de CPU que le queda al proceso a `seconds` más lo ya consumido."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, preload, recursion_limit):
+    for name in preload:
+        importlib.import_module(name)
+    sys.setrecursionlimit(recursion_limit)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        fn, args, cpu_seconds = message
+        if resource is not None and cpu_seconds:
+            _limit_cpu(cpu_seconds)
+        try:
+            reply = ("ok", fn(*args))
+        except Exception as exc:
+            reply = ("error", exc)
+        try:
+            conn.send(reply)
+        except Exception as exc:  # resultado o excepción que no se puede serializar
+            conn.send(("error", RuntimeError(f"{type(exc).__name__}: {exc}")))
+
+
+class _Worker:
+    def __init__(self, ctx, preload, recursion_limit):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, preload, recursion_limit),
+                                   name="logica-cpu", daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class ProcessPool:
+    """Procesos persistentes y precargados con límite de tiempo real y de CPU por tarea."""
+
+    def __init__(self, processes=2, *, preload=(), recursion_limit=RECURSION_LIMIT):
+        methods = multiprocessing.get_all_start_methods()
+        if "forkserver" in methods:
+            # Se bifurca desde un proceso limpio que ya ha importado `preload`
+            self._ctx = multiprocessing.get_context("forkserver")
+            self._ctx.set_forkserver_preload(list(preload))
+        else:
+            self._ctx = multiprocessing.get_context("spawn")
+        self.processes = processes
+        self._preload = tuple(preload)
+        self._recursion_limit = recursion_limit
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._closed = False
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.busy = 0
+        # Llamadas a run() esperando un proceso libre
+        self.waiting = 0
+        for _ in range(processes):
+            self._spawn()
+
+    def _spawn(self):
+        worker = _Worker(self._ctx, self._preload, self._recursion_limit)
+        with self._lock:
+            self._workers.add(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker):
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+            closed = self._closed
+        if not closed:
+            self._spawn()
+
+    def run(self, fn, *args, timeout=5.0, cpu_seconds=None):
+        """
+        Ejecuta fn(*args) en un proceso y devuelve su resultado (o relanza su
+        excepción). Espera hasta `timeout` segundos a que haya un proceso libre
+        (PoolBusy) y otros `timeout` a que termine (TaskTimeout); `cpu_seconds`
+        (por defecto, `timeout`) limita su tiempo de CPU (WorkerCrashed).
+        """
+        with self._lock:
+            self.waiting += 1
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.busy += 1
+            raise PoolBusy(f"Los {self.processes} procesos de cálculo están ocupados") from None
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        try:
+            worker.conn.send((fn, args, cpu_seconds or timeout))
+        except (OSError, ValueError):
+            self._crashed(worker)
+            raise WorkerCrashed("El proceso de cálculo no acepta tareas") from None
+        except Exception:
+            self._idle.put(worker)  # la tarea no se pudo serializar; el proceso sigue sano
+            raise
+        try:
+            if not worker.conn.poll(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                self._replace(worker)
+                raise TaskTimeout(f"La tarea superó {timeout:g} s y se ha detenido")
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            self._crashed(worker)
+            raise WorkerCrashed("El proceso de cálculo terminó durante la tarea") from None
+        self._idle.put(worker)
+        with self._lock:
+            if status == "ok":
+                self.completed += 1
+            else:
+                self.failed += 1
+        if status != "ok":
+            raise value
+        return value
+
+    def _crashed(self, worker):
+        with self._lock:
+            self.crashes += 1
+        self._replace(worker)
+        logger.warning("El proceso de cálculo %s terminó con código %s", worker.process.pid, worker.process.exitcode)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "processes": len(self._workers),
+                "idle": self._idle.qsize(),
+                "waiting": self.waiting,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "crashes": self.crashes,
+                "busy": self.busy,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,150 @@
+"""
+Prompts de la IA: instrucciones de sistema y plantillas por tarea.
+
+Las instrucciones se preparan una sola vez al importar el módulo (sin la
+sangría del código fuente y con los ejemplos JSON en una línea) y se envían
+en el campo systemInstruction de Gemini. Así el texto del usuario es lo único
+que cambia entre peticiones y el prefijo estable puede aprovechar la caché de
+contexto del servidor. Cada tarea tiene además un presupuesto de tokens de
+entrada (se rechaza antes de llamar) y de salida (maxOutputTokens).
+"""
+import json
+import math
+import textwrap
+from collections import namedtuple
+from threading import Lock
+
+TAREA_ORACION = "oracion"
+TAREA_LOTE = "lote"
+TAREA_TABLA = "tabla"
+TAREA_SIMPLIFICACION = "simplificacion"
+
+# Caracteres por token (aproximado) para estimar el tamaño sin llamar a countTokens
+CHARS_PER_TOKEN = 4
+
+
+def _compact(text):
+    return textwrap.dedent(text).strip()
+
+
+def _example(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+_SIMBOLOS = "Usa los símbolos ¬ ∧ ∨ → ↔ ⊕."
+
+SYSTEM_ORACION = _compact(f"""
+    Eres un experto en lógica proposicional. Convierte la oración en lenguaje natural a su forma simbólica.
+    Reglas:
+    1. Identifica las proposiciones atómicas y asigna una variable (P, Q, R...) a cada una distinta.
+    2. Si una proposición está negada ("no vi la película"), la atómica es la afirmativa ("vi la película").
+    3. Conectores: 'y', 'pero', 'aunque' → ∧; 'o' → ∨; 'si... entonces' o 'si..., ...' → →; 'si y solo si' → ↔; 'no' → ¬.
+    4. Responde solo con JSON válido con las claves "formula" (la expresión simbólica) y "leyenda" (objeto variable → proposición atómica en forma afirmativa).
+    Ejemplos:
+    Oración: "si no estuvieras loca, no habrías venido aquí"
+    {_example({"formula": "¬P → ¬Q", "leyenda": {"P": "estuvieras loca", "Q": "habrías venido aquí"}})}
+    Oración: "vi la pelicula aunque no lei la novela"
+    {_example({"formula": "P ∧ ¬Q", "leyenda": {"P": "vi la pelicula", "Q": "lei la novela"}})}
+    """)
+
+SYSTEM_LOTE = SYSTEM_ORACION + "\n" + _compact("""
+    Recibirás VARIAS oraciones en un array JSON: conviértelas de forma independiente, cada una con sus propias variables.
+    Responde con JSON válido con una única clave "resultados": una lista con un objeto {"formula", "leyenda"} por oración, en el mismo orden y con la misma longitud que la entrada.
+    """)
+
+SYSTEM_TABLA = _compact(f"""
+    Eres un experto en lógica proposicional. Genera la tabla de verdad de la fórmula con todas sus sub-fórmulas.
+    Reglas:
+    1. Columnas: primero las variables, luego las sub-fórmulas de menor a mayor complejidad y al final la fórmula completa.
+    2. Una fila por combinación de valores, con 'V' (verdadero) y 'F' (falso).
+    3. Clasifica la fórmula como "Tautología", "Contradicción" o "Contingencia".
+    4. Responde solo con JSON válido con las claves "header" (lista de columnas), "rows" (lista de filas) y "clasificacion". {_SIMBOLOS}
+    Ejemplo:
+    Fórmula: "(P ∧ Q) → P"
+    {_example({"header": ["P", "Q", "P ∧ Q", "(P ∧ Q) → P"], "rows": [["V", "V", "V", "V"], ["V", "F", "F", "V"], ["F", "V", "F", "V"], ["F", "F", "F", "V"]], "clasificacion": "Tautología"})}
+    """)
+
+SYSTEM_SIMPLIFICACION = _compact(f"""
+    Eres un experto en lógica proposicional y álgebra booleana. Simplifica la fórmula paso a paso.
+    Reglas:
+    1. Aplica las leyes de equivalencia (De Morgan, distributiva, asociativa, negación, identidad...) de una en una.
+    2. El objetivo es la fórmula equivalente más corta.
+    3. Responde solo con JSON válido con las claves "pasos" (lista de objetos {{"formula", "regla"}}, empezando por la fórmula original) y "formula_simplificada". {_SIMBOLOS}
+    Ejemplo:
+    Fórmula: "(P ∧ Q) ∨ (P ∧ ¬Q)"
+    {_example({"pasos": [{"formula": "(P ∧ Q) ∨ (P ∧ ¬Q)", "regla": "Fórmula original"}, {"formula": "P ∧ (Q ∨ ¬Q)", "regla": "Ley distributiva"}, {"formula": "P ∧ V", "regla": "Ley de negación"}, {"formula": "P", "regla": "Ley de identidad"}], "formula_simplificada": "P"})}
+    """)
+
+SYSTEM_PROMPTS = {
+    TAREA_ORACION: SYSTEM_ORACION,
+    TAREA_LOTE: SYSTEM_LOTE,
+    TAREA_TABLA: SYSTEM_TABLA,
+    TAREA_SIMPLIFICACION: SYSTEM_SIMPLIFICACION,
+}
+
+USER_TEMPLATES = {
+    TAREA_ORACION: 'Oración: "{texto}"',
+    TAREA_LOTE: 'Oraciones: {textos}',
+    TAREA_TABLA: 'Fórmula: "{formula}"',
+    TAREA_SIMPLIFICACION: 'Fórmula: "{formula}"',
+}
+
+# Presupuesto por tarea: tokens de entrada del usuario y de salida (maxOutputTokens).
+# En los lotes la salida se ajusta al número de oraciones.
+TOKEN_BUDGETS = {
+    TAREA_ORACION: {"input": 512, "output": 256},
+    TAREA_LOTE: {"input": 4096, "output": 8192},
+    TAREA_TABLA: {"input": 256, "output": 4096},
+    TAREA_SIMPLIFICACION: {"input": 256, "output": 1024},
+}
+
+
+def estimate_tokens(text):
+    """Estimación rápida del número de tokens de un texto."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class Prompt(namedtuple("Prompt", ("task", "system", "user"))):
+    """Petición ya preparada: tarea, instrucción de sistema y texto del usuario."""
+    __slots__ = ()
+
+    @property
+    def input_tokens(self):
+        return estimate_tokens(self.user)
+
+    def over_budget(self):
+        return self.input_tokens > TOKEN_BUDGETS[self.task]["input"]
+
+
+def build_prompt(task, **fields):
+    """Construye el Prompt de una tarea rellenando su plantilla."""
+    return Prompt(task, SYSTEM_PROMPTS[task], USER_TEMPLATES[task].format(**fields))
+
+
+class TokenUsage:
+    """Tokens consumidos por tarea según el usageMetadata de las respuestas."""
+
+    _FIELDS = ("promptTokenCount", "cachedContentTokenCount", "candidatesTokenCount")
+
+    def __init__(self):
+        self._lock = Lock()
+        self._totals = {}
+
+    def record(self, task, usage):
+        if not usage:
+            return
+        with self._lock:
+            totals = self._totals.setdefault(task, dict.fromkeys(("calls",) + self._FIELDS, 0))
+            totals["calls"] += 1
+            for field in self._FIELDS:
+                totals[field] += usage.get(field, 0) or 0
+
+    def stats(self):
+        """Totales y media de tokens de entrada por petición, por tarea."""
+        with self._lock:
+            result = {}
+            for task, totals in self._totals.items():
+                entry = dict(totals)
+                entry["avg_prompt_tokens"] = totals["promptTokenCount"] / totals["calls"]
+                result[task] = entry
+            return result
@@ -0,0 +1,179 @@
+"""
+Protección frente a degradaciones de la API de Gemini: un cortocircuito
+(circuit breaker) que deja de llamar mientras la API falla o va lenta, y un
+límite adaptativo (AIMD) de llamadas en vuelo que se reduce ante 429/503.
+
+Ambos rechazan al momento en lugar de esperar, para que los workers de Flask
+no se queden bloqueados durante una incidencia.
+"""
+import time
+from collections import deque
+from threading import Lock
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+class UpstreamUnavailable(RuntimeError):
+    """La llamada a la IA se rechaza sin enviarla."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """El cortocircuito está abierto: la API está fallando."""
+
+
+class ConcurrencyLimitError(UpstreamUnavailable):
+    """Se ha alcanzado el límite adaptativo de llamadas en vuelo."""
+
+
+class CircuitBreaker:
+    """
+    Cortocircuito por tasa de errores en una ventana deslizante.
+
+    - cerrado: las llamadas pasan; si en las últimas `window` hay al menos
+      `min_calls` y la proporción de fallos (errores o llamadas más lentas que
+      `slow_call_seconds`) llega a `failure_ratio`, se abre.
+    - abierto: se rechaza todo durante `open_seconds`.
+    - semiabierto: se dejan pasar `half_open_calls` llamadas de prueba; si
+      todas salen bien se cierra y si alguna falla se vuelve a abrir.
+    """
+
+    def __init__(self, *, window=20, min_calls=5, failure_ratio=0.5,
+                 slow_call_seconds=10.0, open_seconds=30.0, half_open_calls=2):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._lock = Lock()
+        self._outcomes = deque(maxlen=window)
+        self._state = CERRADO
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == ABIERTO and now - self._opened_at >= self.open_seconds:
+            self._state = SEMIABIERTO
+            self._probes = 0
+            self._probe_successes = 0
+        return self._state
+
+    def is_open(self):
+        """True si ahora mismo se rechazaría cualquier llamada (sin consumir pruebas)."""
+        return self.state == ABIERTO
+
+    def allow(self):
+        """Reserva el paso de una llamada. Devuelve False si debe rechazarse."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CERRADO:
+                return True
+            if state == SEMIABIERTO and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """Devuelve la reserva de una llamada que no llegó a completarse (p. ej. cancelada)."""
+        with self._lock:
+            if self._state == SEMIABIERTO and self._probes > self._probe_successes:
+                self._probes -= 1
+
+    def record(self, success, latency):
+        """Registra el resultado de una llamada que se dejó pasar."""
+        failed = not success or latency > self.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            if self._state == SEMIABIERTO:
+                if failed:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self._state = CERRADO
+                        self._outcomes.clear()
+                return
+            if self._state == ABIERTO:
+                return
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_ratio:
+                self._open(now)
+
+    def _open(self, now):
+        self._state = ABIERTO
+        self._opened_at = now
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(time.monotonic()),
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(self._outcomes),
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class AdaptiveLimiter:
+    """
+    Límite de llamadas en vuelo con control AIMD: cada respuesta correcta sube
+    el límite en 1/límite (≈ +1 por ventana completa) y cada 429/503 lo
+    multiplica por `decrease`. Por encima del límite se rechaza al momento.
+    Empieza en el máximo: solo limita después de que la API avise de sobrecarga.
+    """
+
+    def __init__(self, *, initial=None, minimum=1, maximum=64, decrease=0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self._limit = float(maximum if initial is None else initial)
+        self._inflight = 0
+        self._lock = Lock()
+        self.rejected = 0
+        self.throttled = 0
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def try_acquire(self):
+        with self._lock:
+            if self._inflight >= int(self._limit):
+                self.rejected += 1
+                return False
+            self._inflight += 1
+            return True
+
+    def release(self, overloaded=False, adjust=True):
+        """Libera la plaza; con adjust=False no se modifica el límite (llamada no enviada)."""
+        with self._lock:
+            self._inflight -= 1
+            if not adjust:
+                return
+            if overloaded:
+                self.throttled += 1
+                self._limit = max(self.minimum, self._limit * self.decrease)
+            else:
+                self._limit = min(self.maximum, self._limit + 1 / self._limit)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "inflight": self._inflight,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+            }
@@ -0,0 +1,261 @@
+"""
+Resolutor SAT (CDCL) y codificación de Tseitin para fórmulas proposicionales.
+
+Los literales son enteros distintos de cero al estilo DIMACS: v es la variable
+v en V y -v es su negación.
+"""
+from formulas import AND, OR, XOR, IMPLIES, IFF, Var, Const, Not, postorder
+
+
+class BudgetExceeded(Exception):
+    """El resolutor agotó el número máximo de conflictos permitido."""
+
+
+class Solver:
+    """
+    CDCL con dos literales vigilados, aprendizaje 1-UIP, retroceso no
+    cronológico, actividad tipo VSIDS y guardado de fase.
+    """
+
+    def __init__(self, n_vars=0):
+        self.n_vars = n_vars
+        self.clauses = []
+        self.units = []
+        self.watches = {}
+        self.unsat = False
+
+    def new_var(self):
+        self.n_vars += 1
+        return self.n_vars
+
+    def add_clause(self, lits):
+        clause = []
+        for lit in lits:
+            if -lit in clause:
+                return  # tautología: siempre satisfecha
+            if lit not in clause:
+                clause.append(lit)
+        if not clause:
+            self.unsat = True
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            self._attach(clause)
+
+    def _attach(self, clause):
+        idx = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(idx)
+        self.watches.setdefault(clause[1], []).append(idx)
+        return idx
+
+    def _value(self, lit):
+        v = self.assign[abs(lit)]
+        return v if lit > 0 else -v
+
+    def _enqueue(self, lit, reason):
+        var = abs(lit)
+        self.assign[var] = 1 if lit > 0 else -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """Propagación unitaria; devuelve el índice de la cláusula en conflicto o None."""
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = self.watches.get(false_lit, [])
+            i = 0
+            while i < len(watchers):
+                ci = watchers[i]
+                c = self.clauses[ci]
+                if c[0] == false_lit:
+                    c[0], c[1] = c[1], c[0]
+                if self._value(c[0]) == 1:
+                    i += 1
+                    continue
+                for k in range(2, len(c)):
+                    if self._value(c[k]) != -1:
+                        c[1], c[k] = c[k], c[1]
+                        self.watches.setdefault(c[1], []).append(ci)
+                        watchers[i] = watchers[-1]
+                        watchers.pop()
+                        break
+                else:
+                    if self._value(c[0]) == -1:
+                        return ci
+                    self._enqueue(c[0], ci)
+                    i += 1
+        return None
+
+    def _analyze(self, conflict):
+        """Aprendizaje 1-UIP: devuelve (cláusula aprendida, nivel de retroceso)."""
+        learnt = [0]
+        seen = set()
+        counter = 0
+        p = 0
+        idx = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        current = len(self.trail_lim)
+        while True:
+            for q in (clause[1:] if p else clause):
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if self.level[var] >= current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while abs(self.trail[idx]) not in seen:
+                idx -= 1
+            p = self.trail[idx]
+            idx -= 1
+            seen.discard(abs(p))
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reason[abs(p)]]
+        learnt[0] = -p
+        if len(learnt) == 1:
+            return learnt, 0
+        best = max(range(1, len(learnt)), key=lambda j: self.level[abs(learnt[j])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def _bump(self, var):
+        self.activity[var] += self.inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.inc *= 1e-100
+
+    def _backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phase[var] = self.assign[var]
+            self.assign[var] = 0
+            self.reason[var] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def _pick_branch(self):
+        best, best_act = 0, -1.0
+        for var in range(1, self.n_vars + 1):
+            if self.assign[var] == 0 and self.activity[var] > best_act:
+                best, best_act = var, self.activity[var]
+        return best
+
+    def solve(self, max_conflicts=None):
+        """
+        Devuelve un modelo {variable: bool} si es satisfacible, o None.
+        Lanza BudgetExceeded si se superan `max_conflicts` conflictos.
+        """
+        if self.unsat:
+            return None
+        n = self.n_vars
+        self.assign = [0] * (n + 1)
+        self.level = [0] * (n + 1)
+        self.reason = [None] * (n + 1)
+        self.activity = [0.0] * (n + 1)
+        self.phase = [-1] * (n + 1)
+        self.inc = 1.0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        conflicts = 0
+
+        for lit in self.units:
+            val = self._value(lit)
+            if val == -1:
+                return None
+            if val == 0:
+                self._enqueue(lit, None)
+
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                if not self.trail_lim:
+                    return None
+                conflicts += 1
+                if max_conflicts is not None and conflicts > max_conflicts:
+                    raise BudgetExceeded(conflicts)
+                learnt, back_level = self._analyze(conflict)
+                self._backtrack(back_level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._enqueue(learnt[0], self._attach(learnt))
+                self.inc *= 1.05
+            else:
+                var = self._pick_branch()
+                if var == 0:
+                    return {v: self.assign[v] == 1 for v in range(1, n + 1)}
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(var if self.phase[var] == 1 else -var, None)
+
+
+class TseitinEncoder:
+    """Codifica fórmulas en CNF equisatisfacible, compartiendo sub-fórmulas repetidas."""
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.var_ids = {}
+        self._memo = {}
+        self._true = None
+
+    def literal(self, node):
+        """Devuelve el literal que representa a `node`, añadiendo las cláusulas necesarias."""
+        memo = self._memo
+        # Hijos antes que padres: no hay recursión aunque la fórmula sea muy profunda
+        for n in postorder(node):
+            if n not in memo:
+                memo[n] = self._encode(n)
+        return memo[node]
+
+    def _encode(self, node):
+        """Literal de `node` cuyos hijos ya están codificados en self._memo."""
+        s = self.solver
+        if isinstance(node, Var):
+            lit = self.var_ids.get(node.name)
+            if lit is None:
+                lit = self.var_ids[node.name] = s.new_var()
+            return lit
+        if isinstance(node, Const):
+            if self._true is None:
+                self._true = s.new_var()
+                s.add_clause([self._true])
+            return self._true if node.value else -self._true
+        if isinstance(node, Not):
+            return -self._memo[node.operand]
+        a = self._memo[node.left]
+        b = self._memo[node.right]
+        x = s.new_var()
+        op = node.op
+        if op == IMPLIES:
+            op, a = OR, -a
+        if op == AND:
+            s.add_clause([-x, a])
+            s.add_clause([-x, b])
+            s.add_clause([x, -a, -b])
+        elif op == OR:
+            s.add_clause([-x, a, b])
+            s.add_clause([x, -a])
+            s.add_clause([x, -b])
+        elif op == IFF:
+            s.add_clause([-x, -a, b])
+            s.add_clause([-x, a, -b])
+            s.add_clause([x, a, b])
+            s.add_clause([x, -a, -b])
+        elif op == XOR:
+            s.add_clause([-x, a, b])
+            s.add_clause([-x, -a, -b])
+            s.add_clause([x, -a, b])
+            s.add_clause([x, a, -b])
+        else:
+            raise ValueError(f"Conectivo desconocido: {op}")
+        return x
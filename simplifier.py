@@ -0,0 +1,423 @@
+"""
+Simplificación local de fórmulas con traza de pasos.
+
+1. Reescritura algebraica: en cada paso se aplica una ley (condicional,
+   De Morgan, absorción, distributiva...) en todos los lugares donde encaja,
+   y se registra como {"formula": ..., "regla": ...}.
+2. Minimización: forma normal disyuntiva mínima por Quine–McCluskey (exacta,
+   hasta MAX_VARIABLES_QM variables) o con una heurística al estilo Espresso
+   (expandir + irredundante) hasta MAX_VARIABLES_MINIMIZAR.
+
+El resultado es la fórmula más corta encontrada.
+"""
+from formulas import AND, OR, XOR, IMPLIES, IFF, Var, Const, Not, BinOp, to_str, variables
+from bitsets import evaluate_bits, variable_mask
+
+MAX_VARIABLES_QM = 8
+MAX_VARIABLES_MINIMIZAR = 16
+MAX_PASOS = 30
+# Presupuesto de nodos del ramificación y poda de la cobertura exacta
+_COVER_BUDGET = 20000
+
+REGLA_ORIGINAL = "Fórmula original"
+REGLA_QM = "Minimización por Quine–McCluskey (X ∧ Y) ∨ (X ∧ ¬Y) ≡ X"
+REGLA_ESPRESSO = "Minimización heurística (Espresso) (X ∧ Y) ∨ (X ∧ ¬Y) ≡ X"
+
+_DUAL = {AND: OR, OR: AND}
+
+
+def _children(node):
+    if isinstance(node, Not):
+        return (node.operand,)
+    if isinstance(node, BinOp):
+        return (node.left, node.right)
+    return ()
+
+
+def size(node):
+    """Número de nodos de la fórmula (variables, constantes y conectivos)."""
+    # Con una pila explícita: la profundidad de la fórmula no está limitada por la de Python
+    sizes = {}
+    stack = [node]
+    while stack:
+        n = stack[-1]
+        if n in sizes:
+            stack.pop()
+            continue
+        pending = [c for c in _children(n) if c not in sizes]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        sizes[n] = 1 + sum(sizes[c] for c in _children(n))
+    return sizes[node]
+
+
+# --- Leyes de equivalencia -------------------------------------------------
+
+def _chain(node, op):
+    """Operandos de una cadena asociativa A op B op C ..."""
+    operands = []
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, BinOp) and n.op == op:
+            stack.append(n.right)
+            stack.append(n.left)
+        else:
+            operands.append(n)
+    return operands
+
+
+def _build(op, operands):
+    if not operands:
+        return Const(op == AND)
+    node = operands[0]
+    for operand in operands[1:]:
+        node = BinOp(op, node, operand)
+    return node
+
+
+def _is_chain_root(node):
+    return isinstance(node, BinOp) and node.op in (AND, OR)
+
+
+def _condicional(node):
+    if isinstance(node, BinOp) and node.op == IMPLIES:
+        return BinOp(OR, Not(node.left), node.right)
+
+
+def _bicondicional(node):
+    if isinstance(node, BinOp) and node.op == IFF:
+        return BinOp(AND, BinOp(IMPLIES, node.left, node.right), BinOp(IMPLIES, node.right, node.left))
+
+
+def _disyuncion_exclusiva(node):
+    if isinstance(node, BinOp) and node.op == XOR:
+        return BinOp(AND, BinOp(OR, node.left, node.right), Not(BinOp(AND, node.left, node.right)))
+
+
+def _doble_negacion(node):
+    if isinstance(node, Not) and isinstance(node.operand, Not):
+        return node.operand.operand
+
+
+def _de_morgan(node):
+    if isinstance(node, Not) and _is_chain_root(node.operand):
+        inner = node.operand
+        return BinOp(_DUAL[inner.op], Not(inner.left), Not(inner.right))
+
+
+def _negacion_constante(node):
+    if isinstance(node, Not) and isinstance(node.operand, Const):
+        return Const(not node.operand.value)
+
+
+def _complemento(node):
+    if _is_chain_root(node):
+        ops = _chain(node, node.op)
+        present = set(ops)
+        if any(isinstance(x, Not) and x.operand in present for x in ops):
+            return Const(node.op == OR)
+
+
+def _dominacion(node):
+    if _is_chain_root(node):
+        dominant = Const(node.op == OR)
+        if dominant in _chain(node, node.op):
+            return dominant
+
+
+def _identidad(node):
+    if _is_chain_root(node):
+        neutral = Const(node.op == AND)
+        ops = _chain(node, node.op)
+        if neutral in ops:
+            return _build(node.op, [x for x in ops if x != neutral])
+
+
+def _idempotencia(node):
+    if _is_chain_root(node):
+        ops = _chain(node, node.op)
+        unique = list(dict.fromkeys(ops))
+        if len(unique) < len(ops):
+            return _build(node.op, unique)
+
+
+def _absorcion(node):
+    if _is_chain_root(node):
+        op, dual = node.op, _DUAL[node.op]
+        ops = _chain(node, op)
+        present = set(ops)
+        kept = [y for y in ops
+                if not (isinstance(y, BinOp) and y.op == dual
+                        and any(x in present and x is not y for x in _chain(y, dual)))]
+        if len(kept) < len(ops):
+            return _build(op, kept)
+
+
+def _distributiva(node):
+    """Factor común: (A ∧ B) ∨ (A ∧ C) ≡ A ∧ (B ∨ C) y su dual."""
+    if not _is_chain_root(node):
+        return None
+    op, dual = node.op, _DUAL[node.op]
+    ops = _chain(node, op)
+    for i in range(len(ops)):
+        if not (isinstance(ops[i], BinOp) and ops[i].op == dual):
+            continue
+        first = _chain(ops[i], dual)
+        for j in range(i + 1, len(ops)):
+            if not (isinstance(ops[j], BinOp) and ops[j].op == dual):
+                continue
+            second = _chain(ops[j], dual)
+            common = [x for x in dict.fromkeys(first) if x in second]
+            if not common:
+                continue
+            rest_a = [x for x in first if x not in common]
+            rest_b = [x for x in second if x not in common]
+            if not rest_a or not rest_b:
+                continue  # es un caso de absorción
+            factored = _build(dual, common + [BinOp(op, _build(dual, rest_a), _build(dual, rest_b))])
+            return _build(op, ops[:i] + [factored] + ops[i + 1:j] + ops[j + 1:])
+    return None
+
+
+# En orden de prioridad: primero se eliminan →, ↔ y ⊕, luego se internan las
+# negaciones y finalmente se aplican las leyes que reducen la fórmula.
+LEYES = [
+    (_condicional, "Ley del condicional (A → B ≡ ¬A ∨ B)"),
+    (_bicondicional, "Ley del bicondicional (A ↔ B ≡ (A → B) ∧ (B → A))"),
+    (_disyuncion_exclusiva, "Definición de la disyunción exclusiva (A ⊕ B ≡ (A ∨ B) ∧ ¬(A ∧ B))"),
+    (_doble_negacion, "Ley de la doble negación (¬¬A ≡ A)"),
+    (_de_morgan, "Leyes de De Morgan (¬(A ∧ B) ≡ ¬A ∨ ¬B)"),
+    (_negacion_constante, "Negación de constantes (¬⊤ ≡ ⊥)"),
+    (_complemento, "Ley de negación (A ∨ ¬A ≡ ⊤, A ∧ ¬A ≡ ⊥)"),
+    (_dominacion, "Ley de dominación (A ∨ ⊤ ≡ ⊤, A ∧ ⊥ ≡ ⊥)"),
+    (_identidad, "Ley de identidad (A ∧ ⊤ ≡ A, A ∨ ⊥ ≡ A)"),
+    (_idempotencia, "Ley de idempotencia (A ∧ A ≡ A)"),
+    (_absorcion, "Ley de absorción (A ∨ (A ∧ B) ≡ A)"),
+    (_distributiva, "Ley distributiva (A ∧ B) ∨ (A ∧ C) ≡ A ∧ (B ∨ C)"),
+]
+
+
+def _apply_everywhere(node, law):
+    """Aplica la ley de arriba abajo en todos los sitios donde encaja. Devuelve (nodo, cambió)."""
+    # done[n] = (resultado, cambió); donde la ley encaja no se baja a los hijos
+    done = {}
+    stack = [(node, False)]
+    while stack:
+        n, expanded = stack.pop()
+        if not expanded:
+            if n in done:
+                continue
+            result = law(n)
+            if result is not None:
+                done[n] = (result, True)
+            elif _children(n):
+                stack.append((n, True))
+                stack.extend((c, False) for c in _children(n))
+            else:
+                done[n] = (n, False)
+            continue
+        parts = [done[c] for c in _children(n)]
+        if not any(changed for _, changed in parts):
+            done[n] = (n, False)
+        elif isinstance(n, Not):
+            done[n] = (Not(parts[0][0]), True)
+        else:
+            done[n] = (BinOp(n.op, parts[0][0], parts[1][0]), True)
+    return done[node]
+
+
+def rewrite_steps(node, max_steps=MAX_PASOS):
+    """Reescritura algebraica: lista de (fórmula, regla) a partir de la original."""
+    steps = [(node, REGLA_ORIGINAL)]
+    limit = 4 * size(node) + 8
+    while len(steps) < max_steps:
+        for law, regla in LEYES:
+            new, changed = _apply_everywhere(node, law)
+            if changed:
+                break
+        else:
+            break
+        if size(new) > limit:
+            break  # la expansión (p. ej. de ↔ anidados) deja de compensar
+        node = new
+        steps.append((node, regla))
+    return steps
+
+
+# --- Minimización a forma normal disyuntiva ---------------------------------
+
+def _prime_implicants(minterms, n_vars):
+    """Tabla de Quine–McCluskey: cubos (valor, máscara de indiferencias)."""
+    current = {(m, 0) for m in minterms}
+    primes = set()
+    while current:
+        combined = set()
+        used = set()
+        for value, dashes in current:
+            for bit in range(n_vars):
+                b = 1 << bit
+                if dashes & b or value & b:
+                    continue
+                partner = (value | b, dashes)
+                if partner in current:
+                    combined.add((value, dashes | b))
+                    used.add((value, dashes))
+                    used.add(partner)
+        primes |= current - used
+        current = combined
+    return primes
+
+
+def _cube_cost(cube, n_vars):
+    # literales del término + 1 por el propio término
+    return n_vars - bin(cube[1]).count('1') + 1
+
+
+def _min_cover(primes, minterms, n_vars):
+    """Cobertura de coste mínimo (ramificación y poda con presupuesto; greedy como cota)."""
+    primes = sorted(primes)
+    index = {m: i for i, m in enumerate(minterms)}
+    covers = []
+    for value, dashes in primes:
+        mask = 0
+        for m in minterms:
+            if m & ~dashes == value:
+                mask |= 1 << index[m]
+        covers.append(mask)
+    costs = [_cube_cost(p, n_vars) for p in primes]
+    covering = [[k for k in range(len(primes)) if covers[k] >> i & 1] for i in range(len(minterms))]
+    everything = (1 << len(minterms)) - 1
+
+    # Cota inicial greedy
+    greedy, uncovered = [], everything
+    while uncovered:
+        best = max(range(len(primes)), key=lambda k: (bin(covers[k] & uncovered).count('1') / costs[k], -k))
+        greedy.append(best)
+        uncovered &= ~covers[best]
+    best = [sum(costs[k] for k in greedy), greedy]
+    budget = [_COVER_BUDGET]
+
+    def search(uncovered, chosen, cost):
+        if cost >= best[0] or budget[0] <= 0:
+            return
+        budget[0] -= 1
+        if not uncovered:
+            best[0], best[1] = cost, list(chosen)
+            return
+        # minterm con menos implicantes que lo cubren
+        i = min((i for i in range(len(minterms)) if uncovered >> i & 1), key=lambda i: len(covering[i]))
+        candidates = sorted(covering[i], key=lambda k: -bin(covers[k] & uncovered).count('1'))
+        for k in candidates:
+            chosen.append(k)
+            search(uncovered & ~covers[k], chosen, cost + costs[k])
+            chosen.pop()
+
+    search(everything, [], 0)
+    return [primes[k] for k in best[1]]
+
+
+def _quine_mccluskey(node, names):
+    n_vars = len(names)
+    on = evaluate_bits(node, names)
+    full_row = (1 << n_vars) - 1
+    # fila i de la tabla -> minterm con bit (n-1-j) = 1 si la variable j es V
+    minterms = sorted(full_row ^ row for row in range(1 << n_vars) if on >> row & 1)
+    if not minterms:
+        return []
+    cubes = _min_cover(_prime_implicants(minterms, n_vars), minterms, n_vars)
+    result = []
+    for value, dashes in cubes:
+        cube = {}
+        for j in range(n_vars):
+            b = 1 << (n_vars - 1 - j)
+            if not dashes & b:
+                cube[j] = bool(value & b)
+        result.append(cube)
+    return result
+
+
+def _espresso(node, names):
+    """Heurística: cada fila V no cubierta se expande a un implicante primo; luego se quitan los redundantes."""
+    n_vars = len(names)
+    full = (1 << (1 << n_vars)) - 1
+    on = evaluate_bits(node, names)
+    off = full ^ on
+    pos = [variable_mask(j, n_vars) for j in range(n_vars)]
+    lit_mask = {(j, True): pos[j] for j in range(n_vars)}
+    lit_mask.update({(j, False): full ^ pos[j] for j in range(n_vars)})
+
+    def cube_mask(cube):
+        mask = full
+        for j, value in cube.items():
+            mask &= lit_mask[(j, value)]
+        return mask
+
+    cover = []
+    uncovered = on
+    while uncovered:
+        row = (uncovered & -uncovered).bit_length() - 1
+        cube = {j: not (row >> (n_vars - 1 - j)) & 1 for j in range(n_vars)}
+        for j in range(n_vars):  # EXPAND
+            value = cube.pop(j)
+            if cube_mask(cube) & off:
+                cube[j] = value
+        mask = cube_mask(cube)
+        cover.append((cube, mask))
+        uncovered &= ~mask
+
+    # IRREDUNDANT: se intenta quitar primero los cubos con más literales
+    cover.sort(key=lambda c: -len(c[0]))
+    i = 0
+    while i < len(cover):
+        others = 0
+        for k, (_, mask) in enumerate(cover):
+            if k != i:
+                others |= mask
+        if on & ~others == 0:
+            cover.pop(i)
+        else:
+            i += 1
+    return [cube for cube, _ in cover]
+
+
+def _cubes_to_formula(cubes, names):
+    if not cubes:
+        return Const(False)
+    terms = []
+    for cube in sorted(cubes, key=lambda c: sorted((j, not v) for j, v in c.items())):
+        literals = [Var(names[j]) if value else Not(Var(names[j])) for j, value in sorted(cube.items())]
+        terms.append(_build(AND, literals))
+    return _build(OR, terms)
+
+
+def minimize(node):
+    """
+    Forma normal disyuntiva mínima (o casi mínima) de la fórmula.
+    Devuelve (fórmula, regla) o None si tiene demasiadas variables.
+    """
+    names = variables(node)
+    if len(names) <= MAX_VARIABLES_QM:
+        return _cubes_to_formula(_quine_mccluskey(node, names), names), REGLA_QM
+    if len(names) <= MAX_VARIABLES_MINIMIZAR:
+        return _cubes_to_formula(_espresso(node, names), names), REGLA_ESPRESSO
+    return None
+
+
+def simplify(node):
+    """
+    Simplifica la fórmula y devuelve (pasos, formula_simplificada) con el
+    formato de la aplicación: pasos es una lista de {"formula", "regla"}.
+    """
+    steps = rewrite_steps(node)
+    minimal = minimize(node)
+    if minimal is not None:
+        steps.append(minimal)
+
+    # La traza se corta en la fórmula más corta (la primera si hay empate)
+    best = min(range(len(steps)), key=lambda i: (size(steps[i][0]), i))
+    steps = steps[:best + 1]
+    pasos = [{"formula": to_str(f), "regla": regla} for f, regla in steps]
+    return pasos, pasos[-1]["formula"]
@@ -0,0 +1,30 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from formulas import AND, OR, XOR, IMPLIES, IFF, Var, Const, Not, BinOp  # noqa: E402
+
+OPERADORES = (AND, OR, XOR, IMPLIES, IFF)
+
+
+@pytest.fixture
+def random_formula():
+    """Generador de fórmulas aleatorias reproducibles: random_formula(semilla, nombres, profundidad)."""
+    def build(seed, names=("P", "Q", "R", "S"), depth=4):
+        rng = random.Random(seed)
+
+        def node(d):
+            if d == 0 or rng.random() < 0.2:
+                if rng.random() < 0.1:
+                    return Const(rng.random() < 0.5)
+                return Var(rng.choice(names))
+            if rng.random() < 0.25:
+                return Not(node(d - 1))
+            return BinOp(rng.choice(OPERADORES), node(d - 1), node(d - 1))
+
+        return node(depth)
+    return build
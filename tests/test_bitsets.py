@@ -0,0 +1,42 @@
+from itertools import product
+
+import pytest
+
+from formulas import parse_formula, variables
+from bitsets import evaluate_bits, variable_mask, classify_bits, column_letters
+from truth_table import evaluate
+
+
+def rows(names):
+    """Asignaciones en el orden de la tabla: fila 0 = todas las variables en V."""
+    for values in product((True, False), repeat=len(names)):
+        yield dict(zip(names, values))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_columna_coincide_con_la_evaluacion_fila_a_fila(random_formula, seed):
+    node = random_formula(seed)
+    names = variables(node)
+    mask = evaluate_bits(node, names)
+    for i, env in enumerate(rows(names)):
+        assert bool(mask >> i & 1) == evaluate(node, env)
+
+
+def test_nombres_adicionales_amplian_la_columna():
+    node = parse_formula("P ∧ Q")
+    mask = evaluate_bits(node, ["P", "Q", "R"])
+    assert column_letters(mask, 3) == "VVFFFFFF"
+
+
+@pytest.mark.parametrize("n_vars", range(1, 7))
+def test_mascaras_de_variables(n_vars):
+    names = [f"X{i}" for i in range(n_vars)]
+    for index, name in enumerate(names):
+        mask = variable_mask(index, n_vars)
+        assert [bool(mask >> i & 1) for i in range(1 << n_vars)] == [env[name] for env in rows(names)]
+
+
+def test_clasificacion_de_columnas():
+    assert classify_bits(evaluate_bits(parse_formula("P ∨ ¬P")), 1) == (True, False)
+    assert classify_bits(evaluate_bits(parse_formula("P ∧ ¬P")), 1) == (False, True)
+    assert classify_bits(evaluate_bits(parse_formula("P → Q")), 2) == (False, False)
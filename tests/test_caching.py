@@ -0,0 +1,90 @@
+import pytest
+
+import caching
+from caching import SimpleCache
+
+
+class Reloj:
+    """Sustituto de time.monotonic para avanzar el tiempo a mano."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(caching.time, "monotonic", reloj)
+    return reloj
+
+
+def test_desaloja_la_menos_usada():
+    cache = SimpleCache(maxsize=3, ttl=60)
+    for key in "abc":
+        cache.set(key, key.upper())
+    assert cache.get("a") == "A"  # "a" pasa a ser la más reciente
+    cache.set("d", "D")
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in "acd"] == ["A", "C", "D"]
+    assert len(cache) == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sobrescribir_no_desaloja():
+    cache = SimpleCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 3)
+    assert cache.get("a") == 3 and cache.get("b") == 2
+    assert cache.stats()["evictions"] == 0
+
+
+def test_caducidad(reloj):
+    cache = SimpleCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    reloj.now += 4.9
+    assert cache.get("a") == 1
+    reloj.now += 0.2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_las_caducadas_se_descartan_al_escribir(reloj):
+    cache = SimpleCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    reloj.now += 10
+    cache.set("c", 3)
+    assert len(cache) == 1
+    assert cache.stats()["expirations"] == 2
+
+
+def test_ttl_infinito(reloj):
+    cache = SimpleCache(maxsize=10, ttl=float("inf"))
+    cache.set("a", 1)
+    reloj.now += 1e9
+    assert cache.get("a") == 1
+
+
+@pytest.mark.parametrize("stripes", [1, 4])
+def test_segmentos_respetan_el_tamaño(stripes):
+    cache = SimpleCache(maxsize=64, ttl=60, stripes=stripes)
+    for i in range(1000):
+        cache.set(i, i)
+    assert len(cache) <= 64
+    assert all(cache.get(i) == i for i in range(990, 1000))
+
+
+def test_borrar_y_vaciar():
+    cache = SimpleCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None and cache.get("b") == 2
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,78 @@
+import pytest
+
+from formulas import parse_formula, merge_variables, to_str
+from equivalence import check_equivalence, _check_bits, _check_sat
+from sat import Solver, BudgetExceeded
+from truth_table import evaluate
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_sat_coincide_con_las_columnas(random_formula, seed):
+    a = random_formula(2 * seed)
+    b = random_formula(2 * seed + 1)
+    names = merge_variables(a, b)
+    equivalentes, _ = _check_bits(a, b, names)
+    sat_equivalentes, contraejemplo = _check_sat(a, b, names)
+    assert sat_equivalentes == equivalentes
+    if not equivalentes:
+        assert evaluate(a, contraejemplo) != evaluate(b, contraejemplo)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_sat_reconoce_formulas_equivalentes(random_formula, seed):
+    a = random_formula(seed)
+    # A ≡ ¬¬A y A ≡ (A ∧ ⊤): el resolutor debe demostrarlo sin contraejemplo
+    b = parse_formula(f"¬¬({to_str(a)}) ∧ (P ∨ ¬P)")
+    assert _check_sat(a, b, merge_variables(a, b)) == (True, None)
+
+
+@pytest.mark.parametrize("a, b, equivalentes", [
+    ("P → Q", "¬P ∨ Q", True),
+    ("¬(P ∧ Q)", "¬P ∨ ¬Q", True),
+    ("P ↔ Q", "(P → Q) ∧ (Q → P)", True),
+    ("P → Q", "Q → P", False),
+    ("P ⊕ Q", "P ↔ Q", False),
+])
+def test_casos_conocidos(a, b, equivalentes):
+    fa, fb = parse_formula(a), parse_formula(b)
+    resultado, contraejemplo = check_equivalence(fa, fb)
+    assert resultado is equivalentes
+    if not equivalentes:
+        assert evaluate(fa, contraejemplo) != evaluate(fb, contraejemplo)
+
+
+def test_muchas_variables_usa_sat():
+    n = 40
+    a = parse_formula(" ∧ ".join(f"(X{i} → X{i + 1})" for i in range(n)))
+    b = parse_formula(" ∧ ".join(f"(¬X{i} ∨ X{i + 1})" for i in range(n)))
+    assert check_equivalence(a, b) == (True, None)
+    c = parse_formula(" ∧ ".join(f"(X{i + 1} → X{i})" for i in range(n)))
+    equivalentes, contraejemplo = check_equivalence(a, c)
+    assert not equivalentes
+    assert evaluate(a, contraejemplo) != evaluate(c, contraejemplo)
+
+
+def test_resolutor_clausulas():
+    solver = Solver()
+    x, y = solver.new_var(), solver.new_var()
+    solver.add_clause([x, y])
+    solver.add_clause([-x])
+    model = solver.solve()
+    assert model[y] and not model[x]
+    solver.add_clause([-y])
+    assert solver.solve() is None
+
+
+def test_presupuesto_de_conflictos():
+    # Principio del palomar con 6 palomas y 5 nidos: insatisfacible y costoso para CDCL
+    solver = Solver()
+    palomas, nidos = 6, 5
+    var = {(p, h): solver.new_var() for p in range(palomas) for h in range(nidos)}
+    for p in range(palomas):
+        solver.add_clause([var[p, h] for h in range(nidos)])
+    for h in range(nidos):
+        for p in range(palomas):
+            for q in range(p + 1, palomas):
+                solver.add_clause([-var[p, h], -var[q, h]])
+    with pytest.raises(BudgetExceeded):
+        solver.solve(max_conflicts=1)
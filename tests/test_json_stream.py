@@ -0,0 +1,86 @@
+import codecs
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONParser, iter_sse_data
+
+DATOS = {
+    "header": ["P", "Q", "P → Q"],
+    "rows": [["V", "V", "V"], ["V", "F", "F"], ["F", "V", "V"], ["F", "F", "V"]],
+    "clasificacion": "Contingencia",
+    "nota": "llaves {} y corchetes [] dentro de \"cadenas\", \\ y acentos: ¬∧∨ é",
+    "vacia": [],
+    "anidado": {"a": [1, {"b": None}], "c": True},
+    "numero": -12.5e-1,
+}
+TEXTO = "Claro, aquí está:\n```json\n" + json.dumps(DATOS, ensure_ascii=False, indent=1) + "\n```\nFin."
+
+
+def analizar(trozos, stream_keys=("rows", "vacia")):
+    parser = IncrementalJSONParser(stream_keys)
+    events = []
+    for trozo in trozos:
+        events.extend(parser.feed(trozo))
+    return events, parser.close()
+
+
+def esperado():
+    return analizar([TEXTO])
+
+
+def test_un_solo_trozo():
+    events, data = esperado()
+    assert data == DATOS
+    assert [e for e in events if e[0] == "elemento"] == [("elemento", "rows", r) for r in DATOS["rows"]]
+    valores = {e[1]: e[2] for e in events if e[0] == "valor"}
+    assert set(valores) == set(DATOS) - {"rows", "vacia"}
+
+
+@pytest.mark.parametrize("corte", range(1, len(TEXTO)))
+def test_cortado_en_cualquier_posicion(corte):
+    assert analizar([TEXTO[:corte], TEXTO[corte:]]) == esperado()
+
+
+def test_caracter_a_caracter():
+    assert analizar(list(TEXTO)) == esperado()
+
+
+def test_bytes_utf8_cortados_en_cualquier_posicion():
+    # Los trozos de red se decodifican de forma incremental antes del analizador
+    crudo = TEXTO.encode("utf-8")
+    for corte in range(1, len(crudo)):
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        trozos = [decoder.decode(crudo[:corte]), decoder.decode(crudo[corte:], final=True)]
+        assert analizar(trozos) == esperado()
+
+
+def test_json_incompleto_o_ausente():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": [1, 2')
+    with pytest.raises(json.JSONDecodeError):
+        parser.close()
+    parser = IncrementalJSONParser()
+    parser.feed("sin json")
+    with pytest.raises(json.JSONDecodeError):
+        parser.close()
+
+
+def test_ignora_lo_que_sigue_al_objeto():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1} {"b": 2}')
+    assert parser.done
+    assert parser.close() == {"a": 1}
+
+
+def test_eventos_sse():
+    lineas = [
+        b'data: {"a": 1}',
+        b'',
+        b': comentario',
+        b'data: {"b":',
+        b'data: 2}',
+        b'',
+        'data: {"c": "ñ"}',
+    ]
+    assert list(iter_sse_data(lineas)) == [{"a": 1}, {"b": 2}, {"c": "ñ"}]
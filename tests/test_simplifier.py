@@ -0,0 +1,54 @@
+import pytest
+
+from formulas import parse_formula, merge_variables, variables
+from bitsets import evaluate_bits
+from simplifier import simplify, minimize, size, REGLA_ORIGINAL
+
+
+def equivalentes(a, b):
+    names = merge_variables(a, b)
+    return evaluate_bits(a, names) == evaluate_bits(b, names)
+
+
+@pytest.mark.parametrize("seed", range(150))
+def test_resultado_equivalente_y_traza_coherente(random_formula, seed):
+    node = random_formula(seed)
+    pasos, simplificada = simplify(node)
+    assert pasos[0]["regla"] == REGLA_ORIGINAL
+    assert pasos[-1]["formula"] == simplificada
+    # Cada paso de la traza es equivalente a la fórmula original y el último es el más corto
+    formulas = [parse_formula(p["formula"]) for p in pasos]
+    for f in formulas:
+        assert equivalentes(node, f)
+    assert size(formulas[-1]) <= min(size(f) for f in formulas)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_minimizacion_heuristica_equivalente(random_formula, seed):
+    # Más variables que MAX_VARIABLES_QM: se usa la heurística Espresso
+    names = [f"X{i}" for i in range(10)]
+    node = random_formula(seed, names=names, depth=6)
+    resultado = minimize(node)
+    if resultado is not None:
+        assert equivalentes(node, resultado[0])
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("P ∧ (P ∨ Q)", "P"),
+    ("¬¬P", "P"),
+    ("(P ∧ Q) ∨ (P ∧ ¬Q)", "P"),
+    ("P ∨ ¬P", "⊤"),
+    ("P ∧ ¬P", "⊥"),
+])
+def test_casos_conocidos(texto, esperado):
+    _, simplificada = simplify(parse_formula(texto))
+    assert simplificada == esperado
+
+
+def test_formulas_muy_anidadas():
+    # Más profundas que el límite de recursión de Python
+    pasos, simplificada = simplify(parse_formula("¬" * 3000 + "P"))
+    assert simplificada == "P"
+    node = parse_formula(" ∧ ".join(["(P ∨ Q)"] * 1500))
+    assert size(node) == 3 * 1500 + 1499
+    assert variables(parse_formula(simplify(node)[1])) == ["P", "Q"]
@@ -0,0 +1,144 @@
+"""
+Motor local de tablas de verdad.
+
+Evalúa una fórmula ya analizada (ver formulas.py) sobre todas las asignaciones
+y produce el mismo formato que devolvía la IA: cabecera, filas con 'V'/'F' y
+clasificación (Tautología, Contradicción o Contingencia).
+"""
+from formulas import AND, OR, XOR, IMPLIES, IFF, Var, Const, Not, BinOp, to_str, variables, connective_count, postorder
+from bitsets import evaluate_bits, evaluate_leaves, variable_mask, classify_bits, column_letters
+from equivalence import check_equivalence, MAX_VARIABLES_BITSET
+from compiler import compile_formula
+from sat import BudgetExceeded
+
+# Filas por bloque al generar la tabla por partes (2^BLOCK_BITS)
+BLOCK_BITS = 12
+
+TAUTOLOGIA = "Tautología"
+CONTRADICCION = "Contradicción"
+CONTINGENCIA = "Contingencia"
+# El resolutor SAT agotó su presupuesto sin decidir (fórmulas de más de 24 variables)
+INDETERMINADA = "Indeterminada"
+
+
+def evaluate(node, env):
+    """
+    Evalúa la fórmula para una asignación {variable: bool} con su función
+    compilada (ver compiler.py), que se genera una vez por fórmula.
+    """
+    fn, names = compile_formula(node)
+    return fn(*[env[name] for name in names])
+
+
+def interpret(node, env):
+    """Evalúa la fórmula recorriendo el árbol (referencia para evaluate y los benchmarks)."""
+    values = {}
+    for n in postorder(node):
+        if isinstance(n, Var):
+            res = env[n.name]
+        elif isinstance(n, Const):
+            res = n.value
+        elif isinstance(n, Not):
+            res = not values[n.operand]
+        else:
+            a = values[n.left]
+            b = values[n.right]
+            op = n.op
+            if op == AND:
+                res = a and b
+            elif op == OR:
+                res = a or b
+            elif op == IMPLIES:
+                res = (not a) or b
+            elif op == IFF:
+                res = a == b
+            elif op == XOR:
+                res = a != b
+            else:
+                raise ValueError(f"Conectivo desconocido: {op}")
+        values[n] = res
+    return values[node]
+
+
+def subformulas(node):
+    """
+    Sub-fórmulas compuestas sin repetir, en orden de complejidad creciente
+    (a igual complejidad, por orden de aparición). Una sub-fórmula que se
+    repite es una sola columna. La fórmula completa queda siempre al final.
+    """
+    order = [n for n in postorder(node) if isinstance(n, (Not, BinOp))]
+    position = {n: i for i, n in enumerate(order)}
+    return sorted(order, key=lambda n: (connective_count(n), position[n]))
+
+
+def classify_from_bits(mask, n_vars):
+    """Clasificación a partir de la columna final en formato de bits."""
+    always_true, always_false = classify_bits(mask, n_vars)
+    if always_true:
+        return TAUTOLOGIA
+    if always_false:
+        return CONTRADICCION
+    return CONTINGENCIA
+
+
+def table_columns(node):
+    """Devuelve (variables, sub-fórmulas, cabecera) de la tabla de la fórmula."""
+    names = variables(node)
+    columns = [node] if isinstance(node, Const) else subformulas(node)
+    return names, columns, names + [to_str(c) for c in columns]
+
+
+def iter_rows(node, start=0, stop=None):
+    """
+    Genera las filas [start, stop) de la tabla con 'V'/'F'.
+
+    Se evalúan bloques de 2^BLOCK_BITS filas en modo bit-paralelo: dentro de
+    un bloque solo cambian las últimas variables y las primeras son constantes,
+    así que la memoria no depende del total de filas y las filas anteriores a
+    `start` no se calculan.
+    """
+    names, columns, _ = table_columns(node)
+    n_vars = len(names)
+    total = 1 << n_vars
+    stop = total if stop is None else min(stop, total)
+    if start >= stop:
+        return
+    bits = min(BLOCK_BITS, n_vars)
+    high = n_vars - bits
+    block_rows = 1 << bits
+    full = (1 << block_rows) - 1
+    low_leaves = {names[high + j]: variable_mask(j, bits) for j in range(bits)}
+    var_nodes = [Var(name) for name in names]
+
+    for block in range(start >> bits, ((stop - 1) >> bits) + 1):
+        leaves = dict(low_leaves)
+        for j in range(high):
+            leaves[names[j]] = 0 if (block >> (high - 1 - j)) & 1 else full
+        memo = {}
+        evaluate_leaves(node, leaves, block_rows, memo)
+        base = block << bits
+        lo = max(start, base) - base
+        hi = min(stop, base + block_rows) - base
+        letters = [column_letters(memo[v], bits)[lo:hi] for v in var_nodes]
+        letters += [column_letters(memo[c], bits)[lo:hi] for c in columns]
+        for row in zip(*letters):
+            yield list(row)
+
+
+def classify_formula(node):
+    """
+    Clasificación sin recorrer la tabla fila a fila: con pocas variables se
+    usa la columna bit-paralela y, con muchas, dos comprobaciones SAT
+    (INDETERMINADA si alguna agota su presupuesto de conflictos).
+    """
+    names = variables(node)
+    if len(names) <= MAX_VARIABLES_BITSET:
+        return classify_from_bits(evaluate_bits(node, names), len(names))
+    try:
+        if check_equivalence(node, Const(True))[0]:
+            return TAUTOLOGIA
+        if check_equivalence(node, Const(False))[0]:
+            return CONTRADICCION
+    except BudgetExceeded:
+        return INDETERMINADA
+    return CONTINGENCIA